@@ -1,8 +1,23 @@
 import streamlit as st
+import atexit
+import functools
+import math
+import os
 import time
-import random
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from asset_grid import asset_grid, card
+from pionier import IMMINENT_FAILURE, STATUS_LABELS, WARNING_HOURS, FleetState
+from pionier.asset import AssetData
+from pionier.hierarchy import rollups
+from pionier.history import DEFAULT_RESOLUTIONS, HistoryStore, fit_resolutions, span
+from pionier.journal import EventJournal
+from pionier.planning import MaintenancePlanner
+from pionier.service import SimulationService
+from pionier.snapshots import SnapshotError, load_snapshot
+from pionier.synthetic import synthetic_fleet
+from pionier.views import HEALTH_BANDS, select_rows
+from pionier.telemetry import DEFAULT_BATCH_SIZE, TelemetryFeed, open_source
 
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(
@@ -13,25 +28,12 @@ st.set_page_config(
 )
 
 # --- CSS POUR LE STYLE PROFESSIONNEL ---
+# (Le style et l'interactivité des cartes sont chargés une seule fois par le composant asset_grid)
 st.markdown("""
 <style>
 @import url('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css');
 body { background-color: #0E1117; color: #FAFAFA; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
 .main-title { font-size: 2.5rem; font-weight: 700; color: #FFFFFF; text-align: center; margin-bottom: 1rem; text-shadow: 0 0 10px rgba(0, 255, 150, 0.5); }
-.asset-card { background-color: #262730; border: 1px solid #434654; border-radius: 12px; padding: 20px; cursor: pointer; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1); box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2); }
-.asset-card:hover { transform: scale(1.03); box-shadow: 0 8px 24px rgba(0, 150, 255, 0.3); border-color: #00BFFF; }
-.asset-card.grow { transform: scale(1.05); z-index: 10; box-shadow: 0 10px 30px rgba(0, 255, 150, 0.4); border-color: #00FF7F; }
-.card-header { display: flex; align-items: center; margin-bottom: 15px; border-bottom: 1px solid #434654; padding-bottom: 10px; }
-.card-header i { font-size: 1.5rem; margin-right: 15px; color: #00BFFF; }
-.card-header h3 { margin: 0; font-size: 1.2rem; font-weight: 600; color: #FFFFFF; }
-.card-content { display: flex; justify-content: space-around; align-items: center; flex-wrap: wrap; }
-.metric { text-align: center; padding: 10px; }
-.metric-label { font-size: 0.8rem; color: #B0B3B8; text-transform: uppercase; letter-spacing: 1px; }
-.metric-value { font-size: 1.8rem; font-weight: 700; margin-top: 5px; }
-.prediction-date { font-size: 1.1rem; font-weight: 600; color: #FFD700; text-align: center; margin-top: 10px; padding: 8px; background-color: rgba(255, 215, 0, 0.1); border-radius: 8px; }
-.health-good { color: #00FF7F; }
-.health-warning { color: #FFD700; }
-.health-critical { color: #FF4500; }
 .sidebar .sidebar-content { background-color: #262730; }
 .event-log-container { height: 250px; overflow-y: auto; background-color: #1e1f26; border-radius: 8px; padding: 10px; }
 .event-log-entry { padding: 8px; border-left: 3px solid #434654; margin-bottom: 5px; }
@@ -41,262 +43,419 @@ body { background-color: #0E1117; color: #FAFAFA; font-family: 'Segoe UI', Tahom
 </style>
 """, unsafe_allow_html=True)
 
-# --- JAVASCRIPT POUR L'INTERACTIVITÉ ---
-st.markdown("""
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    const cards = document.querySelectorAll('.asset-card');
-    cards.forEach(card => {
-        card.addEventListener('click', function() {
-            if (this.classList.contains('grow')) { this.classList.remove('grow'); }
-            else { cards.forEach(c => c.classList.remove('grow')); this.classList.add('grow'); }
-        });
-    });
-});
-</script>
-""", unsafe_allow_html=True)
 
-
-# --- CLASSE ASSETDATA AMÉLIORÉE POUR LA PRÉDICTION ---
-class AssetData:
-    """
-    Représente un équipement avec une logique de simulation avancée
-    incluant la prédiction de la date de panne et le calcul des coûts.
-    """
-    def __init__(self, name, icon, initial_health, degradation_rate, cost_of_failure):
-        self.name = name
-        self.icon = icon
-        self.health = initial_health
-        self.previous_health = initial_health
-        self.status = "Operational"
-        self.last_status = "Operational"
-        self.degradation_rate = degradation_rate  # Taux de dégradation par cycle
-        self.cost_of_failure = cost_of_failure  # Coût d'une panne catastrophique
-        self.active_alerts = []
-        
-        # --- Fonctionnalités Prédictives ---
-        self.predicted_failure_date = None
-        self.time_to_failure_hours = None
-
-    def update(self):
-        """Met à jour l'état de l'équipement et calcule la prédiction."""
-        self.previous_health = self.health
-        self.health -= self.degradation_rate
-        self.health = max(0, self.health)
-
-        # --- Calcul de la prédiction de panne ---
-        # Si la santé est parfaite, on ne prédit pas de panne
-        if self.health >= 99:
-            self.predicted_failure_date = None
-            self.time_to_failure_hours = None
-        else:
-            # Calcul simple : il reste 'health' points à perdre, à un rythme de 'degradation_rate' par cycle.
-            # Un cycle est de 3 secondes dans notre simulation, mais nous le traitons comme une heure pour le calcul.
-            hours_to_failure = (self.health / self.degradation_rate)
-            self.time_to_failure_hours = int(hours_to_failure)
-            self.predicted_failure_date = datetime.now() + timedelta(hours=hours_to_failure)
-
-        # --- Génération des alertes basées sur la prédiction ---
-        self._check_and_generate_alerts()
-        self.last_status = self.status
-
-    def _check_and_generate_alerts(self):
-        """Génère des alertes en fonction du temps avant la panne prédit."""
-        self.active_alerts = []
-        new_status = "Operational"
-
-        if self.time_to_failure_hours is None:
-            new_status = "Operational"
-        elif self.time_to_failure_hours > 168: # Plus de 7 jours
-            new_status = "Operational"
-        elif self.time_to_failure_hours > 72: # Entre 3 et 7 jours
-            new_status = "Anomaly Detected"
-            self.active_alerts.append({"level": "warning", "title": "Performance Degradation", "recommendation": "Schedule inspection within the week."})
-        elif self.time_to_failure_hours > 24: # Entre 1 et 3 jours
-            new_status = "Maintenance Required"
-            self.active_alerts.append({"level": "error", "title": "Critical Wear Detected", "recommendation": "Plan parts replacement within 48 hours."})
-        else: # Moins de 24h
-            new_status = "Imminent Failure"
-            self.degradation_rate = 0 # Arrêter la dégradation
-            self.active_alerts.append({"level": "error", "title": "IMMINENT FAILURE", "recommendation": "SHUTDOWN IMMEDIATELY. Emergency maintenance required."})
-        
-        # --- Logging intelligent des changements de statut ---
-        if new_status != self.last_status:
-            if new_status == "Imminent Failure": self.add_event("error", f"Imminent failure predicted for {self.name} within {self.time_to_failure_hours} hours!")
-            elif new_status == "Maintenance Required": self.add_event("error", f"Critical state reached on {self.name}. Failure predicted in {self.time_to_failure_hours} hours.")
-            elif new_status == "Anomaly Detected": self.add_event("warning", f"Performance anomaly detected on {self.name}.")
-            elif new_status == "Operational" and self.last_status != "Operational": self.add_event("success", f"{self.name} is back to operational status.")
-
-        self.status = new_status
-
-    def trigger_catastrophic_failure(self):
-        """Simule une panne catastrophique."""
-        self.health = 5
-        self.time_to_failure_hours = 0
-        self.predicted_failure_date = datetime.now()
-        self.status = "Imminent Failure"
-        self.add_event("error", f"Catastrophic failure SIMULATED on {self.name}!")
-        st.toast(f"🚨 CATASTROPHIC FAILURE on {self.name}!", icon="🚨")
-
-    def perform_maintenance(self):
-        """Simule une maintenance réussie."""
-        self.health = random.randint(92, 99)
-        self.status = "Operational (Post-Maintenance)"
-        self.degradation_rate = random.uniform(0.05, 0.15) # Le taux de dégradation peut changer après une maintenance
-        self.active_alerts = []
-        self.predicted_failure_date = None
-        self.time_to_failure_hours = None
-        self.add_event("success", f"Maintenance successfully performed on {self.name}.")
-
-    def add_event(self, level, message):
-        """Ajoute un événement au journal global."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        event = {"time": timestamp, "level": level, "message": message}
-        st.session_state.event_log.insert(0, event)
-
-# --- INITIALISATION DE L'ÉTAT AVEC DES DONNÉES RICHES ---
-# Chaque actif a un état de départ et un taux de dégradation différent pour créer un scénario riche.
-if 'assets' not in st.session_state:
-    st.session_state.assets = {
-        "P-101": AssetData("Centrifugal Pump P-101", "fa-oil-can", initial_health=95, degradation_rate=0.08, cost_of_failure=85000),
-        "C-205": AssetData("Compressor C-205", "fa-wind", initial_health=75, degradation_rate=0.12, cost_of_failure=120000),
-        "T-310": AssetData("Gas Turbine T-310", "fa-fan", initial_health=40, degradation_rate=0.15, cost_of_failure=250000), # Actif critique
-        "R-420": AssetData("Chemical Reactor R-420", "fa-flask", initial_health=98, degradation_rate=0.05, cost_of_failure=500000),
-    }
-if 'event_log' not in st.session_state:
-    st.session_state.event_log = []
+# --- SERVICE DE SIMULATION PARTAGÉ ---
+# Une seule simulation par processus : toutes les sessions lisent le même instantané.
+SIMULATION_TICK_SECONDS = 3
+EVENT_LOG_CAPACITY = 1000  # Nombre maximal d'événements conservés en mémoire
+TOP_AT_RISK = 50  # Nombre d'équipements listés dans les alertes et le planning
+# Source de télémétrie optionnelle : fichier .csv/.parquet, "stdin" ou "tcp://hôte:port"
+TELEMETRY_SOURCE = os.environ.get("PIONIER_TELEMETRY")
+TELEMETRY_BATCH_SIZE = int(os.environ.get("PIONIER_TELEMETRY_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+# Historique : échantillons bruts conservés par équipement, et répertoire optionnel de débordement sur disque
+HISTORY_CAPACITY = int(os.environ.get("PIONIER_HISTORY_CAPACITY", 256))
+HISTORY_SPILL_DIR = os.environ.get("PIONIER_HISTORY_DIR")
+# Budgets de l'historique : au-delà, la profondeur des agrégats est réduite (≈ 38 Kio par équipement sinon).
+# Le budget disque remplace le budget mémoire quand l'historique est déporté dans PIONIER_HISTORY_DIR
+HISTORY_MEMORY_MB = int(os.environ.get("PIONIER_HISTORY_MEMORY_MB", 1024))
+HISTORY_DISK_MB = int(os.environ.get("PIONIER_HISTORY_DISK_MB", 16384))
+TREND_POINTS = 300  # Nombre maximal de points par courbe de tendance
+# Vue flotte : seules les cartes de la page affichée sont construites et envoyées
+PAGE_SIZES = (12, 24, 48, 96)
+SORT_LABELS = {
+    "risk": "Risk (earliest possible failure)",
+    "time_to_failure": "Predicted time to failure",
+    "health": "Health (lowest first)",
+    "cost_of_failure": "Cost of failure (highest first)",
+}
+# Planning : nombre d'équipes de maintenance disponibles et budget de calcul par cycle
+MAINTENANCE_CREWS = int(os.environ.get("PIONIER_CREWS", 2))
+PLANNING_BUDGET_SECONDS = 0.2
+# Export optionnel des métriques au format Prometheus : fichier réécrit à chaque tick et/ou port HTTP local
+METRICS_FILE = os.environ.get("PIONIER_METRICS_FILE")
+METRICS_PORT = os.environ.get("PIONIER_METRICS_PORT")
+# Instantané binaire de la flotte : rechargé au démarrage s'il existe, réécrit périodiquement
+SNAPSHOT_PATH = os.environ.get("PIONIER_SNAPSHOT")
+SNAPSHOT_INTERVAL = float(os.environ.get("PIONIER_SNAPSHOT_INTERVAL", 60))
+# Journal d'audit durable (SQLite) : tous les événements, écrits par lots en arrière-plan
+JOURNAL_PATH = os.environ.get("PIONIER_JOURNAL")
+AUDIT_TRAIL_EVENTS = 20  # Événements du journal affichés pour l'équipement sélectionné
+# Taille d'une flotte synthétique simulée à la place de la flotte de démonstration (tests de charge)
+FLEET_SIZE = int(os.environ.get("PIONIER_FLEET_SIZE", 0))
+
+
+def demo_fleet():
+    """Flotte de démonstration utilisée en l'absence d'instantané et de PIONIER_FLEET_SIZE."""
+    # Chaque actif a un état de départ et un taux de dégradation différent pour créer un scénario riche.
+    fleet = FleetState()
+    fleet.add_asset("P-101", "Centrifugal Pump P-101", "fa-oil-can", initial_health=95, degradation_rate=0.08, cost_of_failure=85000)
+    fleet.add_asset("C-205", "Compressor C-205", "fa-wind", initial_health=75, degradation_rate=0.12, cost_of_failure=120000)
+    fleet.add_asset("T-310", "Gas Turbine T-310", "fa-fan", initial_health=40, degradation_rate=0.15, cost_of_failure=250000) # Actif critique
+    fleet.add_asset("R-420", "Chemical Reactor R-420", "fa-flask", initial_health=98, degradation_rate=0.05, cost_of_failure=500000)
+    # Sites et zones de rattachement
+    fleet.set_location(fleet.index["P-101"], "North Plant", "Pumping Station")
+    fleet.set_location(fleet.index["C-205"], "North Plant", "Gas Compression")
+    fleet.set_location(fleet.index["T-310"], "North Plant", "Power Generation")
+    fleet.set_location(fleet.index["R-420"], "South Plant", "Chemical Processing")
+    return fleet
+
+
+@st.cache_resource
+def get_simulation_service():
+    """Crée et démarre le service de simulation partagé par toutes les sessions."""
+    fleet, events = None, []
+    if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH):
+        try:
+            fleet, events = load_snapshot(SNAPSHOT_PATH)
+        except (OSError, SnapshotError) as exc:
+            st.warning(f"Could not restore the fleet snapshot ({exc}); starting from the demo fleet.")
+    if fleet is None:
+        fleet = synthetic_fleet(FLEET_SIZE) if FLEET_SIZE else demo_fleet()
+    budget = HISTORY_DISK_MB if HISTORY_SPILL_DIR else HISTORY_MEMORY_MB
+    resolutions = fit_resolutions(fleet.size, HISTORY_CAPACITY, budget << 20)
+    history = HistoryStore(capacity=HISTORY_CAPACITY, resolutions=resolutions, assets=fleet.size,
+                           spill_dir=HISTORY_SPILL_DIR)
+    planner = MaintenancePlanner(crews=MAINTENANCE_CREWS, time_budget=PLANNING_BUDGET_SECONDS)
+    journal = EventJournal(JOURNAL_PATH) if JOURNAL_PATH else None
+    service = SimulationService(fleet, tick_interval=SIMULATION_TICK_SECONDS, event_capacity=EVENT_LOG_CAPACITY,
+                                history=history, planner=planner, metrics_file=METRICS_FILE,
+                                snapshot_path=SNAPSHOT_PATH, snapshot_interval=SNAPSHOT_INTERVAL,
+                                initial_events=events, journal=journal)
+    # À l'arrêt du serveur : dernier instantané et écriture des événements en attente
+    atexit.register(service.stop, timeout=5)
+    if METRICS_PORT:
+        service.metrics.serve(int(METRICS_PORT))
+    if TELEMETRY_SOURCE:
+        feed = TelemetryFeed(open_source(TELEMETRY_SOURCE, TELEMETRY_BATCH_SIZE), fleet.index)
+        service.attach_telemetry(feed.start())
+    return service.start()
+
+
+service = get_simulation_service()
 
 # --- LOGIQUE PRINCIPALE DE L'APPLICATION ---
 
 st.markdown('<h1 class="main-title">PIONIER - Predictive Operations Cockpit</h1>', unsafe_allow_html=True)
 
-# --- BARRE LATÉRALE : ALERTES, PERSPECTIVE ET CONTRÔLE ---
-with st.sidebar:
-    st.title("🎛️ Control & Perspective")
+
+# --- INSTRUMENTATION DES PANNEAUX ---
+def instrumented(panel, render):
+    """
+    Mesure la durée de rendu d'un panneau et son retard de rafraîchissement
+    (intervalle réel entre deux exécutions au-delà de la vitesse choisie).
+    """
+    @functools.wraps(render)  # Garde le nom de la fonction : il identifie le fragment
+    def run(*args):
+        last_runs = st.session_state.setdefault("_last_render", {})
+        now = time.monotonic()
+        if panel in last_runs:
+            lag = now - last_runs[panel] - st.session_state.get("simulation_speed", SIMULATION_TICK_SECONDS)
+            if lag >= 0:  # Les réexécutions provoquées par l'utilisateur arrivent en avance
+                service.metrics.observe("pionier_refresh_lag_seconds", lag, panel=panel)
+        last_runs[panel] = now
+        with service.metrics.timer("pionier_render_seconds", panel=panel):
+            return render(*args)
+    return run
+
+
+def render_alerts_and_perspective():
+    """Panneaux des alertes actives et de la perspective de maintenance."""
+    snapshot = service.snapshot()
+    fleet = snapshot.fleet
 
     # --- Panneau des alertes actives ---
+    # Les équipements sont lus dans l'index de risque, du plus urgent au moins urgent,
+    # sans parcourir toute la flotte : toutes les pannes imminentes, puis les plus proches.
     st.markdown("### 🔔 Active Alerts")
+    with service.metrics.timer("pionier_render_seconds", panel="alerts"):
+        render_alerts(fleet)
+
+    st.markdown("---")
+
+    # --- NOUVEAU : PANNEAU DE PERSPECTIVE DE MAINTENANCE ---
+    st.markdown("### 📈 Maintenance Perspective")
+    with service.metrics.timer("pionier_render_seconds", panel="schedule"):
+        render_perspective(snapshot)
+
+
+def render_alerts(fleet):
+    """Alertes actives : pannes imminentes, puis les plus proches."""
+    imminent_rows = fleet.rows_with_status(IMMINENT_FAILURE)
+    alert_rows = imminent_rows + [
+        row for row in fleet.most_at_risk(TOP_AT_RISK, within_hours=WARNING_HOURS + 1)
+        if fleet.status[row] != IMMINENT_FAILURE
+    ]
+    # Anomalies de signal sans panne prévue : absentes de l'index par date de panne
+    listed = set(alert_rows)
+    alert_rows += [row for row in fleet.anomalous_rows(TOP_AT_RISK) if row not in listed]
     all_alerts = []
-    for asset in st.session_state.assets.values():
-        for alert in asset.active_alerts:
+    shown = 0  # Équipements listés (et non alertes : un équipement peut en cumuler plusieurs)
+    for row in alert_rows:
+        asset = AssetData(fleet, row)
+        alerts = asset.active_alerts
+        shown += bool(alerts)
+        for alert in alerts:
             all_alerts.append({**alert, "asset": asset.name})
 
     if not all_alerts:
         st.success("✅ All systems nominal.")
     else:
+        total = fleet.alerting_count()
+        if total > shown:
+            st.caption(f"Showing alerts for the {shown} most urgent of {total} assets.")
         for alert in all_alerts:
             if alert["level"] == "error": st.error(f"**{alert['asset']}**: {alert['title']}\n*{alert['recommendation']}*")
             else: st.warning(f"**{alert['asset']}**: {alert['title']}\n*{alert['recommendation']}*")
-    
-    st.markdown("---")
 
-    # --- NOUVEAU : PANNEAU DE PERSPECTIVE DE MAINTENANCE ---
-    st.markdown("### 📈 Maintenance Perspective")
-    
-    # Créer un planning de maintenance prédictive
+
+def render_perspective(snapshot):
+    """Planning de maintenance et économies attendues."""
+    fleet = snapshot.fleet
+    # Planning sous contrainte d'équipes, recalculé par le service à chaque tick
+    plan = snapshot.plan
     maintenance_schedule = []
-    total_potential_savings = 0
-    
-    for asset in st.session_state.assets.values():
-        if asset.predicted_failure_date and asset.time_to_failure_hours < 168: # Moins de 7 jours
-            maintenance_schedule.append({
-                "Asset": asset.name,
-                "Predicted Failure": asset.predicted_failure_date.strftime("%Y-%m-%d %H:%M"),
-                "Hours to Failure": f"{asset.time_to_failure_hours} h",
-                "Cost of Failure": f"${asset.cost_of_failure:,}"
-            })
-            # On estime qu'une maintenance planifiée coûte 10% de la panne
-            total_potential_savings += asset.cost_of_failure * 0.9
-
-    if maintenance_schedule:
-        st.dataframe(pd.DataFrame(maintenance_schedule), use_container_width=True)
-        
-        # Afficher le KPI de coût évité
+    for job in plan.jobs[:TOP_AT_RISK]:
+        asset = AssetData(fleet, fleet.index[job.key])
+        start = datetime.fromtimestamp(snapshot.timestamp + (job.start - plan.clock) * 3600)
+        maintenance_schedule.append({
+            "Asset": asset.name,
+            "Crew": job.crew + 1,
+            "Start": "In progress" if job.start <= plan.clock else start.strftime("%Y-%m-%d %H:%M"),
+            # Un équipement maintenu depuis le dernier tick n'a plus de prédiction
+            "Predicted Failure": asset.predicted_failure_date.strftime("%Y-%m-%d %H:%M") if asset.predicted_failure_date else "-",
+            "Hours to Failure": f"{asset.time_to_failure_hours} h" if asset.time_to_failure_bounds else "-",
+            "90% Range": "{} - {} h".format(*asset.time_to_failure_bounds) if asset.time_to_failure_bounds else "-",
+            "Failure Risk": f"{job.failure_probability:.0%}",
+            "Cost of Failure": f"${asset.cost_of_failure:,}"
+        })
+
+    if maintenance_schedule or plan.unscheduled:
+        if maintenance_schedule:
+            import pandas as pd  # Import paresseux : seul ce panneau et les tendances utilisent pandas
+            st.dataframe(pd.DataFrame(maintenance_schedule), use_container_width=True)
+        if plan.unscheduled:
+            st.caption(f"{len(plan.unscheduled)} at-risk assets cannot be serviced in time by {MAINTENANCE_CREWS} crews.")
+
+        # Afficher le KPI de coût évité, comparé au cas (irréaliste) d'équipes illimitées
         st.metric(
-            "Potential Savings (Next 7 Days)",
-            f"${total_potential_savings:,}",
-            delta="vs. reactive maintenance"
+            "Expected Savings (Next 7 Days)",
+            f"${plan.expected_savings:,.0f}",
+            delta=f"${plan.expected_savings - plan.unconstrained_savings:,.0f} vs. unlimited crews",
         )
     else:
         st.info("No critical maintenance predicted in the next 7 days.")
 
+
+def render_trend(asset_key):
+    """Courbes de tendance d'un équipement, lues dans l'historique agrégé."""
+    import pandas as pd
+    fleet = service.snapshot().fleet
+    row = fleet.index[asset_key]
+    st.markdown(f"### 📉 Trends - {fleet.names[row]}")
+
+    def trend(metric, label):
+        series = service.history.series(row, metric, max_points=TREND_POINTS)
+        return pd.Series(series["mean"], index=pd.to_datetime(series["timestamps"], unit="s"), name=label)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.line_chart(pd.concat([
+            trend("health", "AI Health (%)"),
+            trend("temperature", "Temp (°C)"),
+            trend("vibration", "Vibration (mm/s)"),
+        ], axis=1))
+    with col2:
+        st.line_chart(trend("time_to_failure_hours", "Hours to Failure").to_frame())
+    if service.history.span < span(DEFAULT_RESOLUTIONS):
+        # Profondeur réduite par fit_resolutions : le dire plutôt que laisser croire à un historique complet
+        budget = "PIONIER_HISTORY_DISK_MB" if HISTORY_SPILL_DIR else "PIONIER_HISTORY_MEMORY_MB (or set PIONIER_HISTORY_DIR)"
+        st.caption(f"History limited to the last {service.history.span / 3600:.0f} h for this fleet size "
+                   f"instead of {span(DEFAULT_RESOLUTIONS) / 3600:.0f} h; raise {budget} to keep more.")
+
+    if service.journal is not None:
+        # Piste d'audit : derniers événements de l'équipement, lus dans le journal durable via son index
+        events = list(service.journal.query(asset=asset_key, limit=AUDIT_TRAIL_EVENTS, descending=True))
+        if events:
+            st.markdown("#### 🗂️ Audit Trail")
+            st.dataframe(pd.DataFrame(events, columns=["time", "level", "message"]).rename(columns=str.capitalize),
+                         hide_index=True, use_container_width=True)
+
+
+def render_event_log():
+    """Journal des événements partagé."""
+    events = service.snapshot().events
+    log_html = '<div class="event-log-container">'
+    if not events:
+        log_html += '<p style="color: #888;">No events yet.</p>'
+    else:
+        for event in events[:20]:
+            log_html += f"<div class=\"event-log-entry {event['level']}\"><b>{event['time']}</b> - {event['message']}</div>"
+    log_html += '</div>'
+    st.markdown(log_html, unsafe_allow_html=True)
+
+
+def render_hierarchy(fleet):
+    """
+    Indicateurs de l'usine, d'un site ou d'une zone, lus dans les agrégats
+    tenus à jour par la flotte. Retourne les zones sélectionnées (None = toutes).
+    """
+    import pandas as pd
+    sites = list(dict.fromkeys(site for site, _ in fleet.locations))
+    col1, col2 = st.columns(2)
+    site = col1.selectbox("Site", [None, *sites], format_func=lambda s: s or "All sites", key="fleet_site")
+    zone_names = [zone for zone_site, zone in fleet.locations if zone_site == site]
+    if st.session_state.get("fleet_zone") not in zone_names:
+        st.session_state["fleet_zone"] = None  # Zone d'un autre site
+    zone = col2.selectbox("Zone", [None, *zone_names], format_func=lambda z: z or "All zones", key="fleet_zone",
+                          disabled=site is None)
+
+    # Niveau affiché, puis ses enfants (sites de l'usine, zones d'un site)
+    if site is None:
+        current, children, label = rollups(fleet, "plant")[0], rollups(fleet, "site"), "Site"
+    elif zone is None:
+        current = next(r for r in rollups(fleet, "site") if r.site == site)
+        children, label = rollups(fleet, "zone", site), "Zone"
+    else:
+        current = next(r for r in rollups(fleet, "zone", site) if r.zone == zone)
+        children, label = [], None
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Assets at Risk", f"{current.at_risk} of {current.assets}")
+    col2.metric("Money at Risk", f"${current.money_at_risk:,.0f}")
+    col3.metric("Earliest Failure",
+                "-" if current.worst_row is None else f"{max(current.worst_hours, 0):.0f} h",
+                delta=None if current.worst_row is None else fleet.names[current.worst_row], delta_color="off")
+    if children:
+        st.dataframe(pd.DataFrame([{
+            label: child.site if label == "Site" else child.zone,
+            "Assets": child.assets,
+            "At Risk": child.at_risk,
+            "Money at Risk": f"${child.money_at_risk:,.0f}",
+            "Earliest Failure": "-" if child.worst_row is None
+                                else f"{fleet.names[child.worst_row]} ({max(child.worst_hours, 0):.0f} h)",
+            **{status: int(count) for status, count in zip(STATUS_LABELS, child.status_counts)},
+        } for child in children]), hide_index=True, use_container_width=True)
+    return None if site is None else current.zones
+
+
+def render_asset_cards():
+    """
+    Vue flotte : filtres et tri appliqués côté serveur, puis seules les cartes
+    de la page affichée sont construites et envoyées au composant par différences.
+    """
+    snapshot = service.snapshot()
+    fleet = snapshot.fleet
+    zones = render_hierarchy(fleet) if fleet.locations and fleet.hierarchy is not None else None
+
+    col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 2, 1])
+    statuses = col1.multiselect("Status", range(len(STATUS_LABELS)), format_func=STATUS_LABELS.__getitem__, key="fleet_statuses")
+    bands = col2.multiselect("Health", list(HEALTH_BANDS), format_func=str.capitalize, key="fleet_health")
+    min_cost = col3.number_input("Min. cost of failure ($)", min_value=0, step=10000, key="fleet_min_cost")
+    sort = col4.selectbox("Sort by", list(SORT_LABELS), format_func=SORT_LABELS.__getitem__, key="fleet_sort")
+    page_size = col5.selectbox("Per page", PAGE_SIZES, index=1, key="fleet_page_size")
+
+    # Un changement de filtre ramène à la première page
+    query = (zones and tuple(zones), tuple(statuses), tuple(bands), min_cost, sort, page_size)
+    if st.session_state.get("_fleet_query") != query:
+        st.session_state["_fleet_query"] = query
+        st.session_state["fleet_page"] = 1
+
+    _, total = select_rows(fleet, statuses or None, bands or None, min_cost, sort, limit=0, zones=zones)
+    pages = max(1, math.ceil(total / page_size))
+    st.session_state["fleet_page"] = min(st.session_state.get("fleet_page", 1), pages)
+    page = st.number_input("Page", min_value=1, max_value=pages, key="fleet_page")
+    rows, total = select_rows(fleet, statuses or None, bands or None, min_cost, sort,
+                              offset=(page - 1) * page_size, limit=page_size, zones=zones)
+
+    cards = []
+    for row in rows.tolist():
+        asset = AssetData(fleet, row)
+        cards.append(card(
+            fleet.keys[row], asset.name, asset.icon, asset.health,
+            temperature=asset.temperature,
+            vibration=asset.vibration,
+            prediction=asset.prediction_text,
+        ))
+
+    asset_grid(cards)
+    first = (page - 1) * page_size + 1
+    shown = f"Showing {first}-{first + len(cards) - 1} of {total} matching assets (page {page} of {pages})" if total else "No matching assets"
+    st.caption(
+        f"{shown} · {fleet.size} in fleet · "
+        f"Last update: {time.strftime('%H:%M:%S', time.localtime(snapshot.timestamp))}"
+    )
+
+
+def render_diagnostics():
+    """Panneau de diagnostic : durées par phase (histogrammes), retards et compteurs."""
+    import pandas as pd
+    st.markdown("### 🩺 Diagnostics")
+    timings = [{
+        "Metric": name.removeprefix("pionier_"),
+        "Phase": ", ".join(str(v) for v in labels.values()),
+        "Count": count,
+        "Mean (ms)": round(mean * 1000, 2),
+        "p50 (ms)": round(p50 * 1000, 2),
+        "p95 (ms)": round(p95 * 1000, 2),
+        "Last (ms)": round(last * 1000, 2),
+    } for name, labels, count, mean, p50, p95, last in service.metrics.histograms()]
+    if timings:
+        st.dataframe(pd.DataFrame(timings), hide_index=True)
+    values = [{
+        "Metric": name.removeprefix("pionier_"),
+        "Labels": ", ".join(f"{k}={v}" for k, v in labels.items()),
+        "Value": value,
+    } for name, labels, value in service.metrics.values()]
+    if values:
+        st.dataframe(pd.DataFrame(values), hide_index=True)
+    if METRICS_PORT:
+        st.caption(f"Prometheus endpoint: http://127.0.0.1:{METRICS_PORT}/metrics")
+
+
+# --- BARRE LATÉRALE : ALERTES, PERSPECTIVE ET CONTRÔLE ---
+with st.sidebar:
+    st.title("🎛️ Control & Perspective")
+    overview_area = st.container()
+
     st.markdown("---")
 
     # --- Contrôles de simulation ---
+    # Les commandes sont envoyées au service ; on attend leur application
+    # pour que l'instantané affiché ensuite en tienne compte.
     st.markdown("### ⚙️ Simulation Controls")
-    asset_keys = list(st.session_state.assets.keys())
-    selected_asset_key = st.selectbox("Select an Asset:", asset_keys)
+    fleet = service.snapshot().fleet
+    selected_asset_key = st.selectbox("Select an Asset:", fleet.keys)
+    selected_asset = AssetData(fleet, fleet.index[selected_asset_key], notify=st.toast)
     
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Trigger Maintenance", type="primary", use_container_width=True):
-            st.session_state.assets[selected_asset_key].perform_maintenance()
-            st.rerun()
+            selected_asset.perform_maintenance(service)
     with col2:
         if st.button("Simulate Failure", type="secondary", use_container_width=True):
-            st.session_state.assets[selected_asset_key].trigger_catastrophic_failure()
-            st.rerun()
+            selected_asset.trigger_catastrophic_failure(service)
 
-    simulation_speed = st.slider("Refresh Speed (seconds):", 1, 10, 3)
+    simulation_speed = st.slider("Refresh Speed (seconds):", 1, 10, 3, key="simulation_speed")
+    show_diagnostics = st.checkbox("Show diagnostics", key="show_diagnostics")
 
     st.markdown("---")
     
     # --- Journal des événements ---
     st.markdown("### 📜 Event Log")
-    with st.container():
-        log_html = '<div class="event-log-container">'
-        if not st.session_state.event_log:
-            log_html += '<p style="color: #888;">No events yet.</p>'
-        else:
-            for event in st.session_state.event_log[:20]:
-                log_html += f"<div class=\"event-log-entry {event['level']}\"><b>{event['time']}</b> - {event['message']}</div>"
-        log_html += '</div>'
-        st.markdown(log_html, unsafe_allow_html=True)
-
+    event_log_area = st.container()
+    diagnostics_area = st.container()
+
+# --- RAFRAÎCHISSEMENT EN TEMPS RÉEL ---
+# Chaque panneau est un fragment relu à intervalle régulier : la session ne
+# dort plus dans le script et ne ré-exécute pas toute la page.
+with overview_area:
+    st.fragment(instrumented("overview", render_alerts_and_perspective), run_every=simulation_speed)()
+with event_log_area:
+    st.fragment(instrumented("event_log", render_event_log), run_every=simulation_speed)()
+if show_diagnostics:
+    with diagnostics_area:
+        st.fragment(render_diagnostics, run_every=simulation_speed)()
 
 # --- ZONE PRINCIPALE : CARTES DES ÉQUIPEMENTS AVEC PRÉDICTION ---
-
-# 1. Mettre à jour l'état de tous les équipements
-for asset in st.session_state.assets.values():
-    asset.update()
-
-# 2. Créer les colonnes pour la mise en page
-cols = st.columns(len(st.session_state.assets))
-
-# 3. Itérer sur les colonnes et les équipements pour afficher chaque carte
-for i, (col, (key, asset)) in enumerate(zip(cols, st.session_state.assets.items())):
-    
-    # Déterminer la couleur et la tendance
-    if asset.health > 80: health_color_class = "health-good"
-    elif asset.health > 50: health_color_class = "health-warning"
-    else: health_color_class = "health-critical"
-    
-    # Formater la date de panne prédite pour l'affichage
-    prediction_text = "No failure predicted"
-    if asset.predicted_failure_date:
-        if asset.time_to_failure_hours > 24:
-            prediction_text = f"Failure in {asset.time_to_failure_hours // 24} days"
-        else:
-            prediction_text = f"Failure in {asset.time_to_failure_hours} hours!"
-
-    # Générer le HTML pour une carte avec la prédiction
-    card_html = f"""
-    <div class="asset-card">
-        <div class="card-header"><i class="fas {asset.icon}"></i><h3>{asset.name}</h3></div>
-        <div class="card-content">
-            <div class="metric"><div class="metric-label">AI Health</div><div class="metric-value {health_color_class}">{asset.health:.1f}%</div></div>
-            <div class="metric"><div class="metric-label">Temp (°C)</div><div class="metric-value">{85 + (100 - asset.health) * 0.5:.1f}</div></div>
-            <div class="metric"><div class="metric-label">Vibration (mm/s)</div><div class="metric-value">{2.0 + (100 - asset.health) * 0.1:.2f}</div></div>
-        </div>
-        <div class="prediction-date">
-            <i class="fas fa-clock"></i> {prediction_text}
-        </div>
-    </div>
-    """
-    with col:
-        st.markdown(card_html, unsafe_allow_html=True)
-
-# --- BOUCLE DE SIMULATION EN TEMPS RÉEL ---
-st.caption(f"Last update: {time.strftime('%H:%M:%S')}")
-time.sleep(simulation_speed)
-st.rerun()
+st.fragment(instrumented("cards", render_asset_cards), run_every=simulation_speed)()
+st.fragment(instrumented("trend", render_trend), run_every=simulation_speed)(selected_asset_key)
@@ -0,0 +1,89 @@
+"""
+Composant Streamlit de la grille des équipements.
+Le CSS et le JavaScript sont chargés une seule fois dans l'iframe du
+composant ; à chaque exécution on n'envoie que les valeurs qui ont changé
+depuis le dernier envoi, et le navigateur corrige le DOM en place.
+"""
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_component = components.declare_component(
+    "asset_grid",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"),
+)
+
+# Champs variables d'une carte (clés courtes pour limiter la taille des messages)
+DYNAMIC_FIELDS = ("h", "c", "t", "v", "p")
+
+
+def card(asset_id, name, icon, health, temperature, vibration, prediction):
+    """Construit la description compacte d'une carte, valeurs déjà formatées."""
+    if health > 80: health_class = "health-good"
+    elif health > 50: health_class = "health-warning"
+    else: health_class = "health-critical"
+    return {
+        "id": asset_id,
+        "n": name,
+        "i": icon,
+        "h": f"{health:.1f}%",
+        "c": health_class,
+        "t": f"{temperature:.1f}",
+        "v": f"{vibration:.2f}",
+        "p": prediction,
+    }
+
+
+def diff_cards(sent, cards):
+    """
+    Calcule le message à envoyer : toutes les cartes si `sent` est None,
+    sinon les seuls champs variables modifiés. Retourne (payload, nouvel état envoyé).
+    """
+    if sent is None:
+        return {c["id"]: c for c in cards}, {c["id"]: c for c in cards}
+    payload = {}
+    for c in cards:
+        previous = sent[c["id"]]
+        changes = {f: c[f] for f in DYNAMIC_FIELDS if c[f] != previous[f]}
+        if changes:
+            payload[c["id"]] = changes
+            sent[c["id"]] = c
+    return payload, sent
+
+
+def asset_grid(cards, key="asset_grid"):
+    """
+    Affiche la grille et n'envoie au navigateur que les différences avec
+    l'état déjà affiché. Un envoi complet n'a lieu qu'au premier affichage,
+    quand la liste des cartes change ou quand l'iframe demande une resynchronisation.
+    """
+    state_key = f"_{key}_state"
+    state = st.session_state.get(state_key)
+    if state is None:
+        state = st.session_state[state_key] = {"seq": 0, "sent": {}, "order": [], "resync": None}
+
+    # L'iframe signale par sa valeur qu'elle a perdu le fil (nouveau montage)
+    reply = st.session_state.get(key)
+    full = not state["sent"]
+    if reply and reply.get("resync") != state["resync"]:
+        state["resync"] = reply.get("resync")
+        full = True
+
+    order = [c["id"] for c in cards]
+    if order != state["order"]:
+        full = True
+
+    payload, sent = diff_cards(None if full else state["sent"], cards)
+
+    state["seq"] += 1
+    state["sent"] = sent
+    state["order"] = order
+    _component(
+        seq=state["seq"],
+        full=full,
+        order=order if full else None,
+        cards=payload,
+        key=key,
+        default=None,
+    )
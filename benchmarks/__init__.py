@@ -0,0 +1,3 @@
+"""
+Bancs d'essai de performance de PIONIER (hors ligne, sans navigateur).
+"""
@@ -0,0 +1,231 @@
+"""
+Test de charge du tableau de bord : sessions simultanées de app.py.
+
+Chaque session est un AppTest (exécution sans navigateur du script
+Streamlit) relancé par son propre thread à la vitesse de rafraîchissement
+choisie ; toutes partagent le service de simulation du processus, comme
+les sessions d'un même serveur. Pour chaque nombre de sessions sont
+mesurés les percentiles de latence des réexécutions, la part de
+réexécutions plus longues que la vitesse de rafraîchissement (la session
+prend du retard) et le CPU par session, au-delà de celui du service seul.
+La mémoire retenue par session et la taille de son session_state sont
+mesurées à part, sous tracemalloc.
+
+Une réexécution AppTest relance toute la page, là où le navigateur ne
+relance que les fragments : les latences mesurées sont un majorant.
+
+Exemples :
+    python -m benchmarks.loadtest --sessions 1 5 10 20
+    python -m benchmarks.loadtest --fleet-size 10000 --refresh 1 --duration 60 --json load.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_SESSIONS = (1, 5, 10, 20)
+DEFAULT_REFRESH = 3.0  # Vitesse de rafraîchissement par défaut du curseur de app.py
+DEFAULT_DURATION = 30.0  # Durée de chaque palier, en secondes
+DEFAULT_TIMEOUT = 120.0  # Durée maximale d'une réexécution
+IDLE_SECONDS = 6.0  # Mesure du CPU du service seul (deux ticks de simulation)
+MEMORY_SESSIONS = 5  # Sessions créées sous tracemalloc pour la mesure mémoire
+PERCENTILES = (50, 90, 95, 99)
+
+
+def deep_size(value, seen=None):
+    """Taille approximative (octets) d'un objet et des conteneurs qu'il référence."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+class Session:
+    """Session simulée : un opérateur qui garde le tableau de bord ouvert sur un équipement."""
+    def __init__(self, number, refresh, timeout):
+        self.number = number
+        self.refresh = refresh
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.start_ms = None
+        self.latencies = []  # Réexécutions suivantes, en ms
+        self.errors = 0
+
+    def rerun(self):
+        started = time.perf_counter()
+        self.app.run()
+        elapsed = (time.perf_counter() - started) * 1000
+        if self.app.exception:
+            self.errors += 1
+        return elapsed
+
+    def open(self):
+        """Premier affichage, puis choix d'un équipement propre à la session pour le panneau de tendance."""
+        self.start_ms = self.rerun()
+        assets = self.app.sidebar.selectbox[0]
+        assets.select(assets.options[self.number * 7919 % len(assets.options)])
+
+    def run(self, deadline, delay=0.0):
+        """Réexécute la page toutes les `refresh` secondes jusqu'à `deadline` (horloge monotone)."""
+        time.sleep(delay)
+        self.open()
+        next_run = time.monotonic() + self.refresh
+        while next_run < deadline:
+            time.sleep(max(0.0, next_run - time.monotonic()))
+            self.latencies.append(self.rerun())
+            # Une session en retard enchaîne aussitôt, sans rattraper les rafraîchissements manqués
+            next_run = max(next_run + self.refresh, time.monotonic())
+
+
+def idle_cpu(seconds=IDLE_SECONDS):
+    """Part d'un cœur consommée par le processus sans session active (service de simulation)."""
+    cpu, wall = time.process_time(), time.monotonic()
+    time.sleep(seconds)
+    return (time.process_time() - cpu) / (time.monotonic() - wall)
+
+
+def run_level(count, refresh, duration, timeout, idle_rate):
+    """Fait tourner `count` sessions pendant `duration` secondes et retourne leurs mesures."""
+    sessions = [Session(number, refresh, timeout) for number in range(count)]
+    cpu, wall = time.process_time(), time.monotonic()
+    deadline = wall + duration
+    # Arrivées étalées sur un intervalle de rafraîchissement, comme des opérateurs indépendants
+    threads = [
+        threading.Thread(target=session.run, args=(deadline, random.uniform(0, refresh)), daemon=True)
+        for session in sessions
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - wall
+    cpu = time.process_time() - cpu - idle_rate * wall  # Au-delà du service seul
+
+    latencies = np.array([ms for session in sessions for ms in session.latencies])
+    reruns = len(latencies) + count
+    result = {
+        "sessions": count,
+        "reruns": reruns,
+        "start_ms": float(np.median([session.start_ms for session in sessions])),
+        "late_pct": float(np.mean(latencies > refresh * 1000) * 100) if len(latencies) else 0.0,
+        "cpu_pct_per_session": max(cpu, 0.0) / wall / count * 100,
+        "cpu_ms_per_rerun": max(cpu, 0.0) / reruns * 1000,
+        "errors": sum(session.errors for session in sessions),
+    }
+    for q in PERCENTILES:
+        result[f"p{q}_ms"] = float(np.percentile(latencies, q)) if len(latencies) else None
+    result["max_ms"] = float(latencies.max()) if len(latencies) else None
+    return result
+
+
+def session_memory(refresh, timeout, count=MEMORY_SESSIONS):
+    """
+    Mémoire retenue par session après deux affichages (tracemalloc), et
+    taille de son session_state, au total et par clé.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        sessions = [Session(number, refresh, timeout) for number in range(count)]
+        for session in sessions:
+            session.open()
+            session.rerun()
+        gc.collect()
+        retained = (tracemalloc.get_traced_memory()[0] - before) / count
+    finally:
+        tracemalloc.stop()
+    states = [session.app.session_state.to_dict() for session in sessions]
+    keys = {key: float(np.mean([deep_size(state.get(key)) for state in states])) for key in states[0]}
+    return {
+        "retained_kib": retained / 1024,
+        "session_state_kib": float(np.mean([deep_size(state) for state in states])) / 1024,
+        "session_state_keys_kib": {key: size / 1024 for key, size in sorted(keys.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def format_results(results, memory, refresh, fleet_size, idle_rate):
+    percentiles = "".join(f"{f'p{q} ms':>9}" for q in PERCENTILES)
+    lines = [
+        f"Fleet: {fleet_size or 'demo'} assets · refresh every {refresh:g} s · "
+        f"simulation service alone: {idle_rate * 100:.1f}% of a core",
+        f"{'Sessions':>8} {'Reruns':>7} {'Start ms':>9}{percentiles}{'Max ms':>9} {'Late %':>7} "
+        f"{'CPU %/sess':>11} {'CPU ms/run':>11} {'Errors':>7}  Verdict",
+    ]
+    for result in results:
+        values = "".join(
+            f"{result[f'p{q}_ms']:>9.0f}" if result[f"p{q}_ms"] is not None else f"{'-':>9}" for q in PERCENTILES
+        )
+        maximum = f"{result['max_ms']:>9.0f}" if result["max_ms"] is not None else f"{'-':>9}"
+        p95 = result["p95_ms"]
+        verdict = "-" if p95 is None else "OK" if p95 < refresh * 1000 else "FALLING BEHIND"
+        lines.append(
+            f"{result['sessions']:>8} {result['reruns']:>7} {result['start_ms']:>9.0f}{values}{maximum} "
+            f"{result['late_pct']:>7.1f} {result['cpu_pct_per_session']:>11.1f} {result['cpu_ms_per_rerun']:>11.1f} "
+            f"{result['errors']:>7}  {verdict}"
+        )
+    if memory is not None:
+        keys = ", ".join(f"{key} {size:.1f}" for key, size in list(memory["session_state_keys_kib"].items())[:5])
+        lines.append(
+            f"Per session: {memory['retained_kib']:,.0f} KiB retained, "
+            f"session_state {memory['session_state_kib']:.1f} KiB (largest keys, KiB: {keys})"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit cockpit with concurrent headless sessions.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=list(DEFAULT_SESSIONS),
+                        help="numbers of concurrent sessions, one measurement step each")
+    parser.add_argument("--fleet-size", type=int, help="synthetic fleet size (default: the demo fleet)")
+    parser.add_argument("--refresh", type=float, default=DEFAULT_REFRESH, help="seconds between reruns of a session")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per step")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="maximum seconds per rerun")
+    parser.add_argument("--no-memory", action="store_true", help="skip the per-session memory measurement")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Le service partagé est créé par la première session : la taille de flotte doit être connue avant
+    if args.fleet_size:
+        os.environ["PIONIER_FLEET_SIZE"] = str(args.fleet_size)
+    warmup = Session(0, args.refresh, args.timeout)
+    warmup.open()
+    if warmup.app.exception:
+        print(f"The app failed to start: {warmup.app.exception}", file=sys.stderr)
+        return 1
+    del warmup
+    idle_rate = idle_cpu()
+
+    results = []
+    for count in args.sessions:
+        results.append(run_level(count, args.refresh, args.duration, args.timeout, idle_rate))
+        print(f"{count} sessions: done", file=sys.stderr)
+    memory = None if args.no_memory else session_memory(args.refresh, args.timeout)
+    print(format_results(results, memory, args.refresh, args.fleet_size, idle_rate))
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump({
+                "fleet_size": args.fleet_size, "refresh": args.refresh, "duration": args.duration,
+                "idle_cpu_pct": idle_rate * 100, "levels": results, "memory": memory,
+            }, handle, indent=2)
+            handle.write("\n")
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Banc d'essai du cycle de rafraîchissement sur des flottes synthétiques.
+
+Chaque phase du cycle (télémétrie et détection d'anomalies, rafale de
+mesures de quelques équipements, tick,
+classement, agrégation des alertes et des indicateurs par site et zone,
+planning, historique, instantané, cartes, vue paginée) est chronométrée
+séparément à 10, 1 000 et 100 000 équipements, puis mesurée une seconde
+fois sous tracemalloc pour son pic mémoire ; la ligne `_history` donne la
+mémoire occupée par l'historique. Les résultats sont comparés
+aux références enregistrées dans baselines.json ; un écart au-delà du
+seuil fait échouer la commande.
+
+Exemples :
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000 --phases tick alerts
+    python -m benchmarks.run --update-baselines
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from asset_grid import card, diff_cards
+from pionier import IMMINENT_FAILURE, WARNING_HOURS
+from pionier.asset import AssetData
+from pionier.hierarchy import rollups
+from pionier.history import HistoryStore, fit_resolutions
+from pionier.planning import MaintenancePlanner
+from pionier.synthetic import synthetic_fleet
+from pionier.views import select_rows
+
+DEFAULT_SIZES = (10, 1000, 100000)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+REFRESH_INTERVAL = 3.0  # Cadence du tableau de bord, en secondes
+TOP_AT_RISK = 50  # Comme dans app.py
+PAGE_SIZE = 24  # Page par défaut de la vue flotte
+HISTORY_CAPACITY = 64
+HISTORY_MEMORY_MB = 1024  # Comme dans app.py
+WARMUP_TICKS = 3  # Ticks avant mesure, pour que les estimateurs aient une pente
+# Rafale : quelques capteurs à haute fréquence envoient tout un lot de télémétrie
+BURST_ASSETS = 8
+BURST_READINGS = 65536
+WARMUP_READINGS = 25  # Lots de télémétrie avant mesure, pour que les détecteurs d'anomalies aient une ligne de base
+REPEATS = 5  # Nombre fixe de répétitions : l'état de la flotte mesurée ne dépend pas de la machine
+
+# Tolérance des comparaisons : relative, plus une marge absolue pour les phases très courtes
+DEFAULT_THRESHOLD = 0.5
+ABSOLUTE_SLACK_MS = 0.2
+
+
+class Bench:
+    """État partagé par les phases d'une taille de flotte."""
+    def __init__(self, size):
+        self.size = size
+        self.fleet = synthetic_fleet(size)
+        self.now = time.time()
+        self.rng = np.random.default_rng(1)
+        self.reading_ts = self.now
+        for _ in range(WARMUP_READINGS):
+            self.fleet.apply_telemetry(*self.readings())
+        for _ in range(WARMUP_TICKS):
+            self.advance()
+        resolutions = fit_resolutions(size, HISTORY_CAPACITY, HISTORY_MEMORY_MB << 20)
+        self.history = HistoryStore(capacity=HISTORY_CAPACITY, resolutions=resolutions, assets=size)
+        self.planner = MaintenancePlanner(crews=4, time_budget=0.0)
+        self.sent = diff_cards(None, self.cards())[1]
+        self.page_sent = diff_cards(None, self.page_cards())[1]
+
+    def readings(self):
+        """Lot de télémétrie bruité couvrant toute la flotte (une mesure par équipement)."""
+        temperature, vibration = self.fleet.sensor_readings()
+        noise = self.rng.normal(size=(2, self.size))
+        self.reading_ts += 1.0
+        return (np.arange(self.size), np.full(self.size, self.reading_ts),
+                temperature + noise[0], vibration + 0.1 * noise[1])
+
+    def advance(self):
+        self.now += 3600
+        self.fleet.tick(now=self.now)
+
+    # --- Phases ---
+    def tick(self):
+        self.advance()
+
+    def telemetry(self):
+        """Lot de télémétrie de toute la flotte, avec la détection d'anomalies."""
+        self.fleet.apply_telemetry(*self.readings())
+
+    def burst(self):
+        """Lot de télémétrie de quelques équipements seulement, chacun avec des milliers de mesures."""
+        assets = min(BURST_ASSETS, self.size)
+        rows = np.tile(np.arange(assets), BURST_READINGS // assets)
+        temperature, vibration = self.fleet.sensor_readings(rows)
+        noise = self.rng.normal(size=(2, len(rows)))
+        timestamps = self.reading_ts + np.arange(1, len(rows) + 1) / len(rows)
+        self.reading_ts += 1.0
+        self.fleet.apply_telemetry(rows, timestamps, temperature + noise[0], vibration + 0.1 * noise[1])
+
+    def classify(self):
+        self.fleet.classify()
+
+    def alerts(self):
+        """Agrégation de la barre latérale (panneau des alertes et perspective), comme app.py."""
+        fleet = self.fleet
+        rows = fleet.rows_with_status(IMMINENT_FAILURE) + [
+            row for row in fleet.most_at_risk(TOP_AT_RISK, within_hours=WARNING_HOURS + 1)
+            if fleet.status[row] != IMMINENT_FAILURE
+        ]
+        listed = set(rows)
+        rows += [row for row in fleet.anomalous_rows(TOP_AT_RISK) if row not in listed]
+        alerts = [alert for row in rows for alert in AssetData(fleet, row).active_alerts]
+        total = fleet.alerting_count()
+        return alerts, total
+
+    def rollups(self):
+        """Indicateurs par site et par zone, comme le panneau de la hiérarchie."""
+        return rollups(self.fleet, "site"), rollups(self.fleet, "zone")
+
+    def plan(self):
+        """Planification gloutonne seule (budget de recherche locale nul)."""
+        self.planner.update(self.fleet)
+
+    def history_record(self):
+        self.history.record_fleet(self.fleet, timestamp=self.now)
+
+    def snapshot(self):
+        self.fleet.copy()
+
+    def cards(self, rows=None):
+        fleet = self.fleet
+        cards = []
+        for row in (range(fleet.size) if rows is None else rows):
+            asset = AssetData(fleet, row)
+            cards.append(card(
+                fleet.keys[row], asset.name, asset.icon, asset.health,
+                temperature=asset.temperature,
+                vibration=asset.vibration,
+                prediction=asset.prediction_text,
+            ))
+        return cards
+
+    def delta(self):
+        """Cartes de toute la flotte + différences avec le dernier envoi (message du composant)."""
+        self.sent = diff_cards(self.sent, self.cards())[1]
+
+    def page_cards(self):
+        rows, _ = select_rows(self.fleet, sort="risk", limit=PAGE_SIZE)
+        return self.cards(rows.tolist())
+
+    def view(self):
+        """Vue flotte paginée, comme app.py : sélection de la première page, cartes et différences."""
+        select_rows(self.fleet, limit=0)
+        self.page_sent = diff_cards(self.page_sent, self.page_cards())[1]
+
+
+PHASES = {
+    "tick": Bench.tick,
+    "telemetry": Bench.telemetry,
+    "burst": Bench.burst,
+    "classify": Bench.classify,
+    "alerts": Bench.alerts,
+    "rollups": Bench.rollups,
+    "plan": Bench.plan,
+    "history": Bench.history_record,
+    "snapshot": Bench.snapshot,
+    "cards": Bench.cards,
+    "delta": Bench.delta,
+    "view": Bench.view,
+}
+# Phases exécutées à chaque cycle de rafraîchissement (tick du service + rendu d'une session)
+CYCLE = ("telemetry", "tick", "plan", "history", "snapshot", "alerts", "rollups", "view")
+
+
+def measure(bench, phase, repeats=REPEATS):
+    """Retourne (médiane ms, min ms, pic mémoire KiB) d'une phase."""
+    func = PHASES[phase]
+    durations = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        func(bench)
+        durations.append(time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        func(bench)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(durations) * 1000, min(durations) * 1000, peak / 1024
+
+
+def run(sizes, phases, repeats=REPEATS):
+    results = {}
+    for size in sizes:
+        tracemalloc.start()
+        bench = Bench(size)
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if "burst" in phases:
+            bench.burst()  # Compilation éventuelle (numba), hors mesure
+        results[str(size)] = {
+            "_build": {"peak_kib": build_peak / 1024},
+            "_history": {"peak_kib": bench.history.nbytes / 1024},  # Mémoire de l'historique (agrégats compris)
+        }
+        for phase in phases:
+            median_ms, min_ms, peak_kib = measure(bench, phase, repeats)
+            results[str(size)][phase] = {"median_ms": median_ms, "min_ms": min_ms, "peak_kib": peak_kib}
+    return results
+
+
+def compare(results, baselines, threshold):
+    """Retourne la liste des régressions (taille, phase, mesure, référence)."""
+    regressions = []
+    for size, phases in results.items():
+        for phase, result in phases.items():
+            reference = baselines.get(size, {}).get(phase)
+            if reference is None:
+                continue
+            if "median_ms" in result:
+                limit = reference["median_ms"] * (1 + threshold) + ABSOLUTE_SLACK_MS
+                if result["median_ms"] > limit:
+                    regressions.append((size, phase, f"{result['median_ms']:.3f} ms", f"{reference['median_ms']:.3f} ms"))
+            limit = reference["peak_kib"] * (1 + threshold) + 64
+            if result["peak_kib"] > limit:
+                regressions.append((size, phase, f"{result['peak_kib']:.0f} KiB", f"{reference['peak_kib']:.0f} KiB"))
+    return regressions
+
+
+def format_results(results, baselines):
+    lines = [f"{'Assets':>8} {'Phase':<10} {'Median ms':>12} {'Min ms':>10} {'Peak KiB':>12} {'Baseline ms':>12}"]
+    for size, phases in results.items():
+        cycle = 0.0
+        for phase, result in phases.items():
+            if "median_ms" not in result:
+                lines.append(f"{size:>8} {phase:<10} {'':>12} {'':>10} {result['peak_kib']:>12,.0f}")
+                continue
+            reference = baselines.get(size, {}).get(phase, {}).get("median_ms")
+            reference = "-" if reference is None else f"{reference:.3f}"
+            lines.append(
+                f"{size:>8} {phase:<10} {result['median_ms']:>12.3f} {result['min_ms']:>10.3f} "
+                f"{result['peak_kib']:>12,.0f} {reference:>12}"
+            )
+            if phase in CYCLE:
+                cycle += result["median_ms"]
+        verdict = "OK" if cycle / 1000 < REFRESH_INTERVAL else "OVER BUDGET"
+        lines.append(f"{size:>8} {'cycle':<10} {cycle:>12.3f} ms of {REFRESH_INTERVAL * 1000:.0f} ms refresh interval: {verdict}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the refresh cycle on synthetic fleets.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--phases", nargs="+", choices=list(PHASES), default=list(PHASES))
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per phase")
+    parser.add_argument("--baselines", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before a phase counts as a regression")
+    parser.add_argument("--update-baselines", action="store_true", help="store these results as the new baselines")
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as handle:
+            baselines = json.load(handle)
+
+    results = run(args.sizes, args.phases, args.repeats)
+    print(format_results(results, baselines))
+
+    if args.update_baselines:
+        for size, phases in results.items():
+            baselines.setdefault(size, {}).update(phases)
+        with open(args.baselines, "w") as handle:
+            json.dump(baselines, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"\nBaselines written to {args.baselines}")
+        return 0
+
+    regressions = compare(results, baselines, args.threshold)
+    for size, phase, measured, reference in regressions:
+        print(f"REGRESSION {size} assets / {phase}: {measured} (baseline {reference})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+PIONIER - moteur de simulation et de prédiction de la flotte d'équipements.
+
+Le paquet ne dépend que de NumPy : il s'importe sans Streamlit ni pandas,
+depuis un worker, un script ou un test. Les classes des modules annexes
+(service, historique, planning...) sont chargées à la première utilisation.
+"""
+import importlib
+
+from .fleet import (
+    ALERTS,
+    ANOMALY_DETECTED,
+    AT_RISK_STATUSES,
+    IMMINENT_FAILURE,
+    MAINTENANCE_REQUIRED,
+    OPERATIONAL,
+    POST_MAINTENANCE,
+    STATUS_LABELS,
+    WARNING_HOURS,
+    FleetState,
+)
+from .risk import RiskIndex
+
+# Nom exporté -> module qui le définit, importé à la demande
+_LAZY = {
+    "AssetData": ".asset",
+    "EventStore": ".events",
+    "EventJournal": ".journal",
+    "logging_sink": ".events",
+    "HistoryStore": ".history",
+    "MaintenancePlanner": ".planning",
+    "SimulationService": ".service",
+    "synthetic_fleet": ".synthetic",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
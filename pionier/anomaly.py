@@ -0,0 +1,138 @@
+"""
+Détection d'anomalies en continu sur les mesures de température et de vibration.
+
+Deux détecteurs par signal, mis à jour à chaque mesure reçue et vectorisés
+sur toutes les lignes d'un lot de télémétrie :
+- EWMA : moyenne et variance exponentielles (ligne de base de l'équipement)
+  et score z de chaque nouvelle mesure, pour les pics isolés ;
+- CUSUM : cumul des écarts standardisés dans chaque sens, pour les dérives
+  lentes qu'un score z seul laisse passer.
+L'état des détecteurs est stocké en colonnes dans FleetState ; seules les
+mesures réelles y entrent (jamais les valeurs estimées à partir de la santé).
+
+La récurrence n'a pas de forme close (une mesure anormale n'entre pas dans
+la ligne de base) : plusieurs mesures d'un même équipement sont parcourues
+en séquence par `scan_detectors`, compilé par numba s'il est installé.
+"""
+import math
+
+import numpy as np
+
+SIGNALS = ("temperature", "vibration")
+# Bits de la colonne `anomaly` de la flotte, dans l'ordre de SIGNALS
+SIGNAL_BITS = {"temperature": 1, "vibration": 2}
+
+EWMA_ALPHA = 0.01  # Poids d'une nouvelle mesure dans la ligne de base (≈ 100 dernières mesures)
+WARMUP_SAMPLES = 30  # Mesures nécessaires avant de lever une alerte
+Z_THRESHOLD = 5.0  # Score z d'un pic
+# CUSUM : écart toléré avant cumul (k) et seuil de décision (h), en écarts-types.
+# Avec k = 0.5 et h = 10, une fausse alerte tous les ~10^5 échantillons par signal
+# sur un bruit gaussien ; un décalage de 1.5 écart-type est détecté en ~13 mesures.
+CUSUM_DRIFT = 0.5
+CUSUM_THRESHOLD = 10.0
+# Écart-type minimal par signal : un capteur parfaitement stable ne rend pas le score z infini
+MIN_STD = {"temperature": 0.1, "vibration": 0.01}
+
+# Alerte propre à chaque signal, affichée à la place de l'alerte générique du statut
+SIGNAL_ALERTS = {
+    "temperature": {"level": "warning", "title": "Abnormal Temperature",
+                    "recommendation": "Check cooling and lubrication at the next inspection."},
+    "vibration": {"level": "warning", "title": "Abnormal Vibration",
+                  "recommendation": "Check alignment, balance and bearings at the next inspection."},
+}
+
+
+def update_detectors(value, mean, var, cusum_high, cusum_low, samples, min_std):
+    """
+    Met à jour l'état d'un signal avec une mesure par ligne et retourne
+    (mean, var, cusum_high, cusum_low, samples, anomalous).
+    Le score z est calculé avant la mise à jour, par rapport à la ligne de
+    base apprise ; pendant l'apprentissage, le poids 1/n donne la moyenne et
+    la variance exactes des premières mesures. Une mesure anormale n'entre
+    pas dans la ligne de base : une dérive reste signalée jusqu'au retour à
+    la normale (ou jusqu'à la maintenance, qui fait réapprendre la ligne de base).
+    """
+    std = np.sqrt(np.maximum(var, min_std * min_std))
+    deviation = value - mean
+    z = deviation / std
+    ready = samples >= WARMUP_SAMPLES
+    high = np.where(ready, np.maximum(0.0, cusum_high + z - CUSUM_DRIFT), 0.0)
+    low = np.where(ready, np.maximum(0.0, cusum_low - z - CUSUM_DRIFT), 0.0)
+    anomalous = ready & ((np.abs(z) > Z_THRESHOLD) | (high > CUSUM_THRESHOLD) | (low > CUSUM_THRESHOLD))
+
+    weight = np.where(anomalous, 0.0, np.maximum(EWMA_ALPHA, 1.0 / (samples + 1)))
+    mean = mean + weight * deviation
+    var = (1 - weight) * (var + weight * deviation * deviation)
+    return mean, var, high, low, samples + 1, anomalous
+
+
+def _scan(values, starts, stops, mean, var, high, low, samples, flags, min_std, anomalous):
+    """
+    Boucle de scan_detectors, mesure par mesure : même calcul que
+    update_detectors. Écrite pour numba, elle accepte aussi des listes Python.
+    """
+    floor = min_std * min_std
+    for s in range(len(starts)):
+        m, v, h, lo, n, a = mean[s], var[s], high[s], low[s], samples[s], flags[s]
+        for i in range(starts[s], stops[s]):
+            x = values[i]
+            if x != x:  # NaN : signal absent de cette mesure, le drapeau est conservé
+                anomalous[i] = a
+                continue
+            deviation = x - m
+            z = deviation / math.sqrt(max(v, floor))
+            if n >= WARMUP_SAMPLES:
+                h = max(0.0, h + z - CUSUM_DRIFT)
+                lo = max(0.0, lo - z - CUSUM_DRIFT)
+                a = abs(z) > Z_THRESHOLD or h > CUSUM_THRESHOLD or lo > CUSUM_THRESHOLD
+            else:
+                h, lo, a = 0.0, 0.0, False
+            if not a:
+                weight = max(EWMA_ALPHA, 1.0 / (n + 1))
+                m = m + weight * deviation
+                v = (1 - weight) * (v + weight * deviation * deviation)
+            n += 1
+            anomalous[i] = a
+        mean[s], var[s], high[s], low[s], samples[s], flags[s] = m, v, h, lo, n, a
+
+
+_compiled_scan = None
+
+
+def scan_compiled():
+    """Vrai si la boucle de scan_detectors est compilée (numba, optionnel, importé à la première utilisation)."""
+    global _compiled_scan
+    if _compiled_scan is None:
+        try:
+            import numba
+        except ImportError:
+            _compiled_scan = False
+        else:
+            _compiled_scan = numba.njit(cache=True)(_scan)
+    return _compiled_scan is not False
+
+
+def scan_detectors(values, starts, mean, var, cusum_high, cusum_low, samples, flags, min_std):
+    """
+    Met à jour l'état d'un signal avec plusieurs mesures par ligne : les mesures
+    de la ligne s occupent values[starts[s]:starts[s + 1]], dans l'ordre
+    chronologique ; `flags` est le drapeau d'anomalie courant de chaque ligne.
+    Retourne (mean, var, cusum_high, cusum_low, samples, anomalous) : l'état
+    final par ligne et le drapeau après chaque mesure.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.r_[starts[1:], len(values)].astype(np.int64)
+    state = [np.array(column, dtype=np.float64) for column in (mean, var, cusum_high, cusum_low)]
+    state += [np.array(samples, dtype=np.int64), np.array(flags, dtype=np.bool_)]
+    if scan_compiled():
+        anomalous = np.zeros(len(values), dtype=np.bool_)
+        _compiled_scan(np.asarray(values, dtype=np.float64), starts, stops, *state, float(min_std), anomalous)
+    else:
+        # Sans numba : listes Python, bien plus rapides que l'indexation élément par élément de NumPy
+        lists = [column.tolist() for column in state]
+        anomalous = [False] * len(values)
+        _scan(np.asarray(values, dtype=np.float64).tolist(), starts.tolist(), stops.tolist(), *lists, min_std, anomalous)
+        state = [np.array(items, dtype=column.dtype) for items, column in zip(lists, state)]
+        anomalous = np.array(anomalous, dtype=np.bool_)
+    mean, var, cusum_high, cusum_low, samples, _ = state
+    return mean, var, cusum_high, cusum_low, samples, anomalous
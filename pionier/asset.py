@@ -0,0 +1,117 @@
+"""
+Vue objet sur une ligne de la flotte, pour les interfaces qui manipulent
+un équipement à la fois (cartes, barre latérale, scripts).
+"""
+from datetime import datetime
+
+import numpy as np
+
+from .anomaly import SIGNAL_ALERTS, SIGNAL_BITS, SIGNALS
+from .fleet import ALERTS, ANOMALY_DETECTED, STATUS_LABELS, WARNING_HOURS
+
+# Attente maximale (s) d'une commande envoyée au service de simulation
+COMMAND_TIMEOUT = 10
+
+
+class AssetData:
+    """
+    Représente un équipement comme une vue sur une ligne du moteur FleetState.
+    L'état (santé, prédiction, statut) est stocké en colonnes dans la flotte ;
+    cette classe garde l'interface utilisée par les cartes et la barre latérale.
+    `notify(message, icon)` reçoit les notifications destinées à l'utilisateur
+    (toast du tableau de bord, log en mode headless...).
+    """
+    def __init__(self, fleet, row, notify=None):
+        self.fleet = fleet
+        self.row = row
+        self.notify = notify
+
+    name = property(lambda self: self.fleet.names[self.row])
+    icon = property(lambda self: self.fleet.icons[self.row])
+    health = property(lambda self: float(self.fleet.health[self.row]))
+    previous_health = property(lambda self: float(self.fleet.previous_health[self.row]))
+    degradation_rate = property(lambda self: float(self.fleet.degradation_rate[self.row]))
+    cost_of_failure = property(lambda self: int(self.fleet.cost_of_failure[self.row]))
+    status = property(lambda self: STATUS_LABELS[self.fleet.status[self.row]])
+    last_status = property(lambda self: STATUS_LABELS[self.fleet.last_status[self.row]])
+
+    # --- Mesures : télémétrie si disponible, sinon estimation à partir de la santé ---
+    @property
+    def temperature(self):
+        return float(self.fleet.sensor_readings([self.row])[0][0])
+
+    @property
+    def vibration(self):
+        return float(self.fleet.sensor_readings([self.row])[1][0])
+
+    @property
+    def anomalies(self):
+        """Signaux actuellement en anomalie ("temperature", "vibration")."""
+        flags = self.fleet.anomaly[self.row]
+        return [signal for signal in SIGNALS if flags & SIGNAL_BITS[signal]]
+
+    @property
+    def active_alerts(self):
+        """Alertes du statut, suivies de celles des signaux en anomalie, quel que soit le statut."""
+        status = self.fleet.status[self.row]
+        alerts = list(ALERTS[status])
+        if status == ANOMALY_DETECTED and not self.fleet.predicted_within(self.row, WARNING_HOURS):
+            alerts = []  # Statut dû aux seuls signaux : pas de dégradation prévue
+        return alerts + [SIGNAL_ALERTS[signal] for signal in self.anomalies]
+
+    # --- Fonctionnalités Prédictives ---
+    @property
+    def time_to_failure_hours(self):
+        hours = self.fleet.time_to_failure_hours[self.row]
+        return None if np.isnan(hours) else int(hours)
+
+    @property
+    def time_to_failure_bounds(self):
+        """Intervalle de confiance (heures) autour du temps avant panne prédit."""
+        lower, upper = self.fleet.ttf_lower[self.row], self.fleet.ttf_upper[self.row]
+        return None if np.isnan(lower) else (int(lower), int(upper))
+
+    @property
+    def predicted_failure_date(self):
+        timestamp = self.fleet.predicted_failure_ts[self.row]
+        return None if np.isnan(timestamp) else datetime.fromtimestamp(timestamp)
+
+    @property
+    def prediction_text(self):
+        """Date de panne prédite, formatée pour les cartes."""
+        if not self.predicted_failure_date:
+            return "No failure predicted"
+        if self.time_to_failure_hours > 24:
+            return f"Failure in {self.time_to_failure_hours // 24} days"
+        return f"Failure in {self.time_to_failure_hours} hours!"
+
+    def update(self):
+        """Met à jour l'état de l'équipement et calcule la prédiction."""
+        self.fleet.tick(rows=[self.row])
+
+    def _check_and_generate_alerts(self):
+        """Génère des alertes en fonction du temps avant la panne prédit."""
+        self.fleet.classify(rows=[self.row])
+
+    def trigger_catastrophic_failure(self, service=None):
+        """
+        Simule une panne catastrophique, sur la flotte ou par une commande au
+        service de simulation `service` (la flotte est alors un instantané), puis notifie.
+        """
+        if service is None:
+            self.fleet.trigger_catastrophic_failure(self.row)
+        else:
+            service.trigger_catastrophic_failure(self.fleet.keys[self.row]).result(timeout=COMMAND_TIMEOUT)
+        if self.notify is not None:
+            self.notify(f"🚨 CATASTROPHIC FAILURE on {self.name}!", icon="🚨")
+
+    def perform_maintenance(self, service=None):
+        """Simule une maintenance réussie (sur la flotte ou par une commande au service)."""
+        if service is None:
+            self.fleet.perform_maintenance(self.row)
+        else:
+            service.perform_maintenance(self.fleet.keys[self.row]).result(timeout=COMMAND_TIMEOUT)
+
+    def add_event(self, level, message):
+        """Ajoute un événement au journal global."""
+        self.fleet.add_event(level, message, self.fleet.keys[self.row])
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+# Niveaux connus, internés sous forme de petits entiers
+LEVELS = ["info", "success", "warning", "error"]
+_LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+
+
+def level_code(level):
+    """Retourne le code interné d'un niveau, en l'enregistrant s'il est nouveau."""
+    code = _LEVEL_CODES.get(level)
+    if code is None:
+        LEVELS.append(level)
+        code = _LEVEL_CODES[level] = len(LEVELS) - 1
+    return code
+
+
+# Correspondance des niveaux d'événements avec les niveaux du module logging
+_LOGGING_LEVELS = {"info": logging.INFO, "success": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+
+def logging_sink(logger=None):
+    """
+    Récepteur d'événements (level, message, asset) qui écrit dans un logger :
+    permet de suivre la simulation sans tableau de bord.
+    """
+    logger = logger or logging.getLogger("pionier.events")
+
+    def sink(level, message, asset=None):
+        logger.log(_LOGGING_LEVELS.get(level, logging.INFO), "%s", message, extra={"asset": asset})
+    return sink
+
+
+class EventStore:
+    """
+    Journal d'événements borné : tampon circulaire de taille fixe avec
+    index secondaires par niveau et par équipement.
+    Les requêtes « N derniers » coûtent O(N), la mémoire est plafonnée
+    à `capacity` événements.
+    """
+    def __init__(self, capacity=1000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._next = 0  # Numéro de séquence du prochain événement
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._levels = np.zeros(capacity, dtype=np.int16)
+        self._assets = [None] * capacity
+        self._messages = [None] * capacity
+        self._by_level = {}
+        self._by_asset = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    @property
+    def total(self):
+        """Nombre total d'événements reçus depuis la création."""
+        return self._next
+
+    def append(self, level, message, asset=None, timestamp=None):
+        """Ajoute un événement, en écrasant le plus ancien si le tampon est plein."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            code = level_code(level)
+            seq = self._next
+            slot = seq % self.capacity
+            if seq >= self.capacity:
+                self._evict(slot)
+            self._timestamps[slot] = timestamp
+            self._levels[slot] = code
+            self._assets[slot] = asset
+            self._messages[slot] = message
+            self._by_level.setdefault(code, deque()).append(seq)
+            if asset is not None:
+                self._by_asset.setdefault(asset, deque()).append(seq)
+            self._next = seq + 1
+
+    def extend(self, events):
+        """Ajoute des événements (dicts avec timestamp, level, asset, message), du plus ancien au plus récent."""
+        for event in events:
+            self.append(event["level"], event["message"], event.get("asset"), event.get("timestamp"))
+
+    def _evict(self, slot):
+        # L'événement évincé est toujours le plus ancien de ses index
+        self._by_level[int(self._levels[slot])].popleft()
+        asset = self._assets[slot]
+        if asset is not None:
+            entries = self._by_asset[asset]
+            entries.popleft()
+            if not entries:
+                del self._by_asset[asset]
+
+    def latest(self, n=20, level=None, asset=None):
+        """Retourne les `n` événements les plus récents, du plus récent au plus ancien."""
+        with self._lock:
+            if level is not None and asset is not None:
+                # On parcourt l'index le plus petit en filtrant sur l'autre critère
+                code = _LEVEL_CODES.get(level)
+                by_level = self._by_level.get(code, ())
+                by_asset = self._by_asset.get(asset, ())
+                if len(by_level) <= len(by_asset):
+                    seqs = (s for s in reversed(by_level) if self._assets[s % self.capacity] == asset)
+                else:
+                    seqs = (s for s in reversed(by_asset) if self._levels[s % self.capacity] == code)
+            elif level is not None:
+                seqs = reversed(self._by_level.get(_LEVEL_CODES.get(level), ()))
+            elif asset is not None:
+                seqs = reversed(self._by_asset.get(asset, ()))
+            else:
+                seqs = range(self._next - 1, self._next - 1 - len(self), -1)
+            events = []
+            for seq in seqs:
+                if len(events) >= n:
+                    break
+                events.append(self._event(seq % self.capacity))
+            return events
+
+    def _event(self, slot):
+        return {
+            "time": datetime.fromtimestamp(self._timestamps[slot]).strftime("%H:%M:%S"),
+            "timestamp": float(self._timestamps[slot]),
+            "level": LEVELS[self._levels[slot]],
+            "asset": self._assets[slot],
+            "message": self._messages[slot],
+        }
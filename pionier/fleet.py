@@ -0,0 +1,647 @@
+import heapq
+import random
+import time
+
+import numpy as np
+
+from .anomaly import MIN_STD, SIGNAL_BITS, SIGNALS, scan_compiled, scan_detectors, update_detectors
+from .hierarchy import HierarchyIndex
+from .prediction import holt_update, remaining_useful_life
+from .risk import RiskIndex
+from .scheduler import TickScheduler
+
+# --- CODES DE STATUT ---
+# Les statuts sont stockés sous forme de petits entiers : les bandes 168/72/24 h
+# se calculent alors par simple somme de comparaisons vectorisées.
+OPERATIONAL = 0
+ANOMALY_DETECTED = 1
+MAINTENANCE_REQUIRED = 2
+IMMINENT_FAILURE = 3
+POST_MAINTENANCE = 4
+
+STATUS_LABELS = (
+    "Operational",
+    "Anomaly Detected",
+    "Maintenance Required",
+    "Imminent Failure",
+    "Operational (Post-Maintenance)",
+)
+
+# Seuils (en heures avant la panne) des bandes de statut
+WARNING_HOURS = 168  # 7 jours
+CRITICAL_HOURS = 72  # 3 jours
+IMMINENT_HOURS = 24  # 1 jour
+
+# Alertes associées à chaque statut : construites une seule fois et partagées
+ALERTS = (
+    (),
+    ({"level": "warning", "title": "Performance Degradation", "recommendation": "Schedule inspection within the week."},),
+    ({"level": "error", "title": "Critical Wear Detected", "recommendation": "Plan parts replacement within 48 hours."},),
+    ({"level": "error", "title": "IMMINENT FAILURE", "recommendation": "SHUTDOWN IMMEDIATELY. Emergency maintenance required."},),
+    (),
+)
+
+# Statuts pour lesquels l'index de risque garde la liste des équipements
+AT_RISK_STATUSES = (ANOMALY_DETECTED, MAINTENANCE_REQUIRED, IMMINENT_FAILURE)
+
+# Colonnes numériques de la flotte : nom -> (dtype, valeur par défaut)
+_COLUMNS = {
+    "health": (np.float64, 0.0),
+    "previous_health": (np.float64, 0.0),
+    "degradation_rate": (np.float64, 0.0),
+    "time_to_failure_hours": (np.float64, np.nan),
+    "ttf_lower": (np.float64, np.nan),
+    "ttf_upper": (np.float64, np.nan),
+    "predicted_failure_ts": (np.float64, np.nan),
+    # Horloge simulée de la dernière évaluation (estimateur, prédiction, statut)
+    "evaluated_at": (np.float64, 0.0),
+    "status": (np.int8, OPERATIONAL),
+    "last_status": (np.int8, OPERATIONAL),
+    "cost_of_failure": (np.float64, 0.0),
+    # Zone de rattachement (indice dans fleet.locations, -1 = non rattaché)
+    "zone": (np.int32, -1),
+    # Dernières mesures reçues (NaN tant qu'aucune télémétrie n'est arrivée)
+    "temperature": (np.float64, np.nan),
+    "vibration": (np.float64, np.nan),
+    "last_reading_ts": (np.float64, np.nan),
+    # État de l'estimateur en ligne de la pente de dégradation (voir prediction.py)
+    "trend_level": (np.float64, 0.0),
+    "trend_slope": (np.float64, 0.0),
+    "residual_var": (np.float64, 0.0),
+    "slope_var": (np.float64, 0.0),
+    "samples": (np.int32, 0),
+    # État des détecteurs d'anomalies de chaque signal (voir anomaly.py)
+    "temperature_ewma": (np.float64, 0.0),
+    "temperature_ewm_var": (np.float64, 0.0),
+    "temperature_cusum_high": (np.float64, 0.0),
+    "temperature_cusum_low": (np.float64, 0.0),
+    "temperature_samples": (np.int32, 0),
+    "vibration_ewma": (np.float64, 0.0),
+    "vibration_ewm_var": (np.float64, 0.0),
+    "vibration_cusum_high": (np.float64, 0.0),
+    "vibration_cusum_low": (np.float64, 0.0),
+    "vibration_samples": (np.int32, 0),
+    # Signaux en anomalie (bits de anomaly.SIGNAL_BITS)
+    "anomaly": (np.int8, 0),
+}
+
+# Seuils des bandes de statut, du plus lointain au plus proche
+_THRESHOLDS = (WARNING_HOURS, CRITICAL_HOURS, IMMINENT_HOURS)
+# Colonnes de la prédiction, vieillies avec l'horloge entre deux évaluations
+_PREDICTION = ("time_to_failure_hours", "ttf_lower", "ttf_upper")
+# Colonnes de l'estimateur, dans l'ordre des arguments de holt_update
+_ESTIMATOR = ("trend_level", "trend_slope", "residual_var", "slope_var", "samples")
+# Suffixes des colonnes d'un détecteur de signal, dans l'ordre des arguments de update_detectors
+_DETECTOR = ("ewma", "ewm_var", "cusum_high", "cusum_low", "samples")
+# Sans numba : nombre minimal d'équipements d'un rang de mesures pour l'appliquer en un pas vectorisé
+VECTOR_MIN_ROWS = 64
+
+
+class FleetState:
+    """
+    Moteur de simulation de la flotte, stocké en colonnes NumPy.
+    Chaque tick fait avancer la dégradation de tous les équipements en une
+    seule passe vectorisée ; la prédiction et les bandes de statut ne sont
+    recalculées que pour les équipements dus (voir scheduler.py), ou pour
+    toute la flotte sans ordonnanceur.
+    """
+    def __init__(self, capacity=16, index_risk=True, shutdown_on_imminent=True, adaptive_ticks=True):
+        self.size = 0
+        self.keys = []
+        self.names = []
+        self.icons = []
+        self.index = {}
+        self.locations = []  # Numéro de zone -> (site, zone)
+        self.on_event = None  # Callable(level, message, asset) recevant le journal
+        self.clock = 0.0  # Horloge simulée, en heures (un tick = une heure)
+        self._capacity = max(1, capacity)
+        for column, (dtype, fill) in _COLUMNS.items():
+            setattr(self, "_" + column, np.full(self._capacity, fill, dtype=dtype))
+        # Index de risque (désactivable pour les simulations sans tableau de bord)
+        self.risk = RiskIndex(len(STATUS_LABELS), AT_RISK_STATUSES, self._capacity) if index_risk else None
+        # Agrégats par zone de la hiérarchie site -> zone, tenus à jour avec l'index de risque
+        self.hierarchy = HierarchyIndex(len(STATUS_LABELS), AT_RISK_STATUSES, self._capacity) if index_risk else None
+        # Évaluation adaptative : fréquente près des seuils de statut, rare loin de toute panne
+        self.scheduler = TickScheduler(_THRESHOLDS, self._capacity) if adaptive_ticks else None
+        # Lignes dont un signal est en anomalie, tenues à jour par les détecteurs
+        self.anomalous = set()
+        self.evaluated = 0  # Équipements évalués au dernier tick
+        # Arrêt automatique de la dégradation en cas de panne imminente
+        self.shutdown_on_imminent = shutdown_on_imminent
+
+    def __len__(self):
+        return self.size
+
+    # Vues sur la partie occupée des colonnes
+    health = property(lambda self: self._health[:self.size])
+    previous_health = property(lambda self: self._previous_health[:self.size])
+    degradation_rate = property(lambda self: self._degradation_rate[:self.size])
+    time_to_failure_hours = property(lambda self: self._time_to_failure_hours[:self.size])
+    ttf_lower = property(lambda self: self._ttf_lower[:self.size])
+    ttf_upper = property(lambda self: self._ttf_upper[:self.size])
+    trend_slope = property(lambda self: self._trend_slope[:self.size])
+    predicted_failure_ts = property(lambda self: self._predicted_failure_ts[:self.size])
+    status = property(lambda self: self._status[:self.size])
+    last_status = property(lambda self: self._last_status[:self.size])
+    cost_of_failure = property(lambda self: self._cost_of_failure[:self.size])
+    zone = property(lambda self: self._zone[:self.size])
+    temperature = property(lambda self: self._temperature[:self.size])
+    vibration = property(lambda self: self._vibration[:self.size])
+    last_reading_ts = property(lambda self: self._last_reading_ts[:self.size])
+    anomaly = property(lambda self: self._anomaly[:self.size])
+
+    def _reserve(self, size):
+        """Agrandit les colonnes (doublement) pour contenir `size` lignes."""
+        if size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        for column, (dtype, fill) in _COLUMNS.items():
+            old = getattr(self, "_" + column)
+            new = np.full(capacity, fill, dtype=dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, "_" + column, new)
+        self._capacity = capacity
+        if self.risk is not None:
+            self.risk.resize(capacity)
+            self.hierarchy.resize(capacity)
+        if self.scheduler is not None:
+            self.scheduler.resize(capacity)
+
+    def add_assets(self, keys, names, icons, initial_health, degradation_rate, cost_of_failure):
+        """Ajoute un lot d'équipements et retourne leurs indices de ligne."""
+        keys = list(keys)
+        count = len(keys)
+        start, stop = self.size, self.size + count
+        self._reserve(stop)
+        self._health[start:stop] = initial_health
+        self._previous_health[start:stop] = initial_health
+        self._degradation_rate[start:stop] = degradation_rate
+        self._cost_of_failure[start:stop] = cost_of_failure
+        # La santé initiale est le premier échantillon de l'estimateur
+        self._trend_level[start:stop] = initial_health
+        self._samples[start:stop] = 1
+        self._evaluated_at[start:stop] = self.clock
+        self.keys.extend(keys)
+        self.names.extend(names)
+        self.icons.extend(icons)
+        for row, key in enumerate(keys, start):
+            self.index[key] = row
+        self.size = stop
+        rows = np.arange(start, stop)
+        if self.risk is not None:
+            self.risk.add_rows(rows, self._status[start:stop], self._cost_of_failure[start:stop])
+        if self.scheduler is not None:
+            self.scheduler.wake(rows)
+        return rows
+
+    def add_asset(self, key, name, icon, initial_health, degradation_rate, cost_of_failure):
+        """Ajoute un équipement et retourne son indice de ligne."""
+        rows = self.add_assets([key], [name], [icon], initial_health, degradation_rate, cost_of_failure)
+        return int(rows[0])
+
+    @classmethod
+    def from_columns(cls, keys, names, icons, columns, clock=0.0, locations=(), **options):
+        """
+        Construit une flotte autour de colonnes existantes, sans les copier
+        (tableaux mappés en mémoire d'un instantané, par exemple). Les colonnes
+        absentes prennent leur valeur par défaut ; les index de risque et de
+        hiérarchie sont reconstruits.
+        """
+        fleet = cls(**options)
+        size = len(keys)
+        if not size:
+            return fleet
+        fleet.size = fleet._capacity = size
+        for column, (dtype, fill) in _COLUMNS.items():
+            array = columns.get(column)
+            setattr(fleet, "_" + column, np.full(size, fill, dtype=dtype) if array is None else np.asarray(array, dtype=dtype))
+        fleet.keys, fleet.names, fleet.icons = list(keys), list(names), list(icons)
+        fleet.index = {key: row for row, key in enumerate(fleet.keys)}
+        fleet.locations = [tuple(location) for location in locations]
+        fleet.clock = clock
+        if columns.get("evaluated_at") is None:
+            fleet._evaluated_at[:] = clock  # Instantané antérieur à l'ordonnanceur
+        fleet.anomalous = set(np.flatnonzero(fleet._anomaly).tolist())
+        if fleet.risk is not None:
+            rows = np.arange(size)
+            fleet.risk.resize(size)
+            fleet.risk.add_rows(rows, fleet._status, fleet._cost_of_failure)
+            fleet.hierarchy.resize(size)
+            fleet.hierarchy.update_keys(*fleet.risk.update_keys(rows, clock + fleet._ttf_lower))
+            for zone in range(len(fleet.locations)):
+                fleet.hierarchy.add_zone()
+                members = np.flatnonzero(fleet._zone == zone)
+                fleet.hierarchy.assign(members, zone, fleet._status[members], fleet._cost_of_failure[members])
+        if fleet.scheduler is not None:
+            # Toute la flotte est réévaluée au premier tick, puis reprend son rythme
+            fleet.scheduler.resize(size)
+            fleet.scheduler.hour = int(np.floor(clock))
+            fleet.scheduler.wake(np.arange(size))
+        return fleet
+
+    def copy(self):
+        """Retourne une copie indépendante de la flotte, sans journal d'événements."""
+        other = FleetState(capacity=self.size, index_risk=False, shutdown_on_imminent=self.shutdown_on_imminent,
+                           adaptive_ticks=False)
+        other.size = self.size
+        other.keys = list(self.keys)
+        other.names = list(self.names)
+        other.icons = list(self.icons)
+        other.index = dict(self.index)
+        other.locations = list(self.locations)
+        other.clock = self.clock
+        other.risk = None if self.risk is None else self.risk.copy()
+        other.hierarchy = None if self.hierarchy is None else self.hierarchy.copy()
+        other.scheduler = None if self.scheduler is None else self.scheduler.copy()
+        other.anomalous = set(self.anomalous)
+        other.evaluated = self.evaluated
+        for column in _COLUMNS:
+            getattr(other, "_" + column)[:self.size] = getattr(self, "_" + column)[:self.size]
+        return other
+
+    def _select(self, rows):
+        """Retourne (sélecteur, indices absolus) pour `rows` (None = toute la flotte)."""
+        if rows is None:
+            return slice(0, self.size), np.arange(self.size)
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows, rows
+
+    def tick(self, rows=None, now=None, hours=1.0):
+        """
+        Fait avancer la flotte de `hours` heures simulées (un cycle par défaut)
+        et met à jour les prédictions. Retourne les indices dont le statut a changé.
+        Avec `rows`, seules ces lignes avancent, sans l'horloge, et `hours` peut
+        être un tableau (une durée par ligne). Sur toute la flotte avec
+        l'ordonnanceur, seules les lignes dues sont réévaluées.
+        """
+        now = time.time() if now is None else now
+        sel, _ = self._select(rows)
+
+        health = self._health[sel]
+        rate = self._degradation_rate[sel]
+        self._previous_health[sel] = health
+        self._health[sel] = np.maximum(health - rate * hours, 0.0)
+        if rows is not None:
+            # L'estimateur voit aussi les heures d'horloge écoulées depuis la dernière évaluation de ces lignes
+            return self._evaluate(rows, hours + (self.clock - self._evaluated_at[sel]), now)
+        self.clock += hours
+        if self.scheduler is None:
+            return self._evaluate(None, hours, now)
+
+        # Entre deux évaluations, la prédiction vieillit avec l'horloge :
+        # la clé de l'index de risque (horloge + heures restantes) ne bouge pas.
+        elapsed = np.where(rate > 0, hours, 0.0)
+        for column in _PREDICTION:
+            getattr(self, "_" + column)[sel] -= elapsed
+        np.maximum(self._ttf_lower[sel], 0.0, out=self._ttf_lower[sel])
+        self._predicted_failure_ts[sel] = now + self._time_to_failure_hours[sel] * 3600.0
+        # Chaque ligne due est réévaluée sur la durée écoulée depuis sa dernière évaluation
+        due = self.scheduler.pop_due(self.clock)
+        return self._evaluate(due, self.clock - self._evaluated_at[due], now)
+
+    def _evaluate(self, rows, hours, now):
+        """
+        Met à jour l'estimateur, la prédiction et le statut des lignes `rows`
+        (None = toute la flotte), `hours` heures après leur évaluation précédente.
+        """
+        sel, absolute = self._select(rows)
+        self.evaluated = len(absolute)
+        if not len(absolute):
+            return absolute
+        health = self._health[sel]
+
+        # --- Estimation en ligne de la pente et de la durée de vie résiduelle ---
+        # Un équipement à l'arrêt (taux nul) conserve son estimateur et sa dernière prédiction.
+        running = self._degradation_rate[sel] > 0
+        state = holt_update(*(getattr(self, "_" + c)[sel] for c in _ESTIMATOR), health, hours)
+        for column, value in zip(_ESTIMATOR, state):
+            target = getattr(self, "_" + column)
+            target[sel] = np.where(running, value, target[sel])
+        rul, lower, upper = remaining_useful_life(*state)
+        # Si la santé est parfaite, on ne prédit pas de panne
+        perfect = health >= 99
+        for column, value in zip(_PREDICTION, (rul, lower, upper)):
+            target = getattr(self, "_" + column)
+            value = np.where(running, value, target[sel])
+            value[perfect] = np.nan
+            target[sel] = value
+        self._predicted_failure_ts[sel] = now + self._time_to_failure_hours[sel] * 3600.0
+        self._evaluated_at[sel] = self.clock
+
+        changed = self.classify(rows)
+        self._last_status[sel] = self._status[sel]
+        if self.scheduler is not None:
+            self.scheduler.reschedule(absolute, self._ttf_lower[sel])
+        return changed
+
+    def classify(self, rows=None):
+        """
+        Classe les équipements dans les bandes 168/72/24 h, arrête la
+        dégradation en cas de panne imminente et journalise les changements
+        de statut. Retourne les indices dont le statut a changé.
+        Les bandes utilisent la borne basse de l'intervalle de confiance :
+        une prédiction incertaine déclenche l'alerte plus tôt.
+        """
+        sel, absolute = self._select(rows)
+        hours = np.floor(self._ttf_lower[sel])
+        # NaN (aucune prédiction) donne False partout, donc "Operational"
+        new_status = ((hours <= WARNING_HOURS).astype(np.int8)
+                      + (hours <= CRITICAL_HOURS)
+                      + (hours <= IMMINENT_HOURS))
+        # Un signal anormal suffit à sortir un équipement du statut "Operational"
+        new_status[(new_status == OPERATIONAL) & (self._anomaly[sel] != 0)] = ANOMALY_DETECTED
+        imminent = new_status == IMMINENT_FAILURE
+        if self.shutdown_on_imminent and imminent.any():
+            self._degradation_rate[sel] = np.where(imminent, 0.0, self._degradation_rate[sel])
+
+        changed = absolute[new_status != self._last_status[sel]]
+        self._update_risk(sel, absolute, new_status)
+        self._status[sel] = new_status
+        if self.on_event is not None:
+            for row in changed:
+                self._log_transition(int(row))
+        return changed
+
+    def _update_risk(self, sel, absolute, new_status):
+        """Répercute les nouvelles prédictions et statuts dans les index de risque et de hiérarchie."""
+        if self.risk is None:
+            return
+        # Clé = borne basse, comme les bandes de statut : most_at_risk et classify s'accordent
+        changed, keys = self.risk.update_keys(absolute, self.clock + self._ttf_lower[sel])
+        self.hierarchy.update_keys(changed, keys)
+        moved = new_status != self._status[sel]
+        if moved.any():
+            rows = absolute[moved]
+            for index in (self.risk, self.hierarchy):
+                index.update_statuses(rows, self._status[rows], new_status[moved], self._cost_of_failure[rows])
+
+    def _log_transition(self, row):
+        """Logging intelligent d'un changement de statut."""
+        key, name = self.keys[row], self.names[row]
+        new_status = self._status[row]
+        ttf = self._time_to_failure_hours[row]
+        hours = None if np.isnan(ttf) else int(ttf)
+        if new_status == IMMINENT_FAILURE:
+            self.add_event("error", f"Imminent failure predicted for {name} within {hours} hours!", key)
+        elif new_status == MAINTENANCE_REQUIRED:
+            self.add_event("error", f"Critical state reached on {name}. Failure predicted in {hours} hours.", key)
+        elif new_status == ANOMALY_DETECTED and self.predicted_within(row, WARNING_HOURS):
+            self.add_event("warning", f"Performance anomaly detected on {name}.", key)
+        # Statut dû à un seul signal anormal : déjà journalisé à la détection (_log_signals)
+        elif new_status == OPERATIONAL and self._last_status[row] != OPERATIONAL:
+            self.add_event("success", f"{name} is back to operational status.", key)
+
+    def sensor_readings(self, rows=None):
+        """
+        Température et vibration des lignes demandées : dernière mesure reçue,
+        ou à défaut une estimation à partir de la santé.
+        """
+        sel, _ = self._select(rows)
+        health = self._health[sel]
+        temperature = self._temperature[sel]
+        vibration = self._vibration[sel]
+        temperature = np.where(np.isnan(temperature), 85 + (100 - health) * 0.5, temperature)
+        vibration = np.where(np.isnan(vibration), 2.0 + (100 - health) * 0.1, vibration)
+        return temperature, vibration
+
+    def apply_telemetry(self, rows, timestamps, temperature, vibration):
+        """
+        Applique en bloc un lot de mesures, éventuellement plusieurs par ligne.
+        Toutes passent dans les détecteurs d'anomalies, dans l'ordre chronologique
+        de chaque équipement ; la plus récente reste affichée. Les mesures plus
+        anciennes que la dernière reçue sont ignorées. Retourne les lignes mises à jour.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        newer = ~(timestamps <= self._last_reading_ts[rows])
+        if not newer.all():
+            rows, timestamps = rows[newer], timestamps[newer]
+            temperature, vibration = temperature[newer], vibration[newer]
+        if not len(rows) or np.bincount(rows).max() == 1:
+            self._apply_readings(rows, timestamps, temperature, vibration)
+            return rows
+        if np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind="stable")
+            rows, timestamps = rows[order], timestamps[order]
+            temperature, vibration = temperature[order], vibration[order]
+        # Mesures regroupées par équipement, dans l'ordre chronologique, et rang de chacune dans son groupe
+        by_row = np.argsort(rows, kind="stable")
+        sorted_rows = rows[by_row]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        # Sans numba, les premiers rangs (beaucoup d'équipements chacun) restent des pas vectorisés ;
+        # au-delà, les quelques équipements très bavards sont parcourus en séquence
+        head = 0
+        if not scan_compiled():
+            head = int(np.count_nonzero(np.bincount(rank) >= VECTOR_MIN_ROWS))
+        if head:
+            order = np.argsort(rank, kind="stable")
+            bounds = np.r_[0, np.flatnonzero(np.diff(rank[order])) + 1, len(rows)]
+            for start, stop in zip(bounds[:head], bounds[1:head + 1]):
+                step = by_row[order[start:stop]]
+                self._apply_readings(rows[step], timestamps[step], temperature[step], vibration[step])
+        tail = by_row[rank >= head]
+        if len(tail):
+            self._scan_readings(rows[tail], timestamps[tail], temperature[tail], vibration[tail])
+        return sorted_rows[starts]
+
+    def _apply_readings(self, rows, timestamps, temperature, vibration):
+        """Applique une mesure par ligne (indices uniques)."""
+        self._last_reading_ts[rows] = timestamps
+        self._temperature[rows] = np.where(np.isnan(temperature), self._temperature[rows], temperature)
+        self._vibration[rows] = np.where(np.isnan(vibration), self._vibration[rows], vibration)
+        self._detect(rows, temperature, vibration)
+
+    def _scan_readings(self, rows, timestamps, temperature, vibration):
+        """
+        Applique plusieurs mesures par ligne, regroupées par ligne et dans l'ordre
+        chronologique : un seul parcours par équipement dans les détecteurs.
+        """
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        stops = np.r_[starts[1:], len(rows)]
+        target = rows[starts]
+        self._last_reading_ts[target] = timestamps[stops - 1]
+        for column, values in ((self._temperature, temperature), (self._vibration, vibration)):
+            # Dernière valeur présente de chaque équipement, s'il y en a une
+            present = np.flatnonzero(~np.isnan(values))
+            latest = present[np.maximum(np.searchsorted(present, stops) - 1, 0)] if len(present) else stops
+            found = (latest >= starts) & (latest < stops)
+            column[target[found]] = values[latest[found]]
+
+        old = self._anomaly[target]
+        flags = np.repeat(old, stops - starts)  # Drapeaux après chaque mesure
+        for signal, values in zip(SIGNALS, (temperature, vibration)):
+            if np.isnan(values).all():
+                continue
+            bit = SIGNAL_BITS[signal]
+            columns = [getattr(self, f"_{signal}_{field}") for field in _DETECTOR]
+            *state, anomalous = scan_detectors(values, starts, *(column[target] for column in columns),
+                                               (old & bit) != 0, MIN_STD[signal])
+            for column, value in zip(columns, state):
+                column[target] = value
+            flags = np.where(anomalous, flags | bit, flags & ~bit).astype(old.dtype)
+        moved = flags[stops - 1] != old
+        self._anomaly[target] = flags[stops - 1]
+        self._index_anomalies(target[moved], flags[stops - 1][moved])
+
+        previous = np.empty_like(flags)  # Drapeaux avant chaque mesure
+        previous[1:] = flags[:-1]
+        previous[starts] = old
+        changed = np.flatnonzero(flags != previous)
+        if not len(changed):
+            return
+        if self.scheduler is not None:
+            self.scheduler.wake(np.unique(rows[changed]))
+        if self.on_event is not None:
+            changed = changed[np.argsort(timestamps[changed], kind="stable")]
+            self._log_signals(rows[changed], previous[changed], flags[changed])
+
+    def _detect(self, rows, temperature, vibration):
+        """
+        Passe les mesures reçues dans les détecteurs d'anomalies de chaque
+        signal ; le statut en tient compte au classement suivant.
+        """
+        flags = self._anomaly[rows]
+        for signal, values in zip(SIGNALS, (temperature, vibration)):
+            present = ~np.isnan(values)
+            if not present.any():
+                continue
+            target, values = (rows, values) if present.all() else (rows[present], values[present])
+            columns = [getattr(self, f"_{signal}_{field}") for field in _DETECTOR]
+            *state, anomalous = update_detectors(values, *(column[target] for column in columns), MIN_STD[signal])
+            for column, value in zip(columns, state):
+                column[target] = value
+            bit = SIGNAL_BITS[signal]
+            flags[present] = np.where(anomalous, flags[present] | bit, flags[present] & ~bit)
+        old = self._anomaly[rows]
+        changed = flags != old
+        self._anomaly[rows] = flags
+        if not changed.any():
+            return
+        self._index_anomalies(rows[changed], flags[changed])
+        if self.scheduler is not None:
+            # Un signal qui passe en anomalie (ou en sort) est reclassé dès le tick suivant
+            self.scheduler.wake(rows[changed])
+        if self.on_event is not None:
+            self._log_signals(rows[changed], old[changed], flags[changed])
+
+    def _index_anomalies(self, rows, flags):
+        """Reporte dans `anomalous` les lignes dont les drapeaux d'anomalie ont changé."""
+        self.anomalous.update(rows[flags != 0].tolist())
+        self.anomalous.difference_update(rows[flags == 0].tolist())
+
+    def _log_signals(self, rows, old, new):
+        """Journalise les signaux qui entrent en anomalie ou en sortent, quel que soit le statut."""
+        for row, before, after in zip(rows.tolist(), old.tolist(), new.tolist()):
+            key, name = self.keys[row], self.names[row]
+            raised = [s for s in SIGNALS if after & ~before & SIGNAL_BITS[s]]
+            cleared = [s for s in SIGNALS if before & ~after & SIGNAL_BITS[s]]
+            if raised:
+                self.add_event("warning", f"Abnormal {' and '.join(raised)} readings on {name}.", key)
+            if cleared:
+                self.add_event("info", f"{' and '.join(cleared).capitalize()} readings back to normal on {name}.", key)
+
+    def trigger_catastrophic_failure(self, row, now=None):
+        """Simule une panne catastrophique sur une ligne."""
+        self._health[row] = 5
+        self._reset_estimator(row)
+        self._time_to_failure_hours[row] = self._ttf_lower[row] = self._ttf_upper[row] = 0
+        self._predicted_failure_ts[row] = time.time() if now is None else now
+        self._update_risk([row], np.array([row]), np.array([IMMINENT_FAILURE], dtype=np.int8))
+        self._status[row] = IMMINENT_FAILURE
+        self._wake(row)
+        self.add_event("error", f"Catastrophic failure SIMULATED on {self.names[row]}!", self.keys[row])
+
+    def perform_maintenance(self, row):
+        """Simule une maintenance réussie sur une ligne."""
+        self._health[row] = random.randint(92, 99)
+        self._degradation_rate[row] = random.uniform(0.05, 0.15)  # Le taux de dégradation peut changer après une maintenance
+        self._reset_estimator(row)
+        self._reset_detectors(row)
+        self._time_to_failure_hours[row] = self._ttf_lower[row] = self._ttf_upper[row] = np.nan
+        self._predicted_failure_ts[row] = np.nan
+        self._update_risk([row], np.array([row]), np.array([POST_MAINTENANCE], dtype=np.int8))
+        self._status[row] = POST_MAINTENANCE
+        self._wake(row)
+        self.add_event("success", f"Maintenance successfully performed on {self.names[row]}.", self.keys[row])
+
+    def restore(self, rows, health, degradation_rate):
+        """
+        Remet en service un ensemble de lignes (après maintenance ou réparation),
+        sans journaliser : le statut est recalculé au tick suivant.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        self._health[rows] = health
+        self._degradation_rate[rows] = degradation_rate
+        self._reset_estimator(rows)
+        self._reset_detectors(rows)
+        for column in ("time_to_failure_hours", "ttf_lower", "ttf_upper", "predicted_failure_ts"):
+            getattr(self, "_" + column)[rows] = np.nan
+        self._update_risk(rows, rows, self._status[rows])
+        self._wake(rows)
+
+    def _wake(self, row):
+        """Fait réévaluer une ligne (ou un tableau d'indices) au prochain tick, après une commande."""
+        if self.scheduler is not None:
+            self.scheduler.wake(row)
+
+    def _reset_estimator(self, row):
+        """Repart d'un estimateur neuf après un saut de santé (maintenance, panne) ; `row` peut être un tableau d'indices."""
+        self._trend_level[row] = self._health[row]
+        self._trend_slope[row] = self._residual_var[row] = self._slope_var[row] = 0.0
+        self._samples[row] = 1
+        self._evaluated_at[row] = self.clock
+
+    def _reset_detectors(self, row):
+        """Réapprend la ligne de base des signaux après une intervention ; `row` peut être un tableau d'indices."""
+        for signal in SIGNALS:
+            for field in ("cusum_high", "cusum_low", "samples"):
+                getattr(self, f"_{signal}_{field}")[row] = 0
+        self._anomaly[row] = 0
+        self.anomalous.difference_update(np.atleast_1d(row).tolist())
+
+    def set_location(self, rows, site, zone):
+        """Rattache des lignes à la zone `zone` du site `site` (créée au besoin) ; retourne son numéro."""
+        location = (site, zone)
+        if location in self.locations:
+            number = self.locations.index(location)
+        else:
+            number = len(self.locations)
+            self.locations.append(location)
+            if self.hierarchy is not None:
+                self.hierarchy.add_zone()
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        if self.hierarchy is not None:
+            self.hierarchy.assign(rows, number, self._status[rows], self._cost_of_failure[rows])
+        self._zone[rows] = number
+        return number
+
+    # --- Requêtes sur l'index de risque ---
+    def most_at_risk(self, k=50, within_hours=WARNING_HOURS):
+        """Lignes dont la panne au plus tôt est prévue dans moins de `within_hours`, de la plus proche à la plus lointaine."""
+        return self.risk.top(k, self.clock, within_hours)
+
+    def predicted_within(self, row, hours):
+        """Vrai si la borne basse de la prédiction tombe dans les `hours` heures (comme les bandes de statut)."""
+        return bool(np.floor(self._ttf_lower[row]) <= hours)
+
+    def rows_with_status(self, status):
+        """Lignes d'une bande de statut à risque, de la panne la plus proche à la plus lointaine."""
+        rows = self.risk.rows_with_status(status)
+        return sorted(rows, key=lambda row: self._ttf_lower[row])
+
+    def anomalous_rows(self, k=None):
+        """Lignes dont un signal est en anomalie, par numéro de ligne (les `k` premières), sans parcourir la flotte."""
+        return sorted(self.anomalous) if k is None else heapq.nsmallest(k, self.anomalous)
+
+    def alerting_count(self):
+        """Équipements en alerte : statuts à risque, plus les anomalies de signal hors de ces statuts."""
+        at_risk = int(self.risk.counts[list(AT_RISK_STATUSES)].sum())
+        rows = np.fromiter(self.anomalous, dtype=np.intp, count=len(self.anomalous))
+        return at_risk + int((~np.isin(self._status[rows], AT_RISK_STATUSES)).sum())
+
+    def add_event(self, level, message, asset=None):
+        """Transmet un événement au journal, s'il y en a un."""
+        if self.on_event is not None:
+            self.on_event(level, message, asset)
@@ -0,0 +1,209 @@
+"""
+Hiérarchie usine -> site -> zone -> équipement et ses agrégats.
+
+Chaque équipement est rattaché à une zone (colonne `zone` de FleetState,
+-1 = non rattaché) ; les noms (site, zone) sont dans `fleet.locations`.
+L'index tient à jour, par zone, les effectifs et coûts de chaque statut
+ainsi que l'équipement dont la panne est prévue le plus tôt, à partir des
+seules lignes modifiées par un tick ou une commande. Les sites et l'usine
+sont agrégés à la lecture à partir des zones, sans parcourir la flotte.
+"""
+import numpy as np
+
+
+class HierarchyIndex:
+    """
+    Agrégats par zone, mis à jour par différences (même interface que RiskIndex,
+    qui lui transmet les seules clés modifiées). La clé d'un équipement est
+    l'heure simulée de sa panne au plus tôt (+inf sans prédiction). Le minimum
+    d'une zone baisse sans parcours ; s'il remonte, la zone est marquée et
+    recalculée sur ses seuls équipements.
+    """
+    def __init__(self, n_statuses, at_risk_statuses, capacity=0):
+        self.n_statuses = n_statuses
+        self.at_risk_statuses = tuple(at_risk_statuses)
+        self._zones = np.full(capacity, -1, dtype=np.int32)
+        self._keys = np.full(capacity, np.inf)
+        self.counts = np.zeros((0, n_statuses), dtype=np.int64)
+        self.costs = np.zeros((0, n_statuses), dtype=np.float64)
+        self.worst_keys = np.zeros(0)
+        self.worst_rows = np.zeros(0, dtype=np.intp)
+        self._dirty = np.zeros(0, dtype=bool)
+        self._members = None  # (lignes triées par zone, bornes de chaque zone), reconstruit si les rattachements changent
+
+    @property
+    def n_zones(self):
+        return len(self.worst_keys)
+
+    def resize(self, capacity):
+        """Agrandit les tableaux par ligne pour contenir `capacity` lignes."""
+        if capacity > len(self._keys):
+            zones = np.full(capacity, -1, dtype=np.int32)
+            zones[:len(self._zones)] = self._zones
+            keys = np.full(capacity, np.inf)
+            keys[:len(self._keys)] = self._keys
+            self._zones, self._keys = zones, keys
+
+    def add_zone(self):
+        """Ajoute une zone vide et retourne son numéro."""
+        self.counts = np.vstack([self.counts, np.zeros((1, self.n_statuses), dtype=np.int64)])
+        self.costs = np.vstack([self.costs, np.zeros((1, self.n_statuses))])
+        self.worst_keys = np.append(self.worst_keys, np.inf)
+        self.worst_rows = np.append(self.worst_rows, -1)
+        self._dirty = np.append(self._dirty, False)
+        return self.n_zones - 1
+
+    def copy(self):
+        self.refresh()  # La copie publiée n'a plus de zone à recalculer : sa lecture ne modifie rien
+        other = HierarchyIndex(self.n_statuses, self.at_risk_statuses)
+        other._zones = self._zones.copy()
+        other._keys = self._keys.copy()
+        other.counts = self.counts.copy()
+        other.costs = self.costs.copy()
+        other.worst_keys = self.worst_keys.copy()
+        other.worst_rows = self.worst_rows.copy()
+        other._dirty = self._dirty.copy()
+        other._members = self._members
+        return other
+
+    # --- Mises à jour ---
+    def assign(self, rows, zone, statuses, costs):
+        """Rattache des lignes à `zone` (-1 pour les détacher), en les retirant de leur zone précédente."""
+        old = self._zones[rows]
+        attached = old >= 0
+        if attached.any():
+            np.add.at(self.counts, (old[attached], statuses[attached]), -1)
+            np.add.at(self.costs, (old[attached], statuses[attached]), -costs[attached])
+            self._dirty[old[attached]] = True
+        self._zones[rows] = zone
+        self._members = None
+        if zone >= 0:
+            np.add.at(self.counts, (zone, statuses), 1)
+            np.add.at(self.costs, (zone, statuses), costs)
+            self._lower(rows, self._keys[rows], np.full(len(rows), zone))
+
+    def update_keys(self, rows, keys):
+        """Met à jour les clés modifiées (NaN = pas de prédiction)."""
+        if not len(rows):
+            return
+        keys = np.where(np.isnan(keys), np.inf, keys)
+        self._keys[rows] = keys
+        zones = self._zones[rows]
+        attached = zones >= 0
+        if not attached.any():
+            return
+        rows, keys, zones = rows[attached], keys[attached], zones[attached]
+        # Le détenteur du minimum recule : seule sa zone sera recalculée
+        receded = (rows == self.worst_rows[zones]) & (keys > self.worst_keys[zones])
+        self._dirty[zones[receded]] = True
+        self._lower(rows, keys, zones)
+
+    def _lower(self, rows, keys, zones):
+        """Abaisse le minimum des zones dont une clé passe en dessous."""
+        lower = keys < self.worst_keys[zones]
+        if not lower.any():
+            return
+        rows, keys, zones = rows[lower], keys[lower], zones[lower]
+        order = np.lexsort((keys, zones))
+        rows, keys, zones = rows[order], keys[order], zones[order]
+        first = np.r_[True, zones[1:] != zones[:-1]]  # Plus petite clé de chaque zone
+        self.worst_keys[zones[first]] = keys[first]
+        self.worst_rows[zones[first]] = rows[first]
+
+    def update_statuses(self, rows, old_statuses, new_statuses, costs):
+        """Déplace les lignes dont le statut a changé d'une bande à l'autre, dans leur zone."""
+        zones = self._zones[rows]
+        attached = zones >= 0
+        if not attached.any():
+            return
+        zones, costs = zones[attached], costs[attached]
+        old_statuses, new_statuses = old_statuses[attached], new_statuses[attached]
+        np.add.at(self.counts, (zones, old_statuses), -1)
+        np.add.at(self.counts, (zones, new_statuses), 1)
+        np.add.at(self.costs, (zones, old_statuses), -costs)
+        np.add.at(self.costs, (zones, new_statuses), costs)
+
+    def refresh(self):
+        """Recalcule le minimum des zones marquées, sur leurs seuls équipements."""
+        dirty = np.flatnonzero(self._dirty)
+        if not len(dirty):
+            return
+        order, bounds = self.members()
+        for zone in dirty.tolist():
+            rows = order[bounds[zone]:bounds[zone + 1]]
+            if len(rows):
+                best = rows[np.argmin(self._keys[rows])]
+                self.worst_keys[zone], self.worst_rows[zone] = self._keys[best], best
+            else:
+                self.worst_keys[zone], self.worst_rows[zone] = np.inf, -1
+        self._dirty[:] = False
+
+    # --- Requêtes ---
+    def members(self):
+        """Retourne (lignes triées par zone, bornes) : la zone z occupe order[bounds[z]:bounds[z + 1]]."""
+        if self._members is None:
+            rows = np.flatnonzero(self._zones >= 0)
+            order = rows[np.argsort(self._zones[rows], kind="stable")]
+            bounds = np.searchsorted(self._zones[order], np.arange(self.n_zones + 1))
+            self._members = (order, bounds)
+        return self._members
+
+
+class Rollup:
+    """Indicateurs d'un nœud de la hiérarchie (usine, site ou zone)."""
+    __slots__ = ("site", "zone", "zones", "assets", "status_counts", "at_risk", "money_at_risk",
+                 "worst_row", "worst_hours")
+
+    def __init__(self, site, zone, zones, status_counts, at_risk, money_at_risk, worst_row, worst_hours):
+        self.site = site
+        self.zone = zone
+        self.zones = zones  # Numéros des zones agrégées (filtre de la vue flotte)
+        self.status_counts = status_counts
+        self.assets = int(status_counts.sum())
+        self.at_risk = at_risk
+        self.money_at_risk = money_at_risk
+        self.worst_row = worst_row  # Équipement dont la panne est prévue le plus tôt (None sans prédiction)
+        self.worst_hours = worst_hours
+
+
+def rollups(fleet, level="site", site=None):
+    """
+    Indicateurs par site (`level="site"`), par zone (`level="zone"`, limitées
+    au site `site` s'il est donné) ou pour toute l'usine (`level="plant"`).
+    Coût proportionnel au nombre de zones. Nécessite l'index de la flotte.
+    """
+    index = fleet.hierarchy
+    index.refresh()
+    labels, groups = {}, []
+    for zone, (zone_site, zone_name) in enumerate(fleet.locations):
+        if level == "zone":
+            if site is not None and zone_site != site:
+                continue
+            label = (zone_site, zone_name)
+        else:
+            label = (zone_site, None) if level == "site" else (None, None)
+        groups.append((labels.setdefault(label, len(labels)), zone))
+    if not groups:
+        return []
+
+    group_ids, zones = (np.array(column) for column in zip(*groups))
+    counts = np.zeros((len(labels), index.n_statuses), dtype=np.int64)
+    np.add.at(counts, group_ids, index.counts[zones])
+    at_risk = list(index.at_risk_statuses)
+    money = np.zeros(len(labels))
+    np.add.at(money, group_ids, index.costs[zones][:, at_risk].sum(axis=1))
+    # Zone à la panne la plus proche de chaque groupe : première après tri par (groupe, clé)
+    order = np.lexsort((index.worst_keys[zones], group_ids))
+    worst = zones[order[np.r_[True, group_ids[order][1:] != group_ids[order][:-1]]]]
+    worst_keys = index.worst_keys[worst]
+
+    result = []
+    for (group_site, group_zone), group in labels.items():
+        key = worst_keys[group]
+        result.append(Rollup(
+            group_site, group_zone, zones[group_ids == group].tolist(), counts[group],
+            int(counts[group][at_risk].sum()), float(money[group]),
+            None if np.isinf(key) else int(index.worst_rows[worst[group]]),
+            None if np.isinf(key) else float(key - fleet.clock),
+        ))
+    return result
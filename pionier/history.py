@@ -0,0 +1,244 @@
+"""
+Historique par équipement des séries santé, température, vibration et
+temps avant panne prédit.
+
+Chaque série est un tampon circulaire de taille fixe stocké dans un tableau
+(équipement x échantillon x métrique), éventuellement déporté dans des
+fichiers mappés en mémoire. Des agrégats min/max/moyenne sont tenus à jour à
+plusieurs résolutions (1 min, 1 h) pour qu'un graphique sur une semaine ne
+lise que quelques centaines de points.
+
+Aux profondeurs par défaut, un équipement coûte environ 38 Kio (6 Kio
+d'échantillons bruts, 32 Kio d'agrégats) : `fit_resolutions` réduit la
+profondeur des agrégats pour qu'une grande flotte tienne dans un budget
+(mémoire, ou disque si les tableaux sont déportés). `HistoryStore.span` donne
+la durée réellement couverte, affichée avec les courbes de tendance.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+HISTORY_METRICS = ("health", "temperature", "vibration", "time_to_failure_hours")
+
+# Résolutions des agrégats : (secondes par seau, nombre de seaux conservés)
+DEFAULT_RESOLUTIONS = ((60, 240), (3600, 336))  # 4 heures à la minute, 2 semaines à l'heure
+MIN_BUCKETS = 24  # Profondeur minimale d'une résolution réduite
+
+
+def _layout(rows, capacity, resolutions):
+    """Nom, forme et type de chaque tableau pour `rows` équipements."""
+    metrics = len(HISTORY_METRICS)
+    layout = {
+        "count": ((rows,), np.int64),
+        "first": ((rows,), np.float64),
+        "ts": ((rows, capacity), np.float64),
+        "raw": ((rows, capacity, metrics), np.float32),
+    }
+    for seconds, buckets in resolutions:
+        layout[f"{seconds}:id"] = ((rows, buckets), np.int32)
+        layout[f"{seconds}:n"] = ((rows, buckets), np.uint32)  # Échantillons du seau, communs aux métriques
+        layout[f"{seconds}:min"] = ((rows, buckets, metrics), np.float32)
+        layout[f"{seconds}:max"] = ((rows, buckets, metrics), np.float32)
+        layout[f"{seconds}:sum"] = ((rows, buckets, metrics), np.float32)
+    return layout
+
+
+def bytes_per_asset(capacity, resolutions=DEFAULT_RESOLUTIONS):
+    """Mémoire occupée par l'historique d'un équipement, en octets."""
+    layout = _layout(1, capacity, resolutions).values()
+    return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in layout)
+
+
+def fit_resolutions(assets, capacity, budget, resolutions=DEFAULT_RESOLUTIONS):
+    """
+    Réduit d'un même facteur le nombre de seaux de chaque résolution pour que
+    l'historique de `assets` équipements tienne dans `budget` octets (sans
+    descendre sous MIN_BUCKETS). Les petites flottes gardent la profondeur complète.
+    """
+    raw = bytes_per_asset(capacity, ())
+    rollup = bytes_per_asset(capacity, resolutions) - raw
+    if not rollup or assets * (raw + rollup) <= budget:
+        return tuple(resolutions)
+    factor = max(budget / max(assets, 1) - raw, 0) / rollup
+    return tuple((seconds, max(MIN_BUCKETS, min(buckets, int(buckets * factor)))) for seconds, buckets in resolutions)
+
+
+def span(resolutions):
+    """Durée couverte (s) par la résolution la plus profonde."""
+    return max((seconds * buckets for seconds, buckets in resolutions), default=0)
+
+
+class HistoryStore:
+    """
+    Historique borné de toute la flotte.
+    `record()` ajoute un échantillon pour un ensemble de lignes en une seule
+    opération vectorisée ; `series()` relit une série à la résolution la plus
+    fine qui tient dans le nombre de points demandé.
+    """
+    def __init__(self, capacity=256, resolutions=DEFAULT_RESOLUTIONS, assets=16, spill_dir=None):
+        self.capacity = capacity
+        self.resolutions = tuple(resolutions)
+        self.spill_dir = spill_dir
+        self._rows = 0
+        self._arrays = {}
+        self._lock = threading.Lock()
+        self._allocate(max(1, assets))
+
+    # --- Stockage ---
+    @property
+    def span(self):
+        """Durée couverte (s) par les agrégats les plus grossiers."""
+        return span(self.resolutions)
+
+    @property
+    def nbytes(self):
+        """Mémoire (ou disque) occupée par les tableaux, en octets."""
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def _new_array(self, name, shape, dtype):
+        if self.spill_dir is None:
+            return np.zeros(shape, dtype=dtype)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, name.replace(":", "_") + f".{shape[0]}.npy")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def _allocate(self, rows):
+        """Agrandit le stockage (par doublement) pour contenir `rows` équipements."""
+        if rows <= self._rows:
+            return
+        capacity = max(rows, 2 * self._rows)
+        arrays = {}
+        for name, (shape, dtype) in _layout(capacity, self.capacity, self.resolutions).items():
+            array = self._new_array(name, shape, dtype)
+            old = self._arrays.get(name)
+            if old is not None:
+                array[:self._rows] = old[:self._rows]
+                self._release(old)
+            arrays[name] = array
+        self._arrays = arrays
+        self._rows = capacity
+
+    @staticmethod
+    def _release(array):
+        if isinstance(array, np.memmap):
+            path = array.filename
+            del array
+            os.remove(path)
+
+    # --- Écriture ---
+    def record(self, rows, timestamps, values):
+        """
+        Ajoute un échantillon par ligne (indices uniques).
+        `values` a la forme (len(rows), len(HISTORY_METRICS)) ; NaN = pas de mesure.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if not len(rows):
+            return
+        values = np.asarray(values, dtype=np.float32)
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), rows.shape)
+        with self._lock:
+            self._allocate(int(rows.max()) + 1)
+            a = self._arrays
+            count = a["count"][rows]
+            a["first"][rows[count == 0]] = timestamps[count == 0]
+            slot = count % self.capacity
+            a["ts"][rows, slot] = timestamps
+            a["raw"][rows, slot] = values
+            a["count"][rows] += 1
+
+            for seconds, buckets in self.resolutions:
+                bucket = np.floor(timestamps / seconds).astype(np.int32)
+                slot = bucket % buckets
+                ids = a[f"{seconds}:id"]
+                fresh = ids[rows, slot] != bucket
+                if fresh.any():
+                    fr, fs = rows[fresh], slot[fresh]
+                    ids[fr, fs] = bucket[fresh]
+                    a[f"{seconds}:min"][fr, fs] = np.inf
+                    a[f"{seconds}:max"][fr, fs] = -np.inf
+                    a[f"{seconds}:sum"][fr, fs] = 0
+                    a[f"{seconds}:n"][fr, fs] = 0
+                a[f"{seconds}:min"][rows, slot] = np.fmin(a[f"{seconds}:min"][rows, slot], values)
+                a[f"{seconds}:max"][rows, slot] = np.fmax(a[f"{seconds}:max"][rows, slot], values)
+                # Compte commun aux métriques : une mesure manquante (NaN) prive le seau de moyenne
+                a[f"{seconds}:sum"][rows, slot] += values
+                a[f"{seconds}:n"][rows, slot] += 1
+
+    def record_fleet(self, fleet, rows=None, timestamp=None):
+        """Enregistre l'état courant de la flotte (toutes les lignes par défaut), à `timestamp` ou maintenant."""
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = np.arange(fleet.size) if rows is None else np.asarray(rows, dtype=np.intp)
+        temperature, vibration = fleet.sensor_readings(rows)
+        values = np.column_stack((
+            fleet.health[rows], temperature, vibration, fleet.time_to_failure_hours[rows],
+        ))
+        self.record(rows, timestamp, values)
+
+    # --- Lecture ---
+    def series(self, row, metric, start=None, end=None, max_points=300):
+        """
+        Retourne la série `metric` d'un équipement sous forme de dict
+        {resolution, timestamps, min, max, mean}. On choisit la résolution la
+        plus fine (brute, puis agrégats) qui couvre tout l'intervalle demandé
+        (tout l'historique si `start` est omis) en au plus `max_points` points.
+        """
+        m = HISTORY_METRICS.index(metric)
+        with self._lock:
+            if row >= self._rows or self._arrays["count"][row] == 0:
+                return _empty_series()
+            levels = list(self._levels(row, m))
+            if start is None:
+                start = self._arrays["first"][row]
+            for i, (seconds, ts, fetch) in enumerate(levels):
+                keep = _in_range(ts, start, end, seconds)
+                covers = len(ts) and ts[0] <= start
+                last = i == len(levels) - 1
+                if (covers and np.count_nonzero(keep) <= max_points) or last:
+                    positions = np.flatnonzero(keep)[-max_points:]
+                    return dict(resolution=seconds, timestamps=ts[positions], **fetch(positions))
+        return _empty_series()
+
+    def _levels(self, row, m):
+        """Niveaux de détail d'une série : (résolution, horodatages, lecture des valeurs)."""
+        a = self._arrays
+        count = int(a["count"][row])
+        n = min(count, self.capacity)
+        raw_order = np.arange(count - n, count) % self.capacity
+
+        def fetch_raw(positions):
+            values = a["raw"][row, raw_order[positions], m].astype(np.float64)
+            return {"min": values, "max": values, "mean": values}
+        yield 0, a["ts"][row, raw_order], fetch_raw
+
+        for seconds, _ in self.resolutions:
+            ids = a[f"{seconds}:id"][row]
+            counts = a[f"{seconds}:n"][row]
+            order = np.argsort(ids)
+            # Seaux sans aucune mesure de cette métrique : min et max sont restés à +inf / -inf
+            order = order[(ids[order] > 0) & (a[f"{seconds}:min"][row, order, m] <= a[f"{seconds}:max"][row, order, m])]
+
+            def fetch(positions, seconds=seconds, order=order, counts=counts):
+                slots = order[positions]
+                return {
+                    "min": a[f"{seconds}:min"][row, slots, m].astype(np.float64),
+                    "max": a[f"{seconds}:max"][row, slots, m].astype(np.float64),
+                    "mean": a[f"{seconds}:sum"][row, slots, m] / counts[slots].astype(np.float64),
+                }
+            yield seconds, ids[order].astype(np.float64) * seconds, fetch
+
+
+def _in_range(ts, start, end, seconds=0):
+    """Points de [start, end] ; un seau de `seconds` secondes est gardé s'il chevauche `start`."""
+    keep = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        keep &= ts > start - seconds if seconds else ts >= start
+    if end is not None:
+        keep &= ts <= end
+    return keep
+
+
+def _empty_series():
+    empty = np.empty(0)
+    return {"resolution": 0, "timestamps": empty, "min": empty, "max": empty, "mean": empty}
@@ -0,0 +1,296 @@
+"""
+Journal d'événements durable : base SQLite en mode WAL, écrite par lots.
+
+Les événements (transitions de statut, maintenances, pannes simulées...)
+sont mis en file par le thread qui les émet, puis écrits par un thread
+dédié, une transaction par lot : ni le tick ni le rendu n'attendent le
+disque. Les requêtes par plage de temps, équipement et niveau passent par
+des index ; les exports CSV et Parquet parcourent le résultat par
+morceaux, sans jamais charger tout le journal en mémoire.
+
+Exemples :
+    python -m pionier.journal events.db --start 2026-10-01 --asset T-310
+    python -m pionier.journal events.db --level error --format parquet --output errors.parquet
+"""
+import argparse
+import csv
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500  # Événements par transaction au plus
+DEFAULT_FLUSH_INTERVAL = 1.0  # Délai maximal (s) avant l'écriture d'un événement
+EXPORT_CHUNK_SIZE = 10000  # Lignes lues à la fois pendant un export
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    level TEXT NOT NULL,
+    asset TEXT,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_by_asset ON events (asset, timestamp);
+CREATE INDEX IF NOT EXISTS events_by_level ON events (level, timestamp);
+"""
+
+
+def _timestamp(value):
+    """Accepte un timestamp Unix, un datetime ou une date ISO 8601."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class EventJournal:
+    """
+    Journal persistant en ajout seul. `append` a la signature d'un récepteur
+    d'événements du service ; les lectures ouvrent leur propre connexion
+    (le mode WAL laisse lire pendant l'écriture d'un lot).
+    """
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL, metrics=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        connection = self._connect()
+        try:
+            connection.executescript(_SCHEMA)
+        finally:
+            connection.close()
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="pionier-journal", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")  # Chaque lot validé survit à une coupure
+        return connection
+
+    # --- Écriture ---
+    def append(self, level, message, asset=None, timestamp=None):
+        """Met un événement en file d'écriture (horodaté maintenant par défaut)."""
+        if self._closed:
+            raise RuntimeError("event journal is closed")
+        self._queue.put((time.time() if timestamp is None else timestamp, level, asset, message))
+
+    def flush(self, timeout=None):
+        """
+        Attend l'écriture des événements déjà en file ; retourne False si
+        leur lot n'a pas pu être écrit ou en cas de dépassement du délai.
+        """
+        done = Future()
+        self._queue.put(done)
+        try:
+            return done.result(timeout)
+        except FutureTimeout:
+            return False
+
+    def close(self, timeout=None):
+        """Écrit les événements en file puis arrête le thread d'écriture."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+        self._writer.join(timeout)
+
+    def _run(self):
+        connection = self._connect()
+        batch, waiters, deadline = [], [], None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()  # Délai écoulé : le lot en cours part
+            if item is None:
+                running = False
+            elif isinstance(item, Future):
+                waiters.append(item)
+            elif item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            written = True
+            if batch and (len(batch) >= self.batch_size or waiters or not running or time.monotonic() >= deadline):
+                written = self._write(connection, batch)
+                if written:
+                    batch, deadline = [], None
+                else:
+                    deadline = time.monotonic() + self.flush_interval  # Nouvel essai au prochain délai
+            # Les appels à flush() n'aboutissent qu'une fois leurs événements validés
+            for waiter in waiters:
+                waiter.set_result(written)
+            waiters = []
+        connection.close()
+
+    def _write(self, connection, batch):
+        started = time.perf_counter()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO events (timestamp, level, asset, message) VALUES (?, ?, ?, ?)", batch,
+                )
+        except sqlite3.Error:
+            logger.exception("Cannot write %d events to %s", len(batch), self.path)
+            return False
+        if self.metrics is not None:
+            self.metrics.observe("pionier_journal_batch_seconds", time.perf_counter() - started)
+            self.metrics.inc("pionier_journal_events_total", len(batch))
+        return True
+
+    # --- Lecture ---
+    def _select(self, columns, start, end, asset, level, descending=False, limit=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_timestamp(end))
+        if asset is not None:
+            clauses.append("asset = ?")
+            params.append(asset)
+        if level is not None:
+            clauses.append("level = ?")
+            params.append(level)
+        sql = f"SELECT {columns} FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if columns != "COUNT(*)":
+            sql += " ORDER BY timestamp DESC, id DESC" if descending else " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def _rows(self, start, end, asset, level, descending=False, limit=None):
+        """Parcourt les lignes (timestamp, level, asset, message) par morceaux."""
+        connection = self._connect()
+        try:
+            cursor = connection.execute(*self._select(
+                "timestamp, level, asset, message", start, end, asset, level, descending, limit,
+            ))
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            connection.close()
+
+    def query(self, start=None, end=None, asset=None, level=None, limit=None, descending=False):
+        """
+        Itère sur les événements de [start, end) (timestamps, datetimes ou
+        dates ISO), filtrés par équipement et niveau, du plus ancien au plus
+        récent (ou l'inverse avec `descending`).
+        """
+        for rows in self._rows(start, end, asset, level, descending, limit):
+            for timestamp, event_level, event_asset, message in rows:
+                yield {
+                    "time": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+                    "timestamp": timestamp,
+                    "level": event_level,
+                    "asset": event_asset,
+                    "message": message,
+                }
+
+    def count(self, start=None, end=None, asset=None, level=None):
+        connection = self._connect()
+        try:
+            return connection.execute(*self._select("COUNT(*)", start, end, asset, level)).fetchone()[0]
+        finally:
+            connection.close()
+
+    # --- Exports ---
+    def export_csv(self, destination, start=None, end=None, asset=None, level=None):
+        """
+        Écrit les événements retenus en CSV (horodatage ISO 8601 UTC) dans un
+        chemin ou un fichier texte ouvert ; retourne le nombre de lignes.
+        """
+        if isinstance(destination, str):
+            with open(destination, "w", newline="", encoding="utf-8") as handle:
+                return self.export_csv(handle, start, end, asset, level)
+        writer = csv.writer(destination)
+        writer.writerow(("timestamp", "level", "asset", "message"))
+        count = 0
+        for rows in self._rows(start, end, asset, level):
+            writer.writerows((_isoformat(row[0]),) + row[1:] for row in rows)
+            count += len(rows)
+        return count
+
+    def export_parquet(self, path, start=None, end=None, asset=None, level=None):
+        """Écrit les événements retenus en Parquet, un groupe de lignes par morceau (nécessite pyarrow)."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Exporting the journal to Parquet requires pyarrow") from None
+        schema = pa.schema([
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("level", pa.string()),
+            ("asset", pa.string()),
+            ("message", pa.string()),
+        ])
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in self._rows(start, end, asset, level):
+                timestamps, levels, assets, messages = zip(*rows)
+                writer.write_table(pa.table([
+                    pa.array([round(t * 1e6) for t in timestamps], type=schema.field("timestamp").type),
+                    pa.array(levels, type=pa.string()),
+                    pa.array(assets, type=pa.string()),
+                    pa.array(messages, type=pa.string()),
+                ], schema=schema))
+                count += len(rows)
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or export the PIONIER event journal.")
+    parser.add_argument("journal", help="SQLite journal file")
+    parser.add_argument("--start", help="first timestamp (Unix seconds or ISO 8601), inclusive")
+    parser.add_argument("--end", help="last timestamp (Unix seconds or ISO 8601), exclusive")
+    parser.add_argument("--asset")
+    parser.add_argument("--level")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--output", help="output file (CSV goes to stdout by default)")
+    args = parser.parse_args(argv)
+
+    journal = EventJournal(args.journal)
+    try:
+        filters = dict(start=args.start, end=args.end, asset=args.asset, level=args.level)
+        if args.format == "parquet":
+            if not args.output:
+                parser.error("--format parquet requires --output")
+            count = journal.export_parquet(args.output, **filters)
+        else:
+            count = journal.export_csv(args.output or sys.stdout, **filters)
+    finally:
+        journal.close()
+    print(f"{count} events exported", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Instrumentation du cockpit : compteurs, jauges et histogrammes en mémoire,
+exportés au format texte Prometheus dans un fichier ou sur un point HTTP local.
+
+Les histogrammes gardent des seaux cumulés (comme Prometheus), ce qui permet
+d'estimer les quantiles sans conserver les mesures individuelles.
+"""
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seaux par défaut des durées, en secondes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Description des métriques connues : nom -> (type, aide)
+METRIC_HELP = {
+    "pionier_tick_phase_seconds": ("histogram", "Duration of each phase of a simulation tick."),
+    "pionier_tick_lag_seconds": ("histogram", "Delay between the scheduled and the actual start of a tick."),
+    "pionier_render_seconds": ("histogram", "Duration of each dashboard panel render."),
+    "pionier_refresh_lag_seconds": ("histogram", "Delay of a dashboard panel refresh beyond the requested interval."),
+    "pionier_snapshot_seconds": ("histogram", "Duration of a binary fleet snapshot write."),
+    "pionier_journal_batch_seconds": ("histogram", "Duration of an event journal batch write."),
+    "pionier_ticks_total": ("counter", "Simulation ticks executed."),
+    "pionier_events_total": ("counter", "Events sent to the event log, by level."),
+    "pionier_telemetry_readings_total": ("counter", "Telemetry readings applied to the fleet."),
+    "pionier_telemetry_invalid_total": ("counter", "Invalid telemetry rows skipped by the source reader."),
+    "pionier_journal_events_total": ("counter", "Events written to the durable event journal."),
+    "pionier_assets": ("gauge", "Assets in the fleet."),
+    "pionier_evaluated_assets": ("gauge", "Assets whose prediction and status were re-evaluated by the last tick."),
+    "pionier_alerts": ("gauge", "Assets in an at-risk status band."),
+    "pionier_anomalies": ("gauge", "Assets with an abnormal temperature or vibration signal."),
+    "pionier_planned_jobs": ("gauge", "Maintenance jobs in the current plan."),
+}
+
+
+class Histogram:
+    """Histogramme à seaux cumulés (bornes supérieures incluses)."""
+    __slots__ = ("buckets", "counts", "sum", "count", "last")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Le dernier seau est +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.last = math.nan
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.last = value
+
+    def quantile(self, q):
+        """Estime un quantile par interpolation linéaire dans le seau concerné (comme histogram_quantile)."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if cumulative + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques partagé par le service et le tableau de bord.
+    Chaque série est identifiée par son nom et ses étiquettes (mots-clés).
+    """
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    # --- Enregistrement ---
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mesure la durée du bloc `with` dans l'histogramme `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # --- Lecture ---
+    def histograms(self):
+        """Liste de (nom, étiquettes, count, moyenne, p50, p95, dernière valeur), triée par nom."""
+        with self._lock:
+            rows = [
+                (name, dict(labels), h.count, h.sum / h.count if h.count else math.nan,
+                 h.quantile(0.5), h.quantile(0.95), h.last)
+                for (name, labels), h in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: (row[0], sorted(row[1].items())))
+
+    def values(self):
+        """Compteurs et jauges : liste de (nom, étiquettes, valeur), triée par nom."""
+        with self._lock:
+            items = list(self._counters.items()) + list(self._gauges.items())
+        return sorted(((name, dict(labels), value) for (name, labels), value in items),
+                      key=lambda row: (row[0], sorted(row[1].items())))
+
+    # --- Export Prometheus ---
+    def render(self):
+        """Retourne toutes les séries au format texte Prometheus 0.0.4."""
+        with self._lock:
+            families = {}
+            for (name, labels), value in list(self._counters.items()) + list(self._gauges.items()):
+                families.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+            for (name, labels), h in self._histograms.items():
+                lines = families.setdefault(name, [])
+                cumulative = 0
+                for bound, n in zip([_number(b) for b in h.buckets] + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(h.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {h.count}")
+        output = []
+        for name in sorted(families):
+            kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(sorted(families[name]) if kind != "histogram" else families[name])
+        return "\n".join(output) + "\n"
+
+    def write_textfile(self, path):
+        """Écrit l'export dans `path` de façon atomique (collecteur textfile de node_exporter)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w") as handle:
+                handle.write(self.render())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def serve(self, port, host="127.0.0.1"):
+        """Sert l'export sur http://host:port/metrics dans un thread dédié ; retourne le serveur."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Pas de journal par requête
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="pionier-metrics", daemon=True).start()
+        return server
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
@@ -0,0 +1,307 @@
+"""
+Planification de la maintenance sous contrainte d'équipes.
+
+Chaque équipement dont la panne est prévue dans l'horizon devient une
+intervention candidate : une durée, un coût de panne, et une date de panne
+supposée normale, centrée sur la prédiction, d'écart-type déduit de
+l'intervalle de confiance. Une intervention terminée à l'heure f évite la
+panne avec la probabilité 1 - P(panne avant f).
+
+Le premier plan est construit par un glouton « échéance la plus proche
+d'abord » (files de priorité des équipes libres et des échéances), puis
+amélioré par recherche locale (insertion, échange, déplacement entre
+équipes) dans un budget de temps. Aux cycles suivants, le plan précédent sert
+de point de départ : les interventions en cours sont figées, les nouvelles
+candidates sont insérées et la recherche locale reprend où elle s'était
+arrêtée.
+"""
+import heapq
+import math
+import time
+
+import numpy as np
+
+from .fleet import WARNING_HOURS
+from .prediction import Z_SCORE
+
+PLANNED_COST_RATIO = 0.1  # Une maintenance planifiée coûte 10% de la panne
+MAINTENANCE_HOURS = 8  # Durée d'une intervention par défaut
+MIN_SIGMA = 0.5  # Incertitude minimale sur la date de panne, en heures
+_EPSILON = 1e-6
+
+
+def failure_probability(finish, deadline, sigma):
+    """Probabilité que la panne (loi normale de moyenne `deadline`) survienne avant `finish`."""
+    return 0.5 * (1.0 + math.erf((finish - deadline) / (sigma * math.sqrt(2.0))))
+
+
+class ScheduledJob:
+    """Intervention planifiée : équipe, début et fin (heures simulées), risque et gain attendus."""
+    __slots__ = ("key", "crew", "start", "finish", "failure_probability", "saving")
+
+    def __init__(self, key, crew, start, finish, failure_probability, saving):
+        self.key = key
+        self.crew = crew
+        self.start = start
+        self.finish = finish
+        self.failure_probability = failure_probability
+        self.saving = saving
+
+
+class MaintenancePlan:
+    """Plan de maintenance publié : interventions par date de début et bilan attendu."""
+    __slots__ = ("clock", "jobs", "unscheduled", "expected_savings", "unconstrained_savings")
+
+    def __init__(self, clock, jobs, unscheduled, expected_savings, unconstrained_savings):
+        self.clock = clock
+        self.jobs = jobs
+        self.unscheduled = unscheduled  # Clés des candidates non planifiées, par coût décroissant
+        self.expected_savings = expected_savings
+        self.unconstrained_savings = unconstrained_savings  # Gain si toutes les candidates étaient traitées à temps
+
+
+class MaintenancePlanner:
+    """
+    Planificateur incrémental : `update(fleet)` retourne un MaintenancePlan
+    pour l'état courant de la flotte, en repartant du plan précédent.
+    `durations` donne la durée d'intervention par clé d'équipement
+    (MAINTENANCE_HOURS par défaut).
+    """
+    def __init__(self, crews=2, horizon=WARNING_HOURS, durations=None, time_budget=0.2):
+        self.crews = crews
+        self.horizon = horizon
+        self.durations = {} if durations is None else dict(durations)
+        self.time_budget = time_budget
+        self.plan = None
+        self.elapsed = 0.0  # Durée du dernier calcul, en secondes
+        self._timeline = None  # Par équipe : ScheduledJob du plan précédent
+        self._jobs = {}
+        self._free_at = []
+        self._sequences = []
+        self._pending = set()
+
+    def update(self, fleet):
+        """Replanifie à partir de l'état courant de la flotte."""
+        started = time.perf_counter()
+        clock = fleet.clock
+        self._jobs = self._candidates(fleet)
+        in_progress, warm = self._carry_over(clock)
+        for job in in_progress:
+            if job is not None:
+                self._jobs.pop(job.key, None)
+
+        if warm is None:
+            self._greedy()
+        else:
+            self._sequences = [[key for key in sequence if key in self._jobs] for sequence in warm]
+            scheduled = {key for sequence in self._sequences for key in sequence}
+            self._pending = set(self._jobs) - scheduled
+            for crew in range(self.crews):
+                self._cleanup(crew)
+        self._local_search(started + self.time_budget)
+
+        self.plan = self._build(clock, in_progress)
+        self.elapsed = time.perf_counter() - started
+        return self.plan
+
+    # --- Données ---
+    def _candidates(self, fleet):
+        """Interventions candidates : clé -> (échéance, écart-type, coût, durée)."""
+        rows = np.flatnonzero(fleet.ttf_lower <= self.horizon)
+        ttf = fleet.time_to_failure_hours[rows]
+        sigma = np.maximum(np.nan_to_num(fleet.ttf_upper[rows] - ttf) / Z_SCORE, MIN_SIGMA)
+        deadline = fleet.clock + ttf
+        keys = fleet.keys
+        return {
+            keys[row]: (d, s, c, self.durations.get(keys[row], MAINTENANCE_HOURS))
+            for row, d, s, c in zip(rows.tolist(), deadline.tolist(), sigma.tolist(),
+                                    fleet.cost_of_failure[rows].tolist())
+        }
+
+    def _carry_over(self, clock):
+        """
+        Reprend le plan précédent : retourne l'intervention en cours de chaque
+        équipe (ou None) et les séquences restantes (None s'il faut repartir de zéro).
+        """
+        self._free_at = [clock] * self.crews
+        in_progress = [None] * self.crews
+        if self._timeline is None or len(self._timeline) != self.crews:
+            return in_progress, None
+        warm = []
+        for crew, timeline in enumerate(self._timeline):
+            keep = []
+            for job in timeline:
+                if job.finish <= clock:
+                    continue
+                if job.start <= clock:
+                    in_progress[crew] = job
+                    self._free_at[crew] = job.finish
+                else:
+                    keep.append(job.key)
+            warm.append(keep)
+        return in_progress, warm
+
+    # --- Évaluation ---
+    def _value(self, key, finish):
+        """Gain attendu d'une intervention terminée à `finish` (négatif si trop tardive)."""
+        deadline, sigma, cost, _ = self._jobs[key]
+        return cost * (1.0 - PLANNED_COST_RATIO - failure_probability(finish, deadline, sigma))
+
+    def _values(self, crew, sequence):
+        t = self._free_at[crew]
+        values = []
+        for key in sequence:
+            t += self._jobs[key][3]
+            values.append(self._value(key, t))
+        return values
+
+    def _total(self, crew, sequence):
+        return sum(self._values(crew, sequence))
+
+    def _pruned(self, crew, sequence):
+        """Retire d'une séquence les interventions sans gain ; retourne (séquence, retirées)."""
+        sequence = list(sequence)
+        removed = []
+        while sequence:
+            values = self._values(crew, sequence)
+            worst = min(range(len(values)), key=values.__getitem__)
+            if values[worst] > 0:
+                break
+            removed.append(sequence.pop(worst))
+        return sequence, removed
+
+    def _cleanup(self, crew):
+        self._sequences[crew], removed = self._pruned(crew, self._sequences[crew])
+        self._pending.update(removed)
+
+    def _position(self, sequence, key):
+        """Position d'insertion par ordre d'échéance au plus tard."""
+        latest = self._jobs[key][0] - self._jobs[key][3]
+        for i, other in enumerate(sequence):
+            if latest < self._jobs[other][0] - self._jobs[other][3]:
+                return i
+        return len(sequence)
+
+    # --- Construction gloutonne ---
+    def _greedy(self):
+        """Affecte les interventions par échéance croissante à l'équipe libérée la plus tôt."""
+        self._sequences = [[] for _ in range(self.crews)]
+        self._pending = set()
+        crews = [(free_at, crew) for crew, free_at in enumerate(self._free_at)]
+        heapq.heapify(crews)
+        jobs = [(deadline - duration, -cost, key) for key, (deadline, _, cost, duration) in self._jobs.items()]
+        heapq.heapify(jobs)
+        while jobs:
+            _, _, key = heapq.heappop(jobs)
+            free_at, crew = crews[0]
+            finish = free_at + self._jobs[key][3]
+            if self._value(key, finish) <= 0:
+                self._pending.add(key)  # Trop tard pour la première équipe libre : trop tard pour toutes
+                continue
+            self._sequences[crew].append(key)
+            heapq.heapreplace(crews, (finish, crew))
+
+    # --- Recherche locale ---
+    def _local_search(self, deadline):
+        """Applique les mouvements améliorants jusqu'à stabilité ou épuisement du budget."""
+        while time.perf_counter() < deadline:
+            improved = self._insert_pending(deadline)
+            improved |= self._swap_adjacent(deadline)
+            improved |= self._relocate(deadline)
+            if not improved:
+                break
+
+    def _insert_pending(self, deadline):
+        """Insère les candidates en attente (par coût décroissant) là où le gain est maximal."""
+        improved = False
+        earliest = min(self._free_at)
+        for key in sorted(self._pending, key=lambda key: -self._jobs[key][2]):
+            if time.perf_counter() >= deadline:
+                break
+            if self._value(key, earliest + self._jobs[key][3]) <= 0:
+                continue
+            best = None
+            for crew, sequence in enumerate(self._sequences):
+                candidate = list(sequence)
+                candidate.insert(self._position(sequence, key), key)
+                candidate, removed = self._pruned(crew, candidate)
+                gain = self._total(crew, candidate) - self._total(crew, sequence)
+                if key in candidate and gain > _EPSILON and (best is None or gain > best[0]):
+                    best = (gain, crew, candidate, removed)
+            if best is not None:
+                _, crew, candidate, removed = best
+                self._sequences[crew] = candidate
+                self._pending.discard(key)
+                self._pending.update(removed)
+                improved = True
+        return improved
+
+    def _swap_adjacent(self, deadline):
+        """Échange deux interventions consécutives d'une même équipe."""
+        improved = False
+        for crew, sequence in enumerate(self._sequences):
+            current = self._total(crew, sequence)
+            for i in range(len(sequence) - 1):
+                if time.perf_counter() >= deadline:
+                    return improved
+                sequence[i], sequence[i + 1] = sequence[i + 1], sequence[i]
+                total = self._total(crew, sequence)
+                if total > current + _EPSILON:
+                    current = total
+                    improved = True
+                else:
+                    sequence[i], sequence[i + 1] = sequence[i + 1], sequence[i]
+        return improved
+
+    def _relocate(self, deadline):
+        """Déplace une intervention vers une autre équipe quand le total y gagne."""
+        improved = False
+        for source in range(self.crews):
+            i = 0
+            while i < len(self._sequences[source]):
+                if time.perf_counter() >= deadline:
+                    return improved
+                sequence = self._sequences[source]
+                key = sequence[i]
+                shortened = sequence[:i] + sequence[i + 1:]
+                before = self._total(source, sequence)
+                after = self._total(source, shortened)
+                moved = False
+                for target in range(self.crews):
+                    if target == source:
+                        continue
+                    other = self._sequences[target]
+                    candidate = list(other)
+                    candidate.insert(self._position(other, key), key)
+                    candidate, removed = self._pruned(target, candidate)
+                    gain = after + self._total(target, candidate) - before - self._total(target, other)
+                    if key in candidate and gain > _EPSILON:
+                        self._sequences[source] = shortened
+                        self._sequences[target] = candidate
+                        self._pending.update(removed)
+                        moved = improved = True
+                        break
+                if not moved:
+                    i += 1
+        return improved
+
+    # --- Résultat ---
+    def _build(self, clock, in_progress):
+        timeline = []
+        for crew, sequence in enumerate(self._sequences):
+            jobs = [] if in_progress[crew] is None else [in_progress[crew]]
+            t = self._free_at[crew]
+            for key in sequence:
+                deadline, sigma, cost, duration = self._jobs[key]
+                probability = failure_probability(t + duration, deadline, sigma)
+                jobs.append(ScheduledJob(key, crew, t, t + duration, probability,
+                                         cost * (1.0 - PLANNED_COST_RATIO - probability)))
+                t += duration
+            timeline.append(jobs)
+        self._timeline = timeline
+
+        jobs = sorted((job for crew_jobs in timeline for job in crew_jobs), key=lambda job: job.start)
+        unscheduled = sorted(self._pending, key=lambda key: -self._jobs[key][2])
+        unconstrained = sum(cost for _, _, cost, _ in self._jobs.values()) * (1.0 - PLANNED_COST_RATIO)
+        unconstrained += sum(job.saving for job in in_progress if job is not None)
+        return MaintenancePlan(clock, jobs, unscheduled, sum(job.saving for job in jobs), unconstrained)
@@ -0,0 +1,62 @@
+"""
+Estimation en ligne de la pente de dégradation et de la durée de vie
+résiduelle (RUL), vectorisée sur toute la flotte.
+
+Chaque équipement suit un lissage exponentiel double (Holt) de sa santé :
+un niveau, une pente, et les variances exponentielles des résidus et de la
+pente. Une mise à jour coûte O(1) par échantillon, sans jamais relire
+l'historique. La RUL est le temps pour que le niveau atteigne 0 à la pente
+estimée, avec un intervalle de confiance obtenu par la méthode delta.
+"""
+import numpy as np
+
+# Paramètres de lissage par défaut
+ALPHA = 0.5  # Poids d'une nouvelle observation dans le niveau
+BETA = 0.1  # Poids d'une nouvelle pente observée dans la pente lissée
+GAMMA = 0.1  # Poids d'un nouveau résidu dans les variances
+Z_SCORE = 1.645  # Intervalle de confiance bilatéral à 90 %
+SLOPE_PRIOR = 0.1  # Incertitude initiale sur la pente, relative à sa valeur
+MIN_SLOPE = 1e-9  # En deçà, l'équipement est considéré stable (pas de panne prévue)
+
+
+def holt_update(level, slope, residual_var, slope_var, samples, observed, dt=1.0,
+                alpha=ALPHA, beta=BETA, gamma=GAMMA):
+    """
+    Met à jour l'état des estimateurs avec une observation par ligne,
+    `dt` heures après la précédente. Retourne le nouvel état
+    (level, slope, residual_var, slope_var, samples).
+    """
+    dt = np.maximum(dt, 1e-9)
+    first = samples == 0
+    second = samples == 1
+
+    predicted = level + slope * dt
+    error = observed - predicted
+    new_level = alpha * observed + (1 - alpha) * predicted
+    observed_slope = (new_level - level) / dt
+    new_slope = beta * observed_slope + (1 - beta) * slope
+    new_residual_var = (1 - gamma) * residual_var + gamma * error ** 2
+    new_slope_var = (1 - gamma) * slope_var + gamma * (observed_slope - slope) ** 2
+
+    # Démarrage : la première observation fixe le niveau, la deuxième la pente
+    first_slope = (observed - level) / dt
+    new_level = np.where(first | second, observed, new_level)
+    new_slope = np.where(first, 0.0, np.where(second, first_slope, new_slope))
+    new_residual_var = np.where(first | second, 0.0, new_residual_var)
+    new_slope_var = np.where(first, 0.0, np.where(second, (SLOPE_PRIOR * first_slope) ** 2, new_slope_var))
+    return new_level, new_slope, new_residual_var, new_slope_var, samples + 1
+
+
+def remaining_useful_life(level, slope, residual_var, slope_var, samples, z=Z_SCORE):
+    """
+    Retourne (rul, borne basse, borne haute) en heures ; NaN quand aucune
+    panne n'est prévisible (moins de deux échantillons ou santé stable).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        degrading = (samples >= 2) & (slope < -MIN_SLOPE)
+        rate = np.where(degrading, -slope, np.nan)
+        health = np.maximum(level, 0.0)
+        rul = health / rate
+        # Méthode delta : var(L/r) ≈ var(L)/r² + L² var(r)/r⁴
+        spread = z * np.sqrt(residual_var / rate ** 2 + health ** 2 * slope_var / rate ** 4)
+    return rul, np.maximum(rul - spread, 0.0), rul + spread
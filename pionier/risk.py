@@ -0,0 +1,131 @@
+import heapq
+
+import numpy as np
+
+# Écart toléré sur la clé d'un équipement avant de le réindexer (en heures)
+KEY_TOLERANCE = 1e-6
+
+
+class RiskIndex:
+    """
+    Index de priorité des équipements par date de panne prédite.
+
+    La clé d'un équipement est l'heure simulée de sa panne au plus tôt
+    (horloge de la flotte + borne basse des heures restantes, celle qui
+    fixe les bandes de statut) : elle ne bouge pas tant que
+    l'équipement se dégrade au même rythme, si bien qu'un tick ne réindexe
+    que les équipements dont la prédiction a réellement changé.
+    Le tas est invalidé paresseusement (numéro de version par ligne) et les
+    statuts sont regroupés par bandes pour les requêtes par statut.
+    """
+    def __init__(self, n_statuses, at_risk_statuses, capacity=0):
+        self._heap = []
+        self._keys = np.full(capacity, np.nan)
+        self._versions = np.zeros(capacity, dtype=np.int64)
+        self._live = 0
+        self.counts = np.zeros(n_statuses, dtype=np.int64)
+        self.costs = np.zeros(n_statuses, dtype=np.float64)
+        # Ensembles de lignes, seulement pour les statuts à risque (peu nombreux)
+        self.buckets = {status: set() for status in at_risk_statuses}
+
+    def resize(self, capacity):
+        """Agrandit les tableaux par ligne pour contenir `capacity` lignes."""
+        if capacity > len(self._keys):
+            keys = np.full(capacity, np.nan)
+            keys[:len(self._keys)] = self._keys
+            versions = np.zeros(capacity, dtype=np.int64)
+            versions[:len(self._versions)] = self._versions
+            self._keys, self._versions = keys, versions
+
+    def copy(self):
+        other = RiskIndex(0, ())
+        other._heap = list(self._heap)
+        other._keys = self._keys.copy()
+        other._versions = self._versions.copy()
+        other._live = self._live
+        other.counts = self.counts.copy()
+        other.costs = self.costs.copy()
+        other.buckets = {status: set(rows) for status, rows in self.buckets.items()}
+        return other
+
+    # --- Mises à jour ---
+    def add_rows(self, rows, statuses, costs):
+        """Enregistre de nouvelles lignes avec leur statut initial."""
+        np.add.at(self.counts, statuses, 1)
+        np.add.at(self.costs, statuses, costs)
+        for status in self.buckets:
+            self.buckets[status].update(rows[statuses == status].tolist())
+
+    def update_keys(self, rows, keys):
+        """
+        Met à jour les clés (NaN = pas de prédiction) ; seules les clés modifiées
+        sont réinsérées. Retourne (lignes, clés) de ces seules modifications.
+        """
+        old = self._keys[rows]
+        same = (np.abs(keys - old) <= KEY_TOLERANCE) | (np.isnan(keys) & np.isnan(old))
+        if same.all():
+            return rows[:0], keys[:0]
+        changed = ~same
+        rows, keys, old = rows[changed], keys[changed], old[changed]
+        self._keys[rows] = keys
+        self._versions[rows] += 1
+        self._live += int(np.count_nonzero(~np.isnan(keys)) - np.count_nonzero(~np.isnan(old)))
+
+        valid = ~np.isnan(keys)
+        entries = list(zip(keys[valid].tolist(), rows[valid].tolist(), self._versions[rows[valid]].tolist()))
+        if len(self._heap) > 2 * self._live + 64:
+            self._rebuild()
+        elif len(entries) > len(self._heap) // 4:
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        return rows, keys
+
+    def _rebuild(self):
+        """Reconstruit le tas sans ses entrées périmées."""
+        rows = np.flatnonzero(~np.isnan(self._keys))
+        self._heap = list(zip(self._keys[rows].tolist(), rows.tolist(), self._versions[rows].tolist()))
+        heapq.heapify(self._heap)
+
+    def update_statuses(self, rows, old_statuses, new_statuses, costs):
+        """Déplace les lignes dont le statut a changé d'une bande à l'autre."""
+        np.add.at(self.counts, old_statuses, -1)
+        np.add.at(self.counts, new_statuses, 1)
+        np.add.at(self.costs, old_statuses, -costs)
+        np.add.at(self.costs, new_statuses, costs)
+        for row, old, new in zip(rows.tolist(), old_statuses.tolist(), new_statuses.tolist()):
+            if old in self.buckets:
+                self.buckets[old].discard(row)
+            if new in self.buckets:
+                self.buckets[new].add(row)
+
+    # --- Requêtes ---
+    def top(self, k, clock, within_hours=None):
+        """
+        Retourne au plus `k` lignes, de la panne la plus proche à la plus
+        lointaine, limitées à celles prévues dans moins de `within_hours`.
+        Le tas est parcouru dans l'ordre sans être modifié : O(k log k)
+        hors entrées périmées.
+        """
+        heap = self._heap
+        rows = []
+        if not heap or k <= 0:
+            return rows
+        frontier = [(heap[0][0], 0)]
+        while frontier and len(rows) < k:
+            key, i = heapq.heappop(frontier)
+            if within_hours is not None and key - clock >= within_hours:
+                break
+            _, row, version = heap[i]
+            if version == self._versions[row]:
+                rows.append(row)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child][0], child))
+        return rows
+
+    def rows_with_status(self, status):
+        """Retourne les lignes d'une bande de statut à risque."""
+        return list(self.buckets[status])
@@ -0,0 +1,206 @@
+"""
+Simulation accélérée et Monte-Carlo des politiques de maintenance.
+
+Chaque scénario fait tourner le modèle de dégradation / prédiction / alerte
+de FleetState heure par heure, aussi vite que possible et sans tableau de
+bord, pour une politique (seuil de déclenchement de la maintenance sur le
+temps avant panne prédit) et une graine aléatoire. Les scénarios sont
+répartis sur un pool de processus ; toutes les politiques voient les mêmes
+tirages aléatoires pour une même graine, ce qui rend les comparaisons
+appariées et reproductibles.
+
+Exemple :
+    python -m pionier.scenarios --policies 24 72 --seeds 8 --assets 1000 --hours 8760
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .fleet import FleetState
+from .planning import MAINTENANCE_HOURS, PLANNED_COST_RATIO
+
+REACTIVE = "reactive"
+
+# Hypothèses du modèle économique (coût d'une maintenance planifiée : voir planning.py)
+PLANNED_DOWNTIME_HOURS = MAINTENANCE_HOURS
+FAILURE_DOWNTIME_HOURS = 72
+
+
+class ScenarioConfig:
+    """Paramètres d'une famille de scénarios (identiques pour toutes les politiques)."""
+    def __init__(self, assets=1000, hours=8760, rate_drift=0.2, max_lead_hours=48,
+                 planned_downtime=PLANNED_DOWNTIME_HOURS, failure_downtime=FAILURE_DOWNTIME_HOURS):
+        self.assets = assets
+        self.hours = hours
+        self.rate_drift = rate_drift  # Écart-type (log) de la variation horaire du taux de dégradation
+        self.max_lead_hours = max_lead_hours  # Délai maximal entre le déclenchement et l'intervention
+        self.planned_downtime = planned_downtime
+        self.failure_downtime = failure_downtime
+
+
+def _draw_rates(rng, count):
+    return rng.lognormal(np.log(0.1), 0.4, count)
+
+
+def run_scenario(policy, seed, config):
+    """
+    Simule une politique sur `config.hours` heures pour une graine donnée.
+    `policy` est REACTIVE (aucune maintenance préventive) ou un seuil en heures :
+    la maintenance est demandée dès que la borne basse du temps avant panne
+    passe sous ce seuil, puis réalisée après un délai aléatoire.
+    """
+    rng = np.random.default_rng(seed)
+    n = config.assets
+    # Taux variables d'heure en heure et seuils de politique arbitraires : tout est réévalué à chaque tick
+    fleet = FleetState(capacity=n, index_risk=False, shutdown_on_imminent=False, adaptive_ticks=False)
+    fleet.add_assets(
+        range(n), [""] * n, [""] * n,
+        initial_health=rng.uniform(30, 100, n),
+        degradation_rate=0.0,
+        cost_of_failure=np.round(rng.lognormal(np.log(150000), 0.6, n), -3),
+    )
+    base_rate = _draw_rates(rng, n)
+    cost_of_failure = fleet.cost_of_failure.copy()
+    trigger = None if policy == REACTIVE else float(policy)
+
+    running = np.ones(n, dtype=bool)
+    back_at = np.zeros(n)  # Heure de remise en service des équipements arrêtés
+    planned_at = np.full(n, np.inf)  # Heure de la maintenance demandée
+    totals = dict(failures=0, maintenances=0, failure_cost=0.0, maintenance_cost=0.0, downtime_hours=0.0)
+
+    for hour in range(config.hours):
+        # Tirages de l'heure : même consommation quelle que soit la politique
+        drift = rng.lognormal(0.0, config.rate_drift, n)
+        lead = rng.integers(0, config.max_lead_hours + 1, n)
+        new_health = rng.uniform(92, 100, n)
+        new_rate = _draw_rates(rng, n)
+
+        fleet.degradation_rate[:] = np.where(running, base_rate * drift, 0.0)
+        fleet.tick(now=hour * 3600.0)
+
+        # Pannes : la santé a atteint 0 avant toute intervention
+        failed = running & (fleet.health <= 0)
+        if failed.any():
+            totals["failures"] += int(failed.sum())
+            totals["failure_cost"] += float(cost_of_failure[failed].sum())
+            running[failed] = False
+            back_at[failed] = hour + config.failure_downtime
+            planned_at[failed] = np.inf
+
+        if trigger is not None:
+            # Déclenchement sur la borne basse de la prédiction, puis intervention après le délai
+            requested = running & np.isinf(planned_at) & (fleet.ttf_lower <= trigger)
+            planned_at[requested] = hour + lead[requested]
+            due = running & (planned_at <= hour)
+            if due.any():
+                totals["maintenances"] += int(due.sum())
+                totals["maintenance_cost"] += float(cost_of_failure[due].sum() * PLANNED_COST_RATIO)
+                running[due] = False
+                back_at[due] = hour + config.planned_downtime
+                planned_at[due] = np.inf
+
+        # Remise en service après réparation ou maintenance
+        restored = ~running & (back_at <= hour)
+        if restored.any():
+            rows = np.flatnonzero(restored)
+            base_rate[rows] = new_rate[rows]
+            fleet.restore(rows, new_health[rows], 0.0)
+            running[rows] = True
+        totals["downtime_hours"] += float(n - running.sum())
+
+    totals["total_cost"] = totals["failure_cost"] + totals["maintenance_cost"]
+    return policy, seed, totals
+
+
+def run_sweep(policies, seeds, config, workers=None):
+    """
+    Exécute toutes les combinaisons (politique, graine) sur un pool de processus.
+    La politique réactive est toujours incluse comme référence.
+    Retourne {politique: {graine: totaux}}.
+    """
+    policies = [REACTIVE] + [p for p in policies if p != REACTIVE]
+    results = {policy: {} for policy in policies}
+    tasks = [(policy, seed) for seed in seeds for policy in policies]
+    if workers == 1:
+        outcomes = (run_scenario(policy, seed, config) for policy, seed in tasks)
+        for policy, seed, totals in outcomes:
+            results[policy][seed] = totals
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_scenario, policy, seed, config) for policy, seed in tasks]
+        for future in futures:
+            policy, seed, totals = future.result()
+            results[policy][seed] = totals
+    return results
+
+
+def summarize(results):
+    """
+    Agrège les résultats par politique : moyennes sur les graines et écarts
+    appariés avec la politique réactive (coût et arrêt évités).
+    """
+    baseline = results[REACTIVE]
+    summary = {}
+    for policy, by_seed in results.items():
+        seeds = sorted(by_seed)
+        def mean(key):
+            return float(np.mean([by_seed[s][key] for s in seeds]))
+        avoided_cost = [baseline[s]["total_cost"] - by_seed[s]["total_cost"] for s in seeds]
+        avoided_downtime = [baseline[s]["downtime_hours"] - by_seed[s]["downtime_hours"] for s in seeds]
+        summary[policy] = {
+            "failures": mean("failures"),
+            "maintenances": mean("maintenances"),
+            "total_cost": mean("total_cost"),
+            "downtime_hours": mean("downtime_hours"),
+            "avoided_cost": float(np.mean(avoided_cost)),
+            "avoided_cost_std": float(np.std(avoided_cost)),
+            "avoided_downtime_hours": float(np.mean(avoided_downtime)),
+        }
+    return summary
+
+
+def format_summary(summary):
+    lines = [
+        f"{'Policy':>10} {'Failures':>10} {'Maint.':>10} {'Total cost':>16} {'Downtime h':>12} "
+        f"{'Avoided cost':>16} {'± std':>12} {'Avoided h':>12}"
+    ]
+    for policy, row in summary.items():
+        label = policy if policy == REACTIVE else f"{policy} h"
+        lines.append(
+            f"{label:>10} {row['failures']:>10.1f} {row['maintenances']:>10.1f} "
+            f"{row['total_cost']:>16,.0f} {row['downtime_hours']:>12,.0f} "
+            f"{row['avoided_cost']:>16,.0f} {row['avoided_cost_std']:>12,.0f} {row['avoided_downtime_hours']:>12,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare maintenance policies over simulated fleet-years.")
+    parser.add_argument("--policies", nargs="+", default=["24", "72"],
+                        help="maintenance triggers in hours before predicted failure (the reactive baseline is always included)")
+    parser.add_argument("--seeds", type=int, default=4, help="number of random seeds per policy")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--assets", type=int, default=1000, help="fleet size")
+    parser.add_argument("--hours", type=int, default=8760, help="simulated hours per scenario")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    config = ScenarioConfig(assets=args.assets, hours=args.hours)
+    seeds = range(args.seed, args.seed + args.seeds)
+    started = time.perf_counter()
+    results = run_sweep(args.policies, seeds, config, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    asset_hours = len(results) * args.seeds * args.assets * args.hours
+    print(format_summary(summarize(results)))
+    print(f"\n{asset_hours:,} asset-hours in {elapsed:.1f} s "
+          f"({asset_hours / elapsed:,.0f} asset-hours/s, {args.workers or os.cpu_count()} workers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
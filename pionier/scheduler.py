@@ -0,0 +1,111 @@
+import numpy as np
+
+# Intervalle maximal entre deux évaluations d'un équipement (en heures simulées)
+MAX_DELAY_HOURS = 24
+# Part de la marge jusqu'au prochain seuil attendue avant de réévaluer :
+# la prédiction peut se raccourcir quand l'estimateur apprend une pente plus forte.
+SAFETY_FACTOR = 0.5
+
+
+class TickScheduler:
+    """
+    Échéancier des évaluations de la flotte : roue temporelle d'une case
+    par heure simulée.
+
+    Chaque équipement est réévalué avant que la borne basse de sa prédiction
+    puisse franchir le prochain seuil de statut : à chaque tick près des
+    seuils et en panne imminente, au plus toutes les `max_delay` heures loin
+    de toute panne. Une case garde ses lignes par lots de tableaux ; une
+    ligne reprogrammée laisse une entrée périmée, écartée au dépilage par
+    comparaison avec son échéance courante.
+    """
+    def __init__(self, thresholds, capacity=0, max_delay=MAX_DELAY_HOURS):
+        self.thresholds = np.sort(np.asarray(thresholds, dtype=np.float64))
+        self.max_delay = max_delay
+        self.hour = 0  # Dernière heure dépilée
+        self._due = np.full(capacity, -1, dtype=np.int64)  # Heure de la prochaine évaluation (-1 = aucune)
+        self._slots = [[] for _ in range(max_delay + 1)]
+
+    def resize(self, capacity):
+        """Agrandit les tableaux par ligne pour contenir `capacity` lignes."""
+        if capacity > len(self._due):
+            due = np.full(capacity, -1, dtype=np.int64)
+            due[:len(self._due)] = self._due
+            self._due = due
+
+    def copy(self):
+        other = TickScheduler((), 0, self.max_delay)
+        other.thresholds = self.thresholds
+        other.hour = self.hour
+        other._due = self._due.copy()
+        # Les lots ne sont jamais modifiés en place : copier les listes suffit
+        other._slots = [list(slot) for slot in self._slots]
+        return other
+
+    # --- Programmation ---
+    def schedule(self, rows, delays):
+        """Programme l'évaluation des lignes dans `delays` heures (entre 1 et max_delay)."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        if not len(rows):
+            return
+        due = self.hour + np.clip(np.asarray(delays, dtype=np.int64), 1, self.max_delay)
+        self._due[rows] = due
+        if np.ndim(due) == 0:
+            self._slots[int(due) % len(self._slots)].append(rows)
+            return
+        order = np.argsort(due, kind="stable")
+        due, rows = due[order], rows[order]
+        starts = np.flatnonzero(np.diff(due)) + 1
+        for hour, chunk in zip(due[np.r_[0, starts]].tolist(), np.split(rows, starts)):
+            self._slots[hour % len(self._slots)].append(chunk)
+
+    def wake(self, rows):
+        """Fait réévaluer les lignes au prochain tick, quelle que soit leur échéance."""
+        self.schedule(rows, 1)
+
+    def reschedule(self, rows, ttf_lower):
+        """Reprogramme des lignes qui viennent d'être évaluées, d'après la borne basse de leur prédiction."""
+        self.schedule(rows, self.delays(rows, ttf_lower))
+
+    def delays(self, rows, ttf_lower):
+        """
+        Heures avant la prochaine évaluation : une fraction de la marge jusqu'au
+        prochain seuil franchi en descendant, plafonnée par `max_delay`.
+        Le plafond varie d'une ligne à l'autre pour étaler les équipements sains
+        sur plusieurs ticks plutôt que de les réévaluer tous au même.
+        """
+        hours = np.floor(ttf_lower)
+        below = np.searchsorted(self.thresholds, hours, side="left") - 1  # Plus haut seuil sous la prédiction
+        with np.errstate(invalid="ignore"):
+            margin = np.where(below >= 0, hours - self.thresholds[np.maximum(below, 0)], 0.0)
+        ceiling = self.max_delay - np.asarray(rows) % max(self.max_delay // 2, 1)
+        # Pas de prédiction (NaN) : seul le plafond s'applique
+        delays = np.where(np.isnan(margin), ceiling, np.floor(margin * SAFETY_FACTOR))
+        return np.clip(delays, 1, ceiling).astype(np.int64)
+
+    # --- Dépilage ---
+    def pop_due(self, clock):
+        """Retire et retourne (triées) les lignes dues jusqu'à l'heure `clock` incluse."""
+        last, hour = self.hour, int(np.floor(clock))
+        if hour <= last:
+            return np.empty(0, dtype=np.intp)
+        chunks = []
+        for h in range(last + 1, min(hour, last + len(self._slots)) + 1):
+            slot = h % len(self._slots)
+            chunks.extend(self._slots[slot])
+            self._slots[slot] = []
+        self.hour = hour
+        if not chunks:
+            return np.empty(0, dtype=np.intp)
+        rows = np.concatenate(chunks)
+        due = self._due[rows]
+        rows = np.sort(rows[(due > last) & (due <= hour)])
+        if len(rows):
+            rows = rows[np.r_[True, rows[1:] != rows[:-1]]]  # Ligne programmée deux fois à la même heure
+        self._due[rows] = -1
+        return rows
+
+    @property
+    def pending(self):
+        """Nombre de lignes programmées."""
+        return int(np.count_nonzero(self._due >= 0))
@@ -0,0 +1,271 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .asset import COMMAND_TIMEOUT
+from .events import EventStore
+from .fleet import AT_RISK_STATUSES
+from .metrics import MetricsRegistry
+from .snapshots import save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'événements récents publiés dans chaque instantané
+SNAPSHOT_EVENTS = 100
+
+
+class FleetSnapshot:
+    """Instantané immuable de la flotte, publié après chaque tick ou commande."""
+    __slots__ = ("fleet", "events", "tick", "timestamp", "plan")
+
+    def __init__(self, fleet, events, tick, timestamp, plan=None):
+        self.fleet = fleet
+        self.events = events
+        self.tick = tick
+        self.timestamp = timestamp
+        self.plan = plan
+
+
+class SimulationService:
+    """
+    Service de simulation unique pour tout le processus.
+    Un thread dédié fait avancer la flotte à cadence fixe et exécute les
+    commandes (maintenance, panne simulée) entre deux ticks ; les sessions
+    ne font que lire le dernier instantané publié.
+    """
+    def __init__(self, fleet, tick_interval=3.0, event_capacity=1000, history=None, planner=None,
+                 metrics=None, metrics_file=None, snapshot_path=None, snapshot_interval=60.0,
+                 initial_events=(), journal=None):
+        self.fleet = fleet
+        self.history = history
+        self.planner = planner
+        self.metrics = MetricsRegistry() if metrics is None else metrics
+        self.metrics_file = metrics_file  # Export Prometheus réécrit après chaque tick
+        self.snapshot_path = snapshot_path  # Instantané binaire écrit toutes les `snapshot_interval` secondes
+        self.snapshot_interval = snapshot_interval
+        self._last_save = time.monotonic()
+        self._saver = None
+        self.tick_interval = tick_interval
+        self.events = EventStore(event_capacity)
+        self.events.extend(initial_events)  # Journal restauré d'un instantané
+        self.ticks = 0
+        self.telemetry = None
+        self.telemetry_batches_per_tick = None
+        self._telemetry_skipped = 0  # Lignes invalides déjà comptées dans les métriques
+        self._telemetry_failed = False
+        self._commands = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sinks = [self.events.append]
+        self.journal = journal  # Journal durable (EventJournal), écrit par lots hors du thread de simulation
+        if journal is not None:
+            if journal.metrics is None:
+                journal.metrics = self.metrics  # Durées d'écriture des lots dans le registre du service
+            self._sinks.append(journal.append)
+        fleet.on_event = self._dispatch_event
+        self.plan = None if planner is None else planner.update(fleet)
+        self._publish()
+
+    # --- Cycle de vie ---
+    def start(self):
+        """Démarre le thread de simulation (sans effet s'il tourne déjà)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="pionier-simulation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête le thread de simulation."""
+        self._stop.set()
+        self._commands.put(None)  # Réveille la boucle
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.snapshot_path:
+            if self._saver is not None:
+                self._saver.join(timeout)
+            self.save_snapshot()
+        if self.journal is not None and not self.journal.flush(timeout or COMMAND_TIMEOUT):
+            # Toujours borné : stop() tourne aussi dans un hook atexit
+            logger.warning("Event journal not flushed on stop; recent events may be missing.")
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- Lecture ---
+    def snapshot(self):
+        """Retourne le dernier instantané publié (lecture sans verrou)."""
+        return self._snapshot
+
+    # --- Commandes ---
+    def submit(self, command, *args):
+        """Envoie une commande au thread de simulation et retourne un Future."""
+        future = Future()
+        self._commands.put((future, command, args))
+        if not self.running:
+            # Sans thread, la commande est exécutée immédiatement
+            self._drain_commands()
+        return future
+
+    def perform_maintenance(self, key):
+        """Demande une maintenance sur l'équipement `key`."""
+        return self.submit(self.fleet.perform_maintenance, self.fleet.index[key])
+
+    def trigger_catastrophic_failure(self, key):
+        """Demande une panne catastrophique simulée sur l'équipement `key`."""
+        return self.submit(self.fleet.trigger_catastrophic_failure, self.fleet.index[key])
+
+    def add_event_sink(self, sink):
+        """
+        Ajoute un récepteur d'événements `sink(level, message, asset)`, appelé
+        depuis le thread de simulation en plus du journal (log, webhook...).
+        """
+        self._sinks.append(sink)
+        return self
+
+    def _dispatch_event(self, level, message, asset=None):
+        self.metrics.inc("pionier_events_total", level=level)
+        for sink in self._sinks:
+            try:
+                sink(level, message, asset)
+            except Exception:
+                logger.exception("Event sink failed")
+
+    def attach_telemetry(self, feed, max_batches_per_tick=None):
+        """Branche un flux de télémétrie, appliqué à la flotte avant chaque tick."""
+        self.telemetry = feed
+        self.telemetry_batches_per_tick = max_batches_per_tick
+        self._telemetry_skipped = 0
+        self._telemetry_failed = False
+        return self
+
+    def _check_telemetry(self):
+        """Compte les lignes invalides écartées et signale, une seule fois, l'arrêt du flux sur erreur."""
+        feed = self.telemetry
+        skipped = feed.skipped - self._telemetry_skipped
+        if skipped:
+            self.metrics.inc("pionier_telemetry_invalid_total", skipped)
+            self._telemetry_skipped = feed.skipped
+        if feed.error is not None and not self._telemetry_failed:
+            self._telemetry_failed = True
+            self._dispatch_event("error", f"Telemetry feed stopped: {feed.error}")
+
+    # --- Boucle de simulation ---
+    def step(self):
+        """Exécute un tick de simulation et publie l'instantané."""
+        timer = self.metrics.timer
+        if self.telemetry is not None:
+            with timer("pionier_tick_phase_seconds", phase="telemetry"):
+                for batch in self.telemetry.drain(self.telemetry_batches_per_tick):
+                    self.fleet.apply_telemetry(*batch)
+                    self.metrics.inc("pionier_telemetry_readings_total", len(batch[0]))
+                self._check_telemetry()
+        now = time.time()
+        with timer("pionier_tick_phase_seconds", phase="tick"):
+            self.fleet.tick(now=now)
+        if self.history is not None:
+            with timer("pionier_tick_phase_seconds", phase="history"):
+                self.history.record_fleet(self.fleet, timestamp=now)
+        if self.planner is not None:
+            # Replanification incrémentale, dans le budget de temps du planificateur
+            with timer("pionier_tick_phase_seconds", phase="plan"):
+                self.plan = self.planner.update(self.fleet)
+        self.ticks += 1
+        with timer("pionier_tick_phase_seconds", phase="publish"):
+            self._publish()
+        self._update_metrics()
+        if self.snapshot_path and time.monotonic() - self._last_save >= self.snapshot_interval:
+            self._save_in_background()
+
+    # --- Instantanés ---
+    def save_snapshot(self, snapshot=None):
+        """Écrit l'instantané publié (ou `snapshot`) dans `snapshot_path`."""
+        snapshot = self._snapshot if snapshot is None else snapshot
+        with self.metrics.timer("pionier_snapshot_seconds"):
+            save_snapshot(self.snapshot_path, snapshot.fleet, snapshot.events)
+
+    def _save_in_background(self):
+        # L'instantané publié est immuable : on l'écrit hors du thread de simulation
+        if self._saver is not None and self._saver.is_alive():
+            return
+        self._last_save = time.monotonic()
+
+        def save(snapshot):
+            try:
+                self.save_snapshot(snapshot)
+            except Exception:
+                logger.exception("Cannot write snapshot to %s", self.snapshot_path)
+        self._saver = threading.Thread(target=save, args=(self._snapshot,), name="pionier-snapshot", daemon=True)
+        self._saver.start()
+
+    def _update_metrics(self):
+        metrics = self.metrics
+        metrics.inc("pionier_ticks_total")
+        metrics.set("pionier_assets", self.fleet.size)
+        metrics.set("pionier_evaluated_assets", self.fleet.evaluated)
+        if self.fleet.risk is not None:
+            metrics.set("pionier_alerts", int(self.fleet.risk.counts[list(AT_RISK_STATUSES)].sum()))
+        metrics.set("pionier_anomalies", int(self.fleet.anomaly.astype(bool).sum()))
+        if self.plan is not None:
+            metrics.set("pionier_planned_jobs", len(self.plan.jobs))
+        if self.metrics_file:
+            try:
+                metrics.write_textfile(self.metrics_file)
+            except OSError:
+                logger.exception("Cannot write metrics to %s", self.metrics_file)
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick_interval
+        while not self._stop.is_set():
+            remaining = next_tick - time.monotonic()
+            if remaining > 0:
+                try:
+                    item = self._commands.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                self._execute(item)
+                continue
+            # Retard du tick par rapport à l'heure prévue
+            self.metrics.observe("pionier_tick_lag_seconds", time.monotonic() - next_tick)
+            try:
+                self.step()
+            except Exception:
+                logger.exception("Simulation tick failed")
+            next_tick += self.tick_interval
+            # En cas de retard important, on repart de maintenant plutôt que d'enchaîner les ticks
+            if time.monotonic() - next_tick > self.tick_interval:
+                next_tick = time.monotonic() + self.tick_interval
+
+    def _drain_commands(self):
+        while True:
+            try:
+                item = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            self._execute(item)
+
+    def _execute(self, item):
+        if item is None:
+            return
+        future, command, args = item
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = command(*args)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            self._publish()
+            future.set_result(result)
+
+    def _publish(self):
+        self._snapshot = FleetSnapshot(
+            self.fleet.copy(),
+            tuple(self.events.latest(SNAPSHOT_EVENTS)),
+            self.ticks,
+            time.time(),
+            self.plan,
+        )
@@ -0,0 +1,146 @@
+"""
+Instantanés binaires de la flotte, pour redémarrer sans reconstruire l'état.
+
+Un instantané est un seul fichier : un en-tête JSON (dimensions, horloge,
+sites et zones, emplacement de chaque colonne, derniers événements) suivi des colonnes
+NumPy brutes, alignées sur 64 octets. Au chargement, le fichier est mappé
+en mémoire en copie sur écriture : les colonnes deviennent directement
+celles de la flotte, et seules les pages effectivement lues sont chargées.
+
+L'écriture passe par un fichier temporaire synchronisé puis renommé : un
+arrêt brutal laisse toujours l'instantané précédent intact.
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from .fleet import _COLUMNS, FleetState
+
+MAGIC = b"PIONSNP\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")  # Signature, longueur de l'en-tête
+
+
+class SnapshotError(ValueError):
+    """Fichier d'instantané illisible (signature, version ou taille incorrecte)."""
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_snapshot(path, fleet, events=()):
+    """
+    Écrit la flotte et les événements récents (dicts de EventStore.latest,
+    du plus récent au plus ancien) dans `path`, de façon atomique.
+    Les clés d'équipement sont enregistrées sous forme de texte.
+    """
+    size = fleet.size
+    blocks = []
+    for column in _COLUMNS:
+        blocks.append((column, np.ascontiguousarray(getattr(fleet, "_" + column)[:size])))
+    for field in ("keys", "names", "icons"):
+        text = "\0".join(str(value) for value in getattr(fleet, field)).encode("utf-8")
+        blocks.append((field, np.frombuffer(text, dtype=np.uint8)))
+
+    layout, offset = {}, 0
+    for name, array in blocks:
+        offset = _align(offset)
+        layout[name] = (array.dtype.str, offset, array.nbytes)
+        offset += array.nbytes
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "created": time.time(),
+        "size": size,
+        "clock": fleet.clock,
+        "locations": fleet.locations,
+        "data_size": offset,
+        "blocks": layout,
+        "events": [
+            [event["timestamp"], event["level"], event["asset"], event["message"]]
+            for event in reversed(list(events))
+        ],
+    }).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_PREFIX.pack(MAGIC, len(header)))
+            handle.write(header)
+            for name, array in blocks:
+                handle.seek(data_start + layout[name][1])
+                handle.write(memoryview(array).cast("B"))
+            handle.truncate(data_start + offset)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    # Le renommage lui-même doit survivre à une coupure
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def load_snapshot(path, mmap=True, **fleet_options):
+    """
+    Charge un instantané et retourne (flotte, événements). Les événements
+    sont des dicts (timestamp, level, asset, message) du plus ancien au plus
+    récent. Avec `mmap`, les colonnes restent mappées sur le fichier (copie
+    sur écriture) ; sinon elles sont lues en mémoire.
+    """
+    with open(path, "rb") as handle:
+        prefix = handle.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise SnapshotError(f"{path}: truncated snapshot")
+        magic, header_size = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a fleet snapshot")
+        try:
+            header = json.loads(handle.read(header_size))
+        except ValueError as exc:
+            raise SnapshotError(f"{path}: corrupted header") from exc
+    if header.get("version") != FORMAT_VERSION:
+        raise SnapshotError(f"{path}: unsupported snapshot version {header.get('version')}")
+    data_start = _align(_PREFIX.size + header_size)
+    if os.path.getsize(path) != data_start + header["data_size"]:
+        raise SnapshotError(f"{path}: truncated snapshot")
+
+    if mmap:
+        raw = np.memmap(path, dtype=np.uint8, mode="c")
+    else:
+        raw = np.fromfile(path, dtype=np.uint8)
+
+    def block(name):
+        dtype, offset, nbytes = header["blocks"][name]
+        start = data_start + offset
+        return raw[start:start + nbytes].view(np.dtype(dtype))
+
+    def strings(name):
+        data = block(name)
+        return bytes(data).decode("utf-8").split("\0") if header["size"] else []
+
+    size = header["size"]
+    columns = {name: block(name) for name in _COLUMNS if name in header["blocks"]}
+    fleet = FleetState.from_columns(
+        strings("keys"), strings("names"), strings("icons"), columns, header["clock"],
+        header.get("locations", ()), **fleet_options,
+    )
+    if len(fleet.keys) != size:
+        raise SnapshotError(f"{path}: inconsistent asset count")
+    events = [
+        {"timestamp": timestamp, "level": level, "asset": asset, "message": message}
+        for timestamp, level, asset, message in header["events"]
+    ]
+    return fleet, events
@@ -0,0 +1,30 @@
+"""
+Flottes synthétiques pour les bancs d'essai et les tests de charge.
+"""
+import numpy as np
+
+from .fleet import FleetState
+
+SITES, ZONES_PER_SITE = 4, 8  # Hiérarchie synthétique
+
+
+def synthetic_fleet(size, seed=0, sites=SITES, zones_per_site=ZONES_PER_SITE, **options):
+    """
+    Flotte synthétique : santé surtout élevée, taux de dégradation et coûts
+    log-normaux, équipements répartis à tour de rôle entre les zones.
+    `options` est transmis à FleetState (adaptive_ticks...).
+    """
+    rng = np.random.default_rng(seed)
+    fleet = FleetState(**options)
+    fleet.add_assets(
+        [f"A-{i}" for i in range(size)],
+        [f"Asset {i}" for i in range(size)],
+        ["fa-cog"] * size,
+        initial_health=np.clip(rng.beta(5, 1.5, size) * 100, 5, 100),
+        degradation_rate=rng.lognormal(np.log(0.1), 0.5, size),
+        cost_of_failure=np.round(rng.lognormal(np.log(150000), 0.6, size), -3),
+    )
+    zones = np.arange(size) % (sites * zones_per_site)
+    for zone in range(min(size, sites * zones_per_site)):
+        fleet.set_location(np.flatnonzero(zones == zone), f"Site {zone // zones_per_site}", f"Zone {zone % zones_per_site}")
+    return fleet
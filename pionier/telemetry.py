@@ -0,0 +1,359 @@
+"""
+Ingestion de télémétrie horodatée (température, vibration) par micro-lots.
+
+Les sources (CSV, Parquet, flux de lignes sur stdin ou socket locale) sont
+des générateurs de `TelemetryBatch` ; chaque lot est ensuite traduit en
+indices de lignes de la flotte et trié par horodatage, puis appliqué par
+opérations vectorisées : toutes les mesures passent dans les détecteurs
+d'anomalies, seule la plus récente de chaque équipement est affichée.
+
+Une ligne invalide (valeur illisible, nombre de colonnes incorrect) est
+écartée et comptée dans `TelemetryBatch.skipped` sans interrompre la lecture.
+"""
+import csv
+import io
+import logging
+import math
+import queue
+import socket
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Colonnes attendues, dans l'ordre des flux sans en-tête
+TELEMETRY_COLUMNS = ("timestamp", "asset", "temperature", "vibration")
+DEFAULT_BATCH_SIZE = 65536
+
+
+class TelemetryBatch:
+    """Micro-lot de mesures, stocké en colonnes (`skipped` : lignes invalides écartées)."""
+    __slots__ = ("timestamps", "assets", "temperature", "vibration", "skipped")
+
+    def __init__(self, timestamps, assets, temperature, vibration, skipped=0):
+        self.timestamps = timestamps
+        self.assets = assets
+        self.temperature = temperature
+        self.vibration = vibration
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+def _pyarrow():
+    """Import paresseux de pyarrow (optionnel : accélère CSV, requis pour Parquet)."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+# --- Conversion des lots ---
+def _arrow_timestamps(column):
+    """Horodatages d'une colonne pyarrow, en secondes (nombres, dates ou texte ISO 8601)."""
+    pa = _pyarrow()
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        try:
+            return pa.compute.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+        except pa.ArrowInvalid:
+            try:
+                column = pa.compute.cast(column, pa.timestamp("us"))
+            except pa.ArrowInvalid:
+                return np.array([_parse_timestamp(v) for v in column.to_pylist()])
+    if pa.types.is_timestamp(column.type):
+        column = pa.compute.cast(column, pa.timestamp("us"))
+        return pa.compute.cast(column, pa.int64()).to_numpy(zero_copy_only=False) / 1e6
+    return pa.compute.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _from_arrow(batch, skipped=0):
+    """
+    Convertit un RecordBatch pyarrow en TelemetryBatch. Les lignes sans
+    horodatage ni équipement sont écartées ; si une valeur est illisible, le
+    lot est relu ligne à ligne pour n'écarter que les lignes fautives.
+    """
+    pa = _pyarrow()
+    complete = pa.compute.and_(pa.compute.is_valid(batch.column("timestamp")), pa.compute.is_valid(batch.column("asset")))
+    if complete.false_count:
+        skipped += complete.false_count
+        batch = batch.filter(complete)
+    try:
+        timestamps = _arrow_timestamps(batch.column("timestamp"))
+        temperature = pa.compute.cast(batch.column("temperature"), pa.float64()).to_numpy(zero_copy_only=False)
+        vibration = pa.compute.cast(batch.column("vibration"), pa.float64()).to_numpy(zero_copy_only=False)
+    except (pa.ArrowInvalid, TypeError, ValueError):
+        return _from_rows(list(zip(*(batch.column(name).to_pylist() for name in TELEMETRY_COLUMNS))), skipped)
+    # Les identifiants sont encodés en dictionnaire : un seul objet Python par équipement distinct
+    assets = pa.compute.dictionary_encode(pa.compute.cast(batch.column("asset"), pa.string()))
+    return TelemetryBatch(
+        np.asarray(timestamps, dtype=np.float64),
+        (assets.dictionary.to_pylist(), assets.indices.to_numpy(zero_copy_only=False)),
+        temperature,
+        vibration,
+        skipped,
+    )
+
+
+def _from_rows(rows, skipped=0):
+    """
+    Convertit une liste de lignes texte (timestamp, asset, temperature, vibration).
+    Les lignes illisibles sont écartées et ajoutées à `skipped`.
+    """
+    uniques = {}
+    codes = np.empty(len(rows), dtype=np.int32)
+    timestamps = np.empty(len(rows), dtype=np.float64)
+    temperature = np.empty(len(rows), dtype=np.float64)
+    vibration = np.empty(len(rows), dtype=np.float64)
+    n = 0
+    for row in rows:
+        try:
+            ts, asset, temp, vib = row
+            ts = _parse_timestamp(ts)
+            temp = float(temp) if temp else np.nan
+            vib = float(vib) if vib else np.nan
+        except (TypeError, ValueError):
+            continue
+        if not asset or not math.isfinite(ts):
+            continue
+        timestamps[n], temperature[n], vibration[n] = ts, temp, vib
+        codes[n] = uniques.setdefault(asset, len(uniques))
+        n += 1
+    return TelemetryBatch(timestamps[:n], (list(uniques), codes[:n]), temperature[:n], vibration[:n], skipped + len(rows) - n)
+
+
+def _arrow_options(pa, skipped, **convert):
+    """Options de lecture CSV : colonnes lues en texte puis converties, lignes mal formées comptées dans `skipped`."""
+    def skip(row):
+        skipped.append(row.number)
+        return "skip"
+    return {
+        "parse_options": pa.csv.ParseOptions(invalid_row_handler=skip),
+        "convert_options": pa.csv.ConvertOptions(
+            column_types={column: pa.string() for column in TELEMETRY_COLUMNS},
+            strings_can_be_null=True,
+            **convert,
+        ),
+    }
+
+
+def _take(skipped):
+    """Vide la liste des lignes mal formées et retourne leur nombre."""
+    count = len(skipped)
+    skipped.clear()
+    return count
+
+
+# --- Sources ---
+def read_csv(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Lit un fichier CSV avec en-tête, par lots de `batch_size` lignes."""
+    pa = _pyarrow()
+    if pa is not None:
+        block_size = max(1 << 20, batch_size * 48)  # ~48 octets par ligne
+        skipped = []
+        reader = pa.csv.open_csv(
+            path,
+            read_options=pa.csv.ReadOptions(block_size=block_size),
+            **_arrow_options(pa, skipped, include_columns=list(TELEMETRY_COLUMNS)),
+        )
+        for batch in reader:
+            for start in range(0, batch.num_rows, batch_size):
+                yield _from_arrow(batch.slice(start, batch_size), _take(skipped))
+        if skipped:
+            yield _from_rows([], _take(skipped))
+        return
+    with open(path, newline="") as handle:
+        reader = csv.DictReader(handle)
+        rows = []
+        for record in reader:
+            # Colonnes en trop (clé None) ou manquantes (valeur None) : ligne invalide
+            invalid = None in record or None in record.values()
+            rows.append(None if invalid else [record[column] for column in TELEMETRY_COLUMNS])
+            if len(rows) >= batch_size:
+                yield _from_rows(rows)
+                rows = []
+        if rows:
+            yield _from_rows(rows)
+
+
+def read_parquet(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Lit un fichier Parquet par lots de `batch_size` lignes (nécessite pyarrow)."""
+    if _pyarrow() is None:
+        raise ImportError("Reading Parquet telemetry requires pyarrow")
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=list(TELEMETRY_COLUMNS)):
+        yield _from_arrow(batch)
+
+
+def read_lines(stream, batch_size=DEFAULT_BATCH_SIZE, chunk_size=1 << 16):
+    """
+    Lit un flux binaire de lignes CSV sans en-tête (stdin, socket...).
+    Un lot est émis dès qu'il est plein, ou dès que le flux n'a plus de
+    données immédiatement disponibles (lecture courte).
+    """
+    pa = _pyarrow()
+    read = getattr(stream, "read1", stream.read)
+    pending = b""
+    blocks, count = [], 0
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk
+        cut = data.rfind(b"\n") + 1
+        pending = data[cut:]
+        if cut:
+            blocks.append(data[:cut])
+            count += data.count(b"\n", 0, cut)
+        if blocks and (count >= batch_size or len(chunk) < chunk_size):
+            yield from _split(_parse_lines(b"".join(blocks), pa), batch_size)
+            blocks, count = [], 0
+    if pending.strip():
+        blocks.append(pending + b"\n")
+    if blocks:
+        yield from _split(_parse_lines(b"".join(blocks), pa), batch_size)
+
+
+def _parse_lines(data, pa):
+    if pa is not None:
+        skipped = []
+        try:
+            table = pa.csv.read_csv(
+                io.BytesIO(data),
+                read_options=pa.csv.ReadOptions(column_names=list(TELEMETRY_COLUMNS)),
+                **_arrow_options(pa, skipped),
+            ).combine_chunks()
+        except pa.ArrowInvalid:
+            pass  # Bloc illisible pour pyarrow (encodage...) : relu ligne à ligne ci-dessous
+        else:
+            if table.num_rows == 0:
+                return _from_rows([], _take(skipped))
+            return _from_arrow(table.to_batches()[0], _take(skipped))
+    return _from_rows([row for row in csv.reader(io.StringIO(data.decode(errors="replace"))) if row])
+
+
+def _split(batch, batch_size):
+    """Découpe un lot en tranches d'au plus `batch_size` mesures."""
+    if len(batch) <= batch_size:
+        yield batch
+        return
+    uniques, codes = batch.assets
+    for start in range(0, len(batch), batch_size):
+        stop = start + batch_size
+        yield TelemetryBatch(
+            batch.timestamps[start:stop],
+            (uniques, codes[start:stop]),
+            batch.temperature[start:stop],
+            batch.vibration[start:stop],
+            batch.skipped if start == 0 else 0,
+        )
+
+
+def read_socket(host, port, batch_size=DEFAULT_BATCH_SIZE):
+    """Se connecte à un flux de lignes TCP local (substitut de l'historian)."""
+    with socket.create_connection((host, port)) as connection:
+        yield from read_lines(connection.makefile("rb"), batch_size)
+
+
+def open_source(spec, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Ouvre une source à partir de sa description :
+    "-" ou "stdin", "tcp://hôte:port", ou un chemin .csv / .parquet.
+    """
+    if spec in ("-", "stdin"):
+        return read_lines(sys.stdin.buffer, batch_size)
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].rpartition(":")
+        return read_socket(host or "127.0.0.1", int(port), batch_size)
+    if spec.endswith((".parquet", ".pq")):
+        return read_parquet(spec, batch_size)
+    return read_csv(spec, batch_size)
+
+
+# --- Étapes du pipeline ---
+def encode(batches, index):
+    """
+    Traduit les identifiants d'équipement en indices de lignes de la flotte.
+    Les mesures d'équipements inconnus sont écartées.
+    Produit des tuples (rows, timestamps, temperature, vibration).
+    """
+    for batch in batches:
+        uniques, codes = batch.assets
+        lookup = np.array([index.get(asset, -1) for asset in uniques], dtype=np.intp)
+        rows = lookup[codes] if len(lookup) else np.empty(0, dtype=np.intp)
+        known = rows >= 0
+        if known.all():
+            yield rows, batch.timestamps, batch.temperature, batch.vibration
+        else:
+            yield rows[known], batch.timestamps[known], batch.temperature[known], batch.vibration[known]
+
+
+def in_time_order(rows, timestamps, temperature, vibration):
+    """Trie un lot par horodatage (tri stable, seulement s'il est désordonné)."""
+    if len(rows) and np.any(np.diff(timestamps) < 0):
+        order = np.argsort(timestamps, kind="stable")
+        return rows[order], timestamps[order], temperature[order], vibration[order]
+    return rows, timestamps, temperature, vibration
+
+
+class TelemetryFeed:
+    """
+    Lit une source dans un thread dédié et remplit une file bornée de lots
+    déjà encodés. Quand le consommateur prend du retard, la file se remplit
+    et le lecteur se bloque : la contre-pression remonte jusqu'à la source.
+    """
+    def __init__(self, batches, index, max_pending=8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._batches = batches
+        self._index = index
+        self.readings = 0
+        self.skipped = 0  # Lignes invalides écartées par la source
+        self.finished = False
+        self.error = None  # Exception qui a arrêté la lecture
+        self._thread = threading.Thread(target=self._run, name="pionier-telemetry", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for rows, timestamps, temperature, vibration in encode(self._count_skipped(), self._index):
+                if len(rows):
+                    self._queue.put(in_time_order(rows, timestamps, temperature, vibration))
+                    self.readings += len(rows)
+        except Exception as exc:
+            logger.exception("Telemetry feed stopped")
+            self.error = exc
+        finally:
+            self.finished = True
+
+    def _count_skipped(self):
+        for batch in self._batches:
+            if batch.skipped:
+                self.skipped += batch.skipped
+                logger.warning("Skipped %d invalid telemetry rows", batch.skipped)
+            yield batch
+
+    def drain(self, max_batches=None):
+        """Retourne les lots prêts, sans attendre (au plus `max_batches`)."""
+        batches = []
+        while max_batches is None or len(batches) < max_batches:
+            try:
+                batches.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batches
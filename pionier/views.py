@@ -0,0 +1,64 @@
+"""
+Requêtes de la vue flotte : filtrage, tri et pagination côté serveur.
+
+Tout est vectorisé sur les colonnes de FleetState ; seule la page demandée
+est triée complètement (sélection partielle pour le reste), si bien que le
+coût d'un affichage dépend de la taille de la page plus que de la flotte.
+"""
+import numpy as np
+
+# Bandes de santé, identiques aux couleurs des cartes : nom -> (min exclu, max inclus)
+HEALTH_BANDS = {
+    "critical": (-np.inf, 50.0),
+    "warning": (50.0, 80.0),
+    "good": (80.0, np.inf),
+}
+
+# Ordres de tri : nom -> (colonne, décroissant)
+SORT_ORDERS = {
+    "risk": ("ttf_lower", False),  # Borne basse du temps avant panne : celle qui fixe les statuts
+    "time_to_failure": ("time_to_failure_hours", False),
+    "health": ("health", False),
+    "cost_of_failure": ("cost_of_failure", True),
+}
+
+
+def select_rows(fleet, statuses=None, health_bands=None, min_cost=None, sort="risk", offset=0, limit=24, zones=None):
+    """
+    Retourne (indices des lignes de la page, nombre total de lignes retenues).
+    `statuses`, `health_bands` et `zones` (numéros de zone de la hiérarchie)
+    sont des listes (None = pas de filtre) ; les équipements sans prédiction
+    sont classés en dernier.
+    """
+    mask = np.ones(fleet.size, dtype=bool)
+    if zones is not None:
+        mask &= np.isin(fleet.zone, list(zones))
+    if statuses is not None:
+        mask &= np.isin(fleet.status, list(statuses))
+    if health_bands is not None:
+        health = fleet.health
+        in_band = np.zeros(fleet.size, dtype=bool)
+        for band in health_bands:
+            low, high = HEALTH_BANDS[band]
+            in_band |= (health > low) & (health <= high)
+        mask &= in_band
+    if min_cost:
+        mask &= fleet.cost_of_failure >= min_cost
+    rows = np.flatnonzero(mask)
+    total = len(rows)
+
+    column, descending = SORT_ORDERS[sort]
+    keys = getattr(fleet, column)[rows]
+    keys = -keys if descending else keys
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    stop = min(offset + limit, total)
+    if stop <= offset:
+        return rows[:0], total
+    candidates = np.arange(total)
+    if stop < total:
+        # Sélection partielle : on ne trie que les lignes jusqu'à la clé de rang `stop`,
+        # ex æquo compris, pour que l'ordre (clé, ligne) soit stable d'une page à l'autre
+        threshold = np.partition(keys, stop - 1)[stop - 1]
+        candidates = np.flatnonzero(keys <= threshold)
+    order = candidates[np.lexsort((rows[candidates], keys[candidates]))]
+    return rows[order[offset:stop]], total
@@ -0,0 +1,56 @@
+"""
+Un lot de télémétrie (plusieurs mesures par équipement, dans le désordre)
+doit laisser les détecteurs dans le même état que les mesures appliquées
+une à une, avec ou sans numba.
+"""
+import numpy as np
+import pytest
+
+from pionier import FleetState, anomaly
+
+COLUMNS = ("temperature", "vibration", "last_reading_ts", "anomaly", "temperature_ewma", "temperature_ewm_var",
+           "temperature_cusum_high", "temperature_samples", "vibration_ewma", "vibration_cusum_low", "vibration_samples")
+
+
+def fleet_with_log(size):
+    fleet = FleetState()
+    fleet.add_assets([f"K{i}" for i in range(size)], ["name"] * size, ["icon"] * size, 90, 0.1, 1000)
+    events = []
+    fleet.on_event = lambda *event: events.append(event)
+    return fleet, events
+
+
+@pytest.fixture(params=["compiled", "python"])
+def scan_mode(request, monkeypatch):
+    if request.param == "compiled":
+        if not anomaly.scan_compiled():
+            pytest.skip("numba is not installed")
+    else:
+        monkeypatch.setattr(anomaly, "_compiled_scan", False)
+    return request.param
+
+
+@pytest.mark.parametrize("size, readings, hot", [(50, 5000, 0.0), (300, 20000, 0.5), (3, 3000, 0.3)])
+def test_batch_matches_readings_one_by_one(scan_mode, size, readings, hot):
+    rng = np.random.default_rng(size)
+    rows = rng.integers(0, size, readings)
+    rows[rng.random(readings) < hot] = 0  # Un équipement très bavard
+    timestamps = np.arange(readings, dtype=np.float64) + 1
+    temperature = 85 + rng.normal(0, 1, readings)
+    vibration = 2 + 0.1 * rng.normal(0, 1, readings)
+    temperature[rng.random(readings) < 0.02] = 200
+    temperature[rng.random(readings) < 0.05] = np.nan
+    vibration[rng.random(readings) < 0.05] = np.nan
+
+    batch, batch_events = fleet_with_log(size)
+    single, single_events = fleet_with_log(size)
+    shuffled = rng.permutation(readings)
+    batch.apply_telemetry(rows[shuffled], timestamps[shuffled], temperature[shuffled], vibration[shuffled])
+    for i in range(readings):
+        single.apply_telemetry(rows[i:i + 1], timestamps[i:i + 1], temperature[i:i + 1], vibration[i:i + 1])
+
+    for column in COLUMNS:
+        np.testing.assert_array_equal(getattr(batch, "_" + column)[:size], getattr(single, "_" + column)[:size],
+                                      err_msg=column)
+    assert sorted(batch_events) == sorted(single_events)
+    assert any("Abnormal temperature" in message for _, message, _ in batch_events)
@@ -0,0 +1,106 @@
+"""
+Les agrégats min/max/moyenne de l'historique doivent correspondre à une
+réduction naïve des échantillons bruts, à chaque résolution.
+"""
+import numpy as np
+import pytest
+
+from pionier.history import DEFAULT_RESOLUTIONS, HISTORY_METRICS, MIN_BUCKETS, HistoryStore, bytes_per_asset, \
+    fit_resolutions, span
+
+T0 = 1_700_000_000.0
+STEP = 10.0  # Secondes entre deux échantillons
+SAMPLES = 1080  # Trois heures
+RESOLUTIONS = ((60, 1000), (3600, 100))
+
+
+def samples(rows, seed=0):
+    """Horodatages (SAMPLES,) et valeurs (SAMPLES, len(rows), métriques), avec quelques mesures manquantes."""
+    rng = np.random.default_rng(seed)
+    timestamps = T0 + STEP * np.arange(SAMPLES)
+    values = rng.normal(50, 10, (SAMPLES, rows, len(HISTORY_METRICS))).astype(np.float32)
+    values[rng.random(values.shape) < 0.01] = np.nan
+    return timestamps, values
+
+
+def naive_rollup(timestamps, values, seconds):
+    """Réduction seau par seau : nanmin, nanmax, et moyenne (NaN si une mesure manque)."""
+    buckets = np.floor(timestamps / seconds)
+    rollup = {"timestamps": [], "min": [], "max": [], "mean": []}
+    for bucket in np.unique(buckets):
+        chunk = values[buckets == bucket].astype(np.float64)
+        rollup["timestamps"].append(bucket * seconds)
+        rollup["min"].append(np.nanmin(chunk))
+        rollup["max"].append(np.nanmax(chunk))
+        rollup["mean"].append(chunk.mean())
+    return {key: np.array(value) for key, value in rollup.items()}
+
+
+@pytest.fixture(params=["memory", "spill"])
+def store(request, tmp_path):
+    spill_dir = str(tmp_path / "history") if request.param == "spill" else None
+    store = HistoryStore(capacity=8, resolutions=RESOLUTIONS, assets=1, spill_dir=spill_dir)
+    timestamps, values = samples(3)
+    for ts, sample in zip(timestamps, values):
+        store.record([0, 1, 2], ts, sample)  # Le stockage grandit de 1 à 3 équipements en cours de route
+    store.values = values
+    return store
+
+
+@pytest.mark.parametrize("max_points, seconds", [(1000, 60), (10, 3600)])
+def test_rollups_match_naive_reduce(store, max_points, seconds):
+    timestamps = T0 + STEP * np.arange(SAMPLES)
+    for row in range(3):
+        for m, metric in enumerate(HISTORY_METRICS):
+            series = store.series(row, metric, max_points=max_points)
+            assert series["resolution"] == seconds
+            expected = naive_rollup(timestamps, store.values[:, row, m], seconds)
+            np.testing.assert_array_equal(series["timestamps"], expected["timestamps"])
+            np.testing.assert_allclose(series["min"], expected["min"])
+            np.testing.assert_allclose(series["max"], expected["max"])
+            np.testing.assert_allclose(series["mean"], expected["mean"], rtol=1e-5)
+
+
+def test_raw_samples_when_they_cover_the_range(store):
+    series = store.series(1, "health", start=T0 + STEP * (SAMPLES - 8))
+    assert series["resolution"] == 0
+    np.testing.assert_array_equal(series["timestamps"], T0 + STEP * np.arange(SAMPLES - 8, SAMPLES))
+    np.testing.assert_array_equal(series["mean"], store.values[-8:, 1, 0])
+
+
+def test_downsampling_picks_the_finest_fitting_resolution(store):
+    start = T0 + 3600
+    series = store.series(0, "temperature", start=start, max_points=50)
+    # Deux heures demandées : 120 seaux d'une minute, trop pour 50 points -> seaux d'une heure
+    assert series["resolution"] == 3600
+    assert series["timestamps"][0] <= start < series["timestamps"][0] + 3600  # Seau partiel du début gardé
+    assert series["timestamps"][-1] == np.floor(T0 / 3600 + SAMPLES * STEP / 3600) * 3600
+
+    series = store.series(0, "temperature", start=start, max_points=130)
+    assert series["resolution"] == 60 and len(series["timestamps"]) == 121  # Début de l'intervalle en milieu de minute
+    assert series["timestamps"][0] <= start < series["timestamps"][0] + 60
+
+    series = store.series(0, "temperature", start=T0, end=T0 + 1800, max_points=1000)
+    assert series["resolution"] == 60
+    assert series["timestamps"][0] <= T0 and series["timestamps"][-1] <= T0 + 1800
+
+
+def test_oldest_buckets_are_overwritten():
+    store = HistoryStore(capacity=4, resolutions=((3600, 4),), assets=1)
+    for hour in range(6):
+        store.record([0], T0 + 3600 * hour, np.full((1, len(HISTORY_METRICS)), hour))
+    series = store.series(0, "health", max_points=100)
+    assert series["resolution"] == 3600
+    np.testing.assert_array_equal(series["mean"], [2, 3, 4, 5])
+
+
+def test_fit_resolutions_fits_the_budget():
+    capacity = 256
+    assert fit_resolutions(100, capacity, 1 << 30) == DEFAULT_RESOLUTIONS
+    budget = 1 << 30
+    resolutions = fit_resolutions(100_000, capacity, budget)
+    assert 100_000 * bytes_per_asset(capacity, resolutions) <= budget
+    assert span(resolutions) < span(DEFAULT_RESOLUTIONS)
+    assert HistoryStore(capacity, resolutions, assets=1).span == span(resolutions)
+    # Budget intenable : la profondeur ne descend pas sous MIN_BUCKETS
+    assert all(buckets == MIN_BUCKETS for _, buckets in fit_resolutions(100_000, capacity, 1 << 20))
@@ -0,0 +1,156 @@
+"""
+Les index tenus à jour par différences (risque, hiérarchie, ordonnanceur)
+doivent donner le même résultat qu'un parcours complet de la flotte.
+"""
+import numpy as np
+import pytest
+
+from pionier import AT_RISK_STATUSES, IMMINENT_FAILURE, STATUS_LABELS, WARNING_HOURS, FleetState
+from pionier.hierarchy import rollups
+from pionier.synthetic import synthetic_fleet
+
+SIZE = 2000
+TICKS = 300
+TOLERANCE = 1e-5  # Heures ; les clés des index tolèrent 1e-6
+
+
+def simulate(fleet, ticks=TICKS, seed=1):
+    """
+    Fait vivre la flotte tick par tick (télémétrie avec pics, maintenances,
+    pannes simulées, changements de zone) et la rend après chaque tick.
+    """
+    rng = np.random.default_rng(seed)
+    reading_ts = 0.0
+    for tick in range(ticks):
+        rows = rng.choice(fleet.size, fleet.size // 10, replace=False)
+        temperature = 85 + rng.normal(0, 1, len(rows))
+        temperature[rng.random(len(rows)) < 0.01] = 200
+        reading_ts += 1.0
+        fleet.apply_telemetry(rows, np.full(len(rows), reading_ts), temperature, 2 + rng.normal(0, 0.1, len(rows)))
+        if tick % 7 == 0:
+            at_risk = np.flatnonzero(np.isin(fleet.status, AT_RISK_STATUSES))
+            if len(at_risk):
+                fleet.perform_maintenance(int(rng.choice(at_risk)))
+            fleet.trigger_catastrophic_failure(int(rng.integers(fleet.size)), now=0.0)
+        if tick % 25 == 0:
+            moved = rng.choice(fleet.size, 20, replace=False)
+            site, zone = fleet.locations[int(rng.integers(len(fleet.locations)))]
+            fleet.set_location(moved, site, zone)
+        fleet.tick(now=0.0)
+        yield tick
+
+
+def failure_keys(fleet):
+    """Clé de chaque équipement dans les index : heure de la panne au plus tôt (inf sans prédiction)."""
+    keys = fleet.clock + fleet.ttf_lower
+    return np.where(np.isnan(keys), np.inf, keys)
+
+
+@pytest.fixture
+def fleet():
+    return synthetic_fleet(SIZE)
+
+
+@pytest.mark.parametrize("k, within_hours", [(50, WARNING_HOURS + 1), (10, None), (500, 24)])
+def test_risk_top_matches_full_rescan(fleet, k, within_hours):
+    for _ in simulate(fleet):
+        keys = failure_keys(fleet)
+        candidates = np.flatnonzero(np.isfinite(keys))
+        if within_hours is not None:
+            candidates = candidates[keys[candidates] - fleet.clock < within_hours]
+        expected = np.sort(keys[candidates])[:k]
+        top = fleet.most_at_risk(k, within_hours)
+        # Ex aequo possibles : on compare les clés, dans l'ordre, plutôt que les lignes
+        np.testing.assert_allclose(keys[top], expected, atol=TOLERANCE)
+        assert len(set(top)) == len(top)
+
+
+def test_risk_status_bands_match_full_rescan(fleet):
+    for _ in simulate(fleet):
+        status = fleet.status
+        np.testing.assert_array_equal(fleet.risk.counts, np.bincount(status, minlength=len(STATUS_LABELS)))
+        costs = np.bincount(status, weights=fleet.cost_of_failure, minlength=len(STATUS_LABELS))
+        np.testing.assert_allclose(fleet.risk.costs, costs, rtol=1e-9, atol=1e-3)
+        for band in AT_RISK_STATUSES:
+            assert set(fleet.rows_with_status(band)) == set(np.flatnonzero(status == band).tolist())
+
+
+def test_anomalous_rows_match_full_rescan(fleet):
+    rng = np.random.default_rng(2)
+    for tick in simulate(fleet):
+        if tick % 10 == 0:
+            # Rafale de mesures répétées sur quelques lignes (parcours par équipement)
+            rows = np.repeat(rng.choice(fleet.size, 4, replace=False), 200)
+            temperature = 85 + rng.normal(0, 1, len(rows))
+            temperature[-50:] = 200 if tick % 20 else 85
+            fleet.apply_telemetry(rows, np.arange(len(rows)) / len(rows) + tick, temperature, np.full(len(rows), np.nan))
+        anomalous = np.flatnonzero(fleet.anomaly)
+        assert fleet.anomalous_rows() == anomalous.tolist()
+        assert fleet.anomalous_rows(10) == anomalous[:10].tolist()
+        alerting = np.isin(fleet.status, AT_RISK_STATUSES) | (fleet.anomaly != 0)
+        assert fleet.alerting_count() == alerting.sum()
+    assert fleet.anomalous_rows()
+    assert fleet.copy().anomalous_rows() == fleet.anomalous_rows()
+
+
+def test_hierarchy_rollups_match_full_rescan(fleet):
+    n_zones, n_statuses = len(fleet.locations), len(STATUS_LABELS)
+    for _ in simulate(fleet):
+        zone, status, keys = fleet.zone, fleet.status, failure_keys(fleet)
+        counts = np.zeros((n_zones, n_statuses), dtype=np.int64)
+        np.add.at(counts, (zone, status), 1)
+        at_risk = np.isin(status, AT_RISK_STATUSES)
+        money = np.bincount(zone[at_risk], weights=fleet.cost_of_failure[at_risk], minlength=n_zones)
+        worst = np.full(n_zones, np.inf)
+        np.minimum.at(worst, zone, keys)
+
+        for rollup in rollups(fleet, "zone"):
+            (number,) = rollup.zones
+            np.testing.assert_array_equal(rollup.status_counts, counts[number])
+            assert rollup.at_risk == counts[number][list(AT_RISK_STATUSES)].sum()
+            assert rollup.money_at_risk == pytest.approx(money[number])
+            if np.isinf(worst[number]):
+                assert rollup.worst_row is None
+            else:
+                assert rollup.worst_hours == pytest.approx(worst[number] - fleet.clock, abs=TOLERANCE)
+                assert keys[rollup.worst_row] == pytest.approx(worst[number], abs=TOLERANCE)
+
+        (plant,) = rollups(fleet, "plant")
+        np.testing.assert_array_equal(plant.status_counts, counts.sum(axis=0))
+
+
+def test_scheduler_never_later_than_full_evaluation():
+    """
+    Sans commande ni télémétrie, l'évaluation adaptative atteint chaque bande
+    de statut au même tick qu'une évaluation complète à chaque tick, ou avant.
+    """
+    adaptive = synthetic_fleet(SIZE)
+    full = synthetic_fleet(SIZE, adaptive_ticks=False)
+    evaluated = 0
+    for _ in range(TICKS):
+        adaptive.tick(now=0.0)
+        full.tick(now=0.0)
+        evaluated += adaptive.evaluated
+        late = np.flatnonzero(adaptive.status < full.status)
+        assert not len(late), f"rows {late[:10].tolist()} reached their status band later than with full evaluation"
+    # L'ordonnanceur sert à quelque chose : bien moins d'évaluations qu'un parcours complet
+    assert evaluated < SIZE * TICKS / 2
+    assert np.count_nonzero(full.status == IMMINENT_FAILURE)  # Le scénario atteint bien toutes les bandes
+
+
+@pytest.mark.parametrize("adaptive_ticks", [True, False])
+def test_partial_ticks_keep_the_estimator_time_base(adaptive_ticks):
+    """
+    Une dégradation parfaitement linéaire doit garder sa pente estimée,
+    même quand des lignes avancent seules (tick(rows=...)) entre deux
+    évaluations espacées par l'ordonnanceur.
+    """
+    fleet = FleetState(adaptive_ticks=adaptive_ticks)
+    rates = np.array([0.02, 0.05, 0.1, 0.2])
+    fleet.add_assets([f"K{i}" for i in range(4)], ["name"] * 4, ["icon"] * 4, 100, rates, 1000)
+    for tick in range(200):
+        fleet.tick(now=0.0)
+        if tick >= 100 and tick % 7 == 0:
+            fleet.tick(rows=[tick % 4], now=0.0)
+            fleet.tick(rows=[0, 3], now=0.0, hours=np.array([0.5, 2.0]))
+    np.testing.assert_allclose(fleet.trend_slope, -rates, rtol=1e-6)
@@ -0,0 +1,107 @@
+"""
+Journal durable : `flush` attend l'écriture réelle des événements, les
+requêtes retournent exactement la plage [start, end) demandée, et les
+exports relisent les mêmes lignes.
+"""
+import csv
+import io
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from pionier import FleetState
+from pionier.asset import COMMAND_TIMEOUT
+from pionier.journal import EventJournal, main
+from pionier.service import SimulationService
+
+T0 = 1_700_000_000.0
+EVENTS = 100  # Un par minute, alternativement sur A et B
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = EventJournal(str(tmp_path / "events.db"), flush_interval=60.0)
+    yield journal
+    journal.close(5)
+
+
+@pytest.fixture
+def filled(journal):
+    for i in range(EVENTS):
+        journal.append("error" if i % 10 == 0 else "info", f"event {i}", "AB"[i % 2], timestamp=T0 + 60 * i)
+    assert journal.flush(5)
+    return journal
+
+
+def test_flush_waits_for_the_write(journal):
+    journal.append("info", "started")
+    assert journal.count() == 0  # Lot en attente du délai d'écriture
+    assert journal.flush(5)
+    assert [event["message"] for event in journal.query()] == ["started"]
+
+
+def test_flush_reports_failed_writes(journal, caplog):
+    connection = sqlite3.connect(journal.path)
+    connection.execute("DROP TABLE events")
+    connection.close()
+    journal.append("info", "lost")
+    with caplog.at_level(logging.ERROR, logger="pionier.journal"):
+        assert not journal.flush(5)
+    assert "Cannot write 1 events" in caplog.text
+
+
+@pytest.mark.parametrize("start, end", [
+    (T0 + 600, T0 + 1200),
+    (datetime.fromtimestamp(T0 + 600), datetime.fromtimestamp(T0 + 1200)),
+    (datetime.fromtimestamp(T0 + 600, timezone.utc).isoformat(), str(T0 + 1200)),
+])
+def test_query_returns_the_requested_range(filled, start, end):
+    events = list(filled.query(start=start, end=end))
+    # Début inclus, fin exclue
+    assert [event["timestamp"] for event in events] == [T0 + 60 * i for i in range(10, 20)]
+    assert filled.count(start=start, end=end) == 10
+
+
+def test_query_filters_and_order(filled):
+    events = list(filled.query(asset="A", level="error"))
+    assert [event["message"] for event in events] == [f"event {i}" for i in range(0, EVENTS, 10)]
+    latest = list(filled.query(asset="B", limit=3, descending=True))
+    assert [event["message"] for event in latest] == ["event 99", "event 97", "event 95"]
+
+
+def test_csv_export_matches_query(filled):
+    output = io.StringIO()
+    assert filled.export_csv(output, start=T0 + 600, asset="B") == 45
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    expected = list(filled.query(start=T0 + 600, asset="B"))
+    assert [row["message"] for row in rows] == [event["message"] for event in expected]
+    assert datetime.fromisoformat(rows[0]["timestamp"]).timestamp() == expected[0]["timestamp"]
+
+
+def test_parquet_export_matches_query(filled, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    path = tmp_path / "errors.parquet"
+    assert main([filled.path, "--level", "error", "--end", str(T0 + 3000), "--format", "parquet",
+                 "--output", str(path)]) == 0
+    table = pq.read_table(path).to_pydict()
+    assert table["message"] == [f"event {i}" for i in range(0, 50, 10)]
+    assert [ts.timestamp() for ts in table["timestamp"]] == [T0 + 60 * i for i in range(0, 50, 10)]
+
+
+def test_service_stop_bounds_the_flush(journal, caplog, monkeypatch):
+    timeouts = []
+
+    def flush(timeout=None):
+        timeouts.append(timeout)
+        return False
+    monkeypatch.setattr(journal, "flush", flush)
+    fleet = FleetState()
+    fleet.add_asset("A", "Asset A", "icon", 90, 0.1, 1000)
+    service = SimulationService(fleet, journal=journal)
+    with caplog.at_level(logging.WARNING, logger="pionier.service"):
+        service.stop()
+    assert timeouts == [COMMAND_TIMEOUT]
+    assert "not flushed" in caplog.text
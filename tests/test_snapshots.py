@@ -0,0 +1,79 @@
+"""
+Un instantané rechargé doit redonner la flotte sauvegardée : colonnes,
+statuts, index de risque et d'anomalies, journal récent.
+"""
+import numpy as np
+import pytest
+
+from pionier import AT_RISK_STATUSES
+from pionier.events import EventStore
+from pionier.fleet import _COLUMNS
+from pionier.snapshots import SnapshotError, load_snapshot, save_snapshot
+from pionier.synthetic import synthetic_fleet
+
+SIZE = 500
+
+
+@pytest.fixture
+def saved(tmp_path):
+    """Flotte qui a vécu (télémétrie, pannes, maintenances), sauvegardée avec ses événements."""
+    fleet = synthetic_fleet(SIZE, adaptive_ticks=False)
+    events = EventStore(100)
+    fleet.on_event = events.append
+    rng = np.random.default_rng(0)
+    for tick in range(60):
+        temperature = 85 + rng.normal(0, 1, SIZE)
+        temperature[:20] += tick  # Dérive sur quelques équipements : anomalies de signal
+        fleet.apply_telemetry(np.arange(SIZE), np.full(SIZE, float(tick)), temperature, np.full(SIZE, np.nan))
+        if tick % 10 == 0:
+            fleet.trigger_catastrophic_failure(int(rng.integers(SIZE)), now=0.0)
+            fleet.perform_maintenance(int(rng.integers(SIZE)))
+        fleet.tick(now=0.0)
+    path = tmp_path / "fleet.snapshot"
+    save_snapshot(str(path), fleet, events.latest(100))
+    return fleet, events.latest(100), str(path)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_restore_matches_saved_fleet(saved, mmap):
+    fleet, events, path = saved
+    restored, restored_events = load_snapshot(path, mmap=mmap, adaptive_ticks=False)
+
+    assert restored.keys == fleet.keys and restored.names == fleet.names and restored.icons == fleet.icons
+    assert restored.clock == fleet.clock and restored.locations == fleet.locations
+    for column in _COLUMNS:
+        np.testing.assert_array_equal(getattr(restored, "_" + column)[:SIZE], getattr(fleet, "_" + column)[:SIZE])
+
+    np.testing.assert_array_equal(restored.risk.counts, fleet.risk.counts)
+    for status in AT_RISK_STATUSES:
+        assert restored.rows_with_status(status) == fleet.rows_with_status(status)
+    assert restored.most_at_risk(50) == fleet.most_at_risk(50)
+    assert fleet.anomalous_rows() and restored.anomalous_rows() == fleet.anomalous_rows()
+
+    assert [event["message"] for event in reversed(restored_events)] == [event["message"] for event in events]
+
+    # La flotte restaurée continue exactement comme l'originale
+    np.testing.assert_array_equal(restored.tick(now=0.0), fleet.tick(now=0.0))
+    np.testing.assert_array_equal(restored.status, fleet.status)
+
+
+def test_restored_columns_are_copy_on_write(saved):
+    fleet, _, path = saved
+    restored, _ = load_snapshot(path)
+    restored.perform_maintenance(0)
+    again, _ = load_snapshot(path)
+    assert again.status[0] == fleet.status[0]
+
+
+def test_damaged_snapshot_is_rejected(saved, tmp_path):
+    _, _, path = saved
+    with open(path, "rb") as handle:
+        data = handle.read()
+    truncated = tmp_path / "truncated.snapshot"
+    truncated.write_bytes(data[:-1])
+    with pytest.raises(SnapshotError, match="truncated"):
+        load_snapshot(str(truncated))
+    foreign = tmp_path / "foreign.snapshot"
+    foreign.write_bytes(b"NOTASNAP" + data[8:])
+    with pytest.raises(SnapshotError, match="not a fleet snapshot"):
+        load_snapshot(str(foreign))
@@ -0,0 +1,127 @@
+"""
+Lecture de la télémétrie : les lignes invalides sont écartées et comptées
+sans interrompre la lecture, avec ou sans pyarrow, et un flux qui s'arrête
+sur erreur est signalé par le service.
+"""
+import io
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from pionier import FleetState, telemetry
+from pionier.service import SimulationService
+from pionier.telemetry import TelemetryBatch, TelemetryFeed, read_csv, read_lines, read_parquet
+
+ROWS = [
+    "1.0,A,80.5,2.0",
+    "2.0,B,,3.0",  # Valeur absente : NaN, ligne gardée
+    "x,A,81,2.0",  # Horodatage illisible
+    "3.0,A,hot,2.0",  # Température illisible
+    "4.0,,80,2.0",  # Équipement absent
+    "5.0,A,80",  # Colonne manquante
+    "6.0,A,80,2.0,9",  # Colonne en trop
+    "7.0,B,82,2.5",
+]
+VALID = [(1.0, "A", 80.5, 2.0), (2.0, "B", np.nan, 3.0), (7.0, "B", 82.0, 2.5)]
+INVALID = 5
+
+
+@pytest.fixture(params=["pyarrow", "python"])
+def reader_mode(request, monkeypatch):
+    if request.param == "pyarrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(telemetry, "_pyarrow", lambda: None)
+    return request.param
+
+
+def collect(batches):
+    """Concatène des lots en (mesures, lignes écartées)."""
+    readings, skipped = [], 0
+    for batch in batches:
+        uniques, codes = batch.assets
+        readings += zip(batch.timestamps.tolist(), [uniques[code] for code in codes],
+                        batch.temperature.tolist(), batch.vibration.tolist())
+        skipped += batch.skipped
+    return readings, skipped
+
+
+def assert_readings(readings, expected):
+    assert len(readings) == len(expected)
+    for got, want in zip(readings, expected):
+        assert got[:2] == want[:2]
+        np.testing.assert_array_equal(got[2:], want[2:])
+
+
+@pytest.mark.parametrize("batch_size", [2, 1000])
+def test_csv_skips_and_counts_invalid_rows(tmp_path, reader_mode, batch_size):
+    path = tmp_path / "telemetry.csv"
+    path.write_text("\n".join(["timestamp,asset,temperature,vibration"] + ROWS) + "\n")
+    readings, skipped = collect(read_csv(str(path), batch_size=batch_size))
+    assert_readings(readings, VALID)
+    assert skipped == INVALID
+
+
+def test_csv_parses_iso_timestamps(tmp_path, reader_mode):
+    path = tmp_path / "telemetry.csv"
+    path.write_text("timestamp,asset,temperature,vibration\n2024-01-01T00:00:00,A,80,2\n2024-01-01T01:00:00,B,81,3\n")
+    readings, skipped = collect(read_csv(str(path)))
+    start = datetime.fromisoformat("2024-01-01T00:00:00").timestamp()  # Heure locale
+    assert_readings(readings, [(start, "A", 80.0, 2.0), (start + 3600, "B", 81.0, 3.0)])
+    assert skipped == 0
+
+
+def test_lines_skip_and_count_invalid_rows(reader_mode):
+    # Flux sans en-tête, sans saut de ligne final
+    stream = io.BytesIO("\n".join(ROWS).encode())
+    readings, skipped = collect(read_lines(stream, batch_size=1000, chunk_size=16))
+    assert_readings(readings, VALID)
+    assert skipped == INVALID
+
+
+def test_parquet_skips_rows_without_asset(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    path = tmp_path / "telemetry.parquet"
+    pq.write_table(pa.table({
+        "timestamp": pa.array([1_000_000, 2_000_000, 3_000_000], pa.timestamp("us")),
+        "asset": ["A", None, "B"],
+        "temperature": [80.0, 81.0, None],
+        "vibration": [2.0, 2.1, 2.2],
+    }), path)
+    readings, skipped = collect(read_parquet(str(path), batch_size=2))
+    assert_readings(readings, [(1.0, "A", 80.0, 2.0), (3.0, "B", np.nan, 2.2)])
+    assert skipped == 1
+
+
+def test_parquet_requires_pyarrow(monkeypatch):
+    monkeypatch.setattr(telemetry, "_pyarrow", lambda: None)
+    with pytest.raises(ImportError):
+        next(read_parquet("telemetry.parquet"))
+
+
+def test_feed_error_is_reported_once():
+    fleet = FleetState()
+    fleet.add_assets(["A", "B"], ["Asset A", "Asset B"], ["icon"] * 2, 90, 0.1, 1000)
+
+    def batches():
+        yield TelemetryBatch(np.array([1.0, 2.0]), (["A", "C"], np.array([0, 1])),
+                             np.array([80.0, 81.0]), np.array([2.0, 2.0]), skipped=3)
+        raise OSError("connection reset")
+
+    feed = TelemetryFeed(batches(), fleet.index).start()
+    feed._thread.join(5)
+    assert feed.finished and isinstance(feed.error, OSError)
+    assert feed.readings == 1 and feed.skipped == 3  # L'équipement inconnu n'est pas compté comme invalide
+
+    service = SimulationService(fleet, tick_interval=0)
+    service.attach_telemetry(feed)
+    service.step()
+    service.step()
+    errors = [event["message"] for event in service.events.latest(level="error")]
+    assert errors == ["Telemetry feed stopped: connection reset"]
+    values = {name: value for name, labels, value in service.metrics.values()}
+    assert values["pionier_telemetry_invalid_total"] == 3
+    assert values["pionier_telemetry_readings_total"] == 1
+    assert fleet.last_reading_ts[fleet.index["A"]] == 1.0